@@ -0,0 +1,72 @@
+"""
+Measures search log inserts per second against a scratch database file:
+
+    python -m benchmarks.db_writes [rows] [threads]
+
+Run from the repository root. Compares a commit per insert on the default
+rollback journal (the old setup), a commit per insert with WAL and
+synchronous=NORMAL, and the group-commit write queue fed by several threads.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from src.modules.config import Config
+from src.modules.DatabaseManager import DatabaseManager
+
+
+def open_db(directory, name, wal, synchronous):
+    Config.DB_WAL, Config.DB_SYNCHRONOUS = wal, synchronous
+    db = DatabaseManager(os.path.join(directory, name))
+    db.insert_user("bench@example.com", "Bench", "bench")
+    return db, db.get_user_id_by_email("bench@example.com")
+
+
+def run_threads(threads, rows, insert):
+    def work(n):
+        for i in range(rows // threads):
+            insert(f"query {n}-{i}")
+    workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return start
+
+
+def bench(directory, name, rows, threads, wal, synchronous, queued):
+    db, user_id = open_db(directory, name, wal, synchronous)
+    if queued:
+        start = run_threads(threads, rows, lambda query: db.queue_search(user_id, query))
+        db.writes.flush()
+    else:
+        start = run_threads(threads, rows, lambda query: db.log_search(user_id, query))
+    elapsed = time.perf_counter() - start
+    written = len(db.get_search_history(user_id))
+    db.close()
+    return written / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rows", nargs="?", type=int, default=2000)
+    parser.add_argument("threads", nargs="?", type=int, default=4)
+    args = parser.parse_args()
+    defaults = Config.DB_WAL, Config.DB_SYNCHRONOUS
+    with tempfile.TemporaryDirectory() as directory:
+        cases = [
+            ("rollback journal, commit per insert", False, "FULL", False),
+            ("WAL + NORMAL, commit per insert", True, "NORMAL", False),
+            ("WAL + NORMAL, group commit", True, "NORMAL", True),
+        ]
+        for n, (label, wal, synchronous, queued) in enumerate(cases):
+            rate = bench(directory, f"bench{n}.db", args.rows, args.threads, wal, synchronous, queued)
+            print(f"{label:<38} {rate:>10,.0f} inserts/s")
+    Config.DB_WAL, Config.DB_SYNCHRONOUS = defaults
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures how long it takes to encode a page of search results as JSON:
+
+    python -m benchmarks.json_encoding [products] [repeat]
+
+Run from the repository root. Search results are lists of product dicts, as
+returned by the ui driver. Compares the standard json module, orjson when it
+is installed, and records_json, which the JSON search response uses.
+"""
+
+import argparse
+import json
+import time
+from src.modules.formatter import numericFields
+from src.modules.json_provider import ORJSON_AVAILABLE, orjson, orjson_options, records_json
+
+SITES = ["amazon", "walmart", "bestbuy", "ebay", "target", "costco"]
+
+
+def results(count):
+    """A list of product dicts shaped like the one returned by the ui driver."""
+    products = []
+    for i in range(count):
+        price = f"${i % 500}.{i % 100:02d}"
+        rating = None if i % 7 == 0 else round(3 + (i % 20) / 10, 1)
+        no_of_ratings = None if i % 5 == 0 else str(i * 3)
+        products.append(dict(
+            numericFields(price, rating, no_of_ratings),
+            timestamp="18/10/2026 12:00:00",
+            title=f"Product {i} with a reasonably long retail title, size {i % 12}",
+            price=price,
+            link=f"https://www.{SITES[i % len(SITES)]}.com/ip/product-{i}",
+            website=SITES[i % len(SITES)],
+            rating=rating,
+            no_of_ratings=no_of_ratings,
+            trending=None,
+            img_link=f"https://images.example.com/{i}.jpg",
+        ))
+    return products
+
+
+def best_of(repeat, encode):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("products", nargs="?", type=int, default=1000)
+    parser.add_argument("repeat", nargs="?", type=int, default=20)
+    args = parser.parse_args()
+    data = results(args.products)
+    cases = [("json", lambda: json.dumps(data, default=str).encode())]
+    if ORJSON_AVAILABLE:
+        cases.append(("orjson", lambda: orjson.dumps(data, default=str, option=orjson_options())))
+    cases.append(("records_json", lambda: records_json(data)))
+    for label, encode in cases:
+        ms, size = best_of(args.repeat, encode)
+        print(f"{label:<34} {ms:>8.2f} ms {size:>10,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares the BeautifulSoup and lxml fast-path parsers, and the embedded JSON
+readers where a page carries a payload, on saved search pages.
+
+    python -m benchmarks.parsers walmart saved_walmart.html [more.html ...]
+    python -m benchmarks.parsers bestbuy            # synthetic page
+
+Run from the repository root. Without page files a synthetic results page is
+generated for the chosen retailer, padded with the kind of head, inline
+script and footer markup that makes real result pages hundreds of KB.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+from src.modules.extraction import extract, extractFast, extractEmbedded
+
+ROWS = {
+    "walmart": """
+<div data-item-id="{i}">
+  <div class="relative overflow-hidden"><img src="https://i5.walmartimages.com/{i}.jpg"/></div>
+  <a href="/ip/item-{i}"><span class="lh-title">Walmart item {i}</span></a>
+  <div data-automation-id="product-price"><span class="w_iUH7">current price $1{i}.99</span></div>
+  <span class="w_iUH7">4.{d} out of 5 Stars. {i} reviews</span>
+  <span class="sans-serif gray f7">{i}</span>
+</div>""",
+    "bestbuy": """
+<li class="sku-item">
+  <img class="product-image" src="https://pisces.bbystatic.com/{i}.jpg"/>
+  <h4 class="sku-title"><a href="/site/item-{i}.p">Best Buy item {i}</a></h4>
+  <div class="c-ratings-reviews"><p>Rating 4.{d} out of 5 stars with {i} reviews</p></div>
+  <span class="c-reviews">({i})</span>
+  <div class="priceView-customer-price"><span>$2{i}.49</span></div>
+</li>""",
+    "amazon": """
+<div data-component-type="s-search-result">
+  <h2 class="a-size-small a-spacing-none a-color-base s-line-clamp-2 a-text-normal">
+    <a class="a-link-normal" href="/dp/{i}"><span>Amazon item {i}</span></a></h2>
+  <span class="a-price"><span class="a-offscreen">$3{i}.00</span></span>
+  <span class="a-icon-alt">4.{d} out of 5 stars</span>
+  <span class="a-size-base">{i}</span>
+  <img class="s-image" src="https://m.media-amazon.com/{i}.jpg"/>
+</div>""",
+}
+
+
+def syntheticPage(site, rows):
+    head = "<head>" + "<style>.c{color:red}</style>" * 2000 + "</head>"
+    chrome = "<nav>" + "<a href='/c'>category</a>" * 2000 + "</nav>"
+    script = "<script>window.__DATA__=" + "{\"x\": 1}," * 20000 + "</script>"
+    if site == "walmart":
+        # Walmart also ships the results as a Next.js payload.
+        items = [{"__typename": "Product", "name": f"Walmart item {i}", "canonicalUrl": f"/ip/item-{i}",
+                  "priceInfo": {"linePrice": f"$1{i}.99"}, "averageRating": 4 + i % 10 / 10,
+                  "numberOfReviews": i, "imageInfo": {"thumbnailUrl": f"https://i5.walmartimages.com/{i}.jpg"}}
+                 for i in range(rows)]
+        data = {"props": {"pageProps": {"initialData": {"searchResult": {"itemStacks": [{"items": items}]}}}}}
+        script += f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+    body = "".join(ROWS[site].format(i=i, d=i % 10) for i in range(rows))
+    return f"<html>{head}<body>{chrome}<main>{body}</main>{script}</body></html>".encode()
+
+
+def measure(func, repeat):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        products = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(products)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BeautifulSoup and lxml search page parsers")
+    parser.add_argument("site", choices=sorted(ROWS) + ["google", "bjs"])
+    parser.add_argument("pages", nargs="*", help="saved search result pages")
+    parser.add_argument("--rows", type=int, default=60, help="rows in the synthetic page")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, "rb") as f:
+                pages.append((path, f.read()))
+    elif args.site in ROWS:
+        pages = [("synthetic", syntheticPage(args.site, args.rows))]
+    else:
+        parser.error(f"no synthetic page for {args.site}; pass saved pages")
+
+    for name, content in pages:
+        print(f"{name}: {len(content) / 1024:.0f} KB")
+        soup = measure(lambda: extract(BeautifulSoup(content, "lxml"), args.site, 0, None), args.repeat)
+        fast = measure(lambda: extractFast(content, args.site, 0, None), args.repeat)
+        runs = [("beautifulsoup", soup), ("lxml fast path", fast)]
+        if extractEmbedded(content, args.site, 0, None) is not None:
+            runs.append(("embedded json", measure(lambda: extractEmbedded(content, args.site, 0, None), args.repeat)))
+        for label, (elapsed, peak, count) in runs:
+            print(f"  {label:15} {elapsed * 1000:8.1f} ms  peak {peak / 2**20:6.1f} MB  {count} products"
+                  f"  ({soup[0] / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,8 @@ export default function SearchPage() {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [results, setResults] = useState([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [hasSearched, setHasSearched] = useState(false);
   const [username, setUsername] = useState('');
   const [errorMessage, setErrorMessage] = useState<string | null>(null);
@@ -66,11 +68,45 @@ export default function SearchPage() {
     checkAuth();
   }, [router, productName]);
 
+  const processProducts = (products) => products.map(product => ({
+    ...product,
+    // Use title or name or product_name, falling back to other potential fields
+    title: product.title || product.name || product.product_name || 'Product'
+  }));
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setIsLoadingMore(true);
+      const response = await fetch(`${BACKEND_URL}/search?cursor=${encodeURIComponent(nextCursor)}&format=json`, {
+        credentials: 'include',
+        headers: {
+          'Accept': 'application/json'
+        },
+      });
+      const data = await response.json();
+      if (!response.ok || data.error) {
+        // The server only keeps results for a while; search again to get fresh ones
+        setErrorMessage(data.error || 'Failed to load more results.');
+        setNextCursor(null);
+        return;
+      }
+      setResults(previous => [...previous, ...processProducts(data.products || [])]);
+      setNextCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('Error loading more results:', error);
+      setErrorMessage('Failed to load more results. Please try again later.');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const performSearch = async (term) => {
     try {
       setIsSearching(true);
       setHasSearched(false);
       setErrorMessage(null);
+      setNextCursor(null);
       
       // Call backend search API with a format parameter to ensure we get JSON
       const response = await fetch(`${BACKEND_URL}/search?product_name=${encodeURIComponent(term)}&format=json`, {
@@ -111,19 +147,11 @@ export default function SearchPage() {
         }
         
         // Process products to ensure all required fields are present
-        const processedProducts = data.products.map(product => {
-          // Debug each product title
-          console.log(`Product title fields: title=${product.title}, name=${product.name}, productName=${product.product_name}`);
-          
-          return {
-            ...product,
-            // Use title or name or product_name, falling back to other potential fields
-            title: product.title || product.name || product.product_name || 'Product'
-          };
-        });
+        const processedProducts = processProducts(data.products);
         
-        // Update results first
+        // Update results first; later pages are fetched with the cursor
         setResults(processedProducts);
+        setNextCursor(data.next_cursor || null);
       } else {
         // Unexpected response format
         console.error('Unexpected response format:', data);
@@ -467,6 +495,14 @@ export default function SearchPage() {
               })}
             </div>
           )}
+
+          {!isSearching && nextCursor && (
+            <div className="flex justify-center mt-6">
+              <Button variant="outline" onClick={loadMore} disabled={isLoadingMore}>
+                {isLoadingMore ? "Loading..." : "Load more"}
+              </Button>
+            </div>
+          )}
           
           {/* Only show "No results" when: not searching, has searched, and has no results */}
           {!isSearching && hasSearched && results.length === 0 && productName && (
@@ -5,7 +5,12 @@ This allows running the app without hardcoded URLs.
 import os
 import sys
 import argparse
-from src.modules.app import app
+import threading
+from src.modules.app import app, PREFETCHER
+from src.modules.config import Config
+from src.modules.scraper import AMAZON_BROWSER_POOL
+from src.modules.transport import install_dns_cache
+from src.modules.formatter import EXCHANGES
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Run the Flask application')
@@ -14,6 +19,10 @@ if __name__ == '__main__':
     parser.add_argument('--frontend-url', help='URL of the frontend application')
     parser.add_argument('--redirect-uri', help='Google OAuth redirect URI')
     parser.add_argument('--debug', action='store_true', help='Run in debug mode')
+    parser.add_argument('--no-warm-browsers', action='store_true',
+                        help='Do not pre-launch the headless browsers used for Amazon searches')
+    parser.add_argument('--no-prefetch', action='store_true',
+                        help='Do not pre-scrape the most searched queries in the background')
     
     args = parser.parse_args()
     
@@ -31,5 +40,20 @@ if __name__ == '__main__':
     if 'GOOGLE_REDIRECT_URI' in os.environ:
         print(f"Google redirect URI: {os.environ['GOOGLE_REDIRECT_URI']}")
     
+    # Cache DNS lookups of the retailer hosts when DNS_CACHE=1
+    if install_dns_cache() is not None:
+        print(f"DNS cache enabled ({Config.DNS_CACHE_TTL:g}s)")
+
+    # Launch the Amazon browser pool in the background so the first search skips the cold start
+    if not args.no_warm_browsers:
+        threading.Thread(target=AMAZON_BROWSER_POOL.warm, daemon=True).start()
+
+    # Load the exchange rates before the first search that converts a price
+    EXCHANGES.warm()
+
+    # Keep the most common searches warm in the search cache
+    if Config.PREFETCH_ENABLED and not args.no_prefetch:
+        PREFETCHER.start()
+
     # Run the application
     app.run(host=args.host, port=args.port, debug=args.debug) 
\ No newline at end of file
@@ -1,16 +1,257 @@
+import atexit
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import groupby
+from .config import Config
+
+
+def add_wishlist_list_name(cursor):
+    """Databases created before named wishlists keep every item in the default list."""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(wishlists)").fetchall()]
+    if "list_name" not in columns:
+        cursor.execute("ALTER TABLE wishlists ADD COLUMN list_name TEXT NOT NULL DEFAULT 'default'")
+
+
+# Schema changes after the tables in create_tables, in order; a database's PRAGMA
+# user_version is the number of migrations already applied to it.
+MIGRATIONS = [
+    ("named wishlists", [add_wishlist_list_name]),
+    ("indexes for the per-user and per-product lookups", [
+        # A product appears at most once per wishlist.
+        """
+        DELETE FROM wishlists WHERE id NOT IN (
+            SELECT MIN(id) FROM wishlists GROUP BY user_id, list_name, product_id
+        )
+        """,
+        "DROP INDEX IF EXISTS idx_wishlists_user_list",
+        "CREATE UNIQUE INDEX idx_wishlists_user_list ON wishlists (user_id, list_name, product_id)",
+        "CREATE INDEX idx_search_history_user_time ON search_history (user_id, timestamp)",
+        "CREATE INDEX idx_search_history_time ON search_history (timestamp)",
+        "CREATE INDEX idx_comments_product_time ON comments (product_id, timestamp)",
+        # Deleting a user cascades to their comments.
+        "CREATE INDEX idx_comments_user ON comments (user_id)",
+    ]),
+    ("comments looked up by product title", [
+        "CREATE INDEX idx_products_name ON products (name)",
+    ]),
+    # A comment keeps the title it was posted under, which may differ from the stored name
+    # of the product it is linked to by URL.
+    ("comments keyed by the title they were posted for", [
+        "ALTER TABLE comments ADD COLUMN product_name TEXT",
+        "UPDATE comments SET product_name = (SELECT name FROM products WHERE products.id = comments.product_id)",
+        "CREATE INDEX idx_comments_product_name ON comments (product_name, timestamp)",
+    ]),
+]
+
+
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections. Connections are opened on demand up
+    to `size`; once all are in use, callers wait up to `timeout` seconds for
+    one to be released.
+    """
+
+    def __init__(self, database, size, timeout):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.connections = []
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._waits = 0
+
+    def _connect(self):
+        # Each connection is only used by one thread at a time, but may be released by another.
+        conn = sqlite3.connect(self.database, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        if self.database != ":memory:":
+            # WAL lets readers run alongside the writer; with synchronous=NORMAL a commit
+            # no longer waits for an fsync, only checkpoints do.
+            if Config.DB_WAL:
+                conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute(f"PRAGMA synchronous = {Config.DB_SYNCHRONOUS};")
+            conn.execute(f"PRAGMA cache_size = -{Config.DB_CACHE_KB};")
+            conn.execute(f"PRAGMA mmap_size = {Config.DB_MMAP_SIZE};")
+            conn.execute("PRAGMA temp_store = MEMORY;")
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self.connections) < self.size:
+                conn = self._connect()
+                self.connections.append(conn)
+                return conn
+            self._waits += 1
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No database connection free after {self.timeout}s") from None
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a connection out for ad-hoc statements from scripts and tests,
+        committing them when the block ends or rolling back if it raises.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self.connections:
+                conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "open": len(self.connections), "idle": self._idle.qsize(), "waits": self._waits}
+
+
+class WriteQueue:
+    """
+    Group commit for high-volume inserts. Statements passed to put() are
+    written by one background thread, up to `batch_size` rows per
+    transaction and at most `interval` seconds after they were queued.
+    """
+
+    def __init__(self, db, batch_size, interval):
+        self.db = db
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "written": 0, "batches": 0, "failed": 0}
+
+    def put(self, sql, params):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._stats["queued"] += 1
+        self._queue.put((sql, params))
+
+    def flush(self):
+        """Blocks until every statement queued so far is committed."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Writes what is queued and stops the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.interval
+            # Collect statements until the batch is full, the interval has passed, or a flush asks for it.
+            while isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) == self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _write(self, batch):
+        try:
+            with self.db.transaction() as cursor:
+                for sql, rows in groupby(batch, key=lambda statement: statement[0]):
+                    cursor.executemany(sql, [params for _, params in rows])
+            written, failed = len(batch), 0
+        except sqlite3.Error:
+            # One bad row must not cost the others, so write them one by one.
+            written, failed = 0, 0
+            for sql, params in batch:
+                try:
+                    with self.db.transaction() as cursor:
+                        cursor.execute(sql, params)
+                    written += 1
+                except sqlite3.Error as e:
+                    print(f"Queued database write failed: {e}")
+                    failed += 1
+        with self._lock:
+            self._stats["written"] += written
+            self._stats["failed"] += failed
+            self._stats["batches"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=self._queue.qsize())
+
 
 class DatabaseManager:
-    def __init__(self, db_file="database.db"):
-        """Initialize the database connection."""
+    def __init__(self, db_file="database.db", pool_size=None):
+        """Initialize the database connection pool."""
         self.db_file = db_file
-        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
-        self.cursor = self.conn.cursor()
-        self.cursor.execute("PRAGMA foreign_keys = ON;")
+        # An in-memory database only exists within its connection, so it is never shared out.
+        size = 1 if db_file == ":memory:" else pool_size or Config.DB_POOL_SIZE
+        self.pool = ConnectionPool(db_file, size, Config.DB_TIMEOUT)
+        self._local = threading.local()
+        self.writes = WriteQueue(self, Config.DB_WRITE_BATCH, Config.DB_WRITE_INTERVAL)
 
         self.create_tables()
 
+    @contextmanager
+    def transaction(self):
+        """
+        Yields a cursor on a pooled connection and commits when the block ends,
+        or rolls back if it raises. Nested transactions on the same thread join
+        the outer one.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
+
+        conn = self._local.conn = self.pool.acquire()
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            self._local.conn = None
+            self.pool.release(conn)
+
     def create_tables(self):
         """Creates all necessary tables if they don't exist."""
         sql_script = """
@@ -67,11 +308,22 @@ class DatabaseManager:
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER NOT NULL,
             product_id INTEGER NOT NULL,
+            list_name TEXT NOT NULL DEFAULT 'default',
             added_on DATETIME DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
             FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
         );
 
+        -- Named Wishlists Table
+        CREATE TABLE IF NOT EXISTS wishlist_names (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            created_on DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (user_id, name),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        );
+
         -- Comments Table
         CREATE TABLE IF NOT EXISTS comments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -84,93 +336,153 @@ class DatabaseManager:
             FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
         );
         """
-        self.cursor.executescript(sql_script)
-        self.conn.commit()
+        with self.transaction() as cursor:
+            cursor.executescript(sql_script)
+        self.migrate()
+
+    def schema_version(self):
+        with self.transaction() as cursor:
+            return cursor.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        """Applies the migrations newer than the database's user_version, each in its own transaction."""
+        for version, (_description, steps) in enumerate(MIGRATIONS, start=1):
+            if version <= self.schema_version():
+                continue
+            with self.transaction() as cursor:
+                # DDL does not open a transaction implicitly, so a failed step could leave half a migration.
+                # IMMEDIATE takes the write lock up front, and user_version is read again under it in case
+                # another process applied this step since the check above.
+                cursor.execute("BEGIN IMMEDIATE")
+                if cursor.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(f"PRAGMA user_version = {version}")
 
     ### USER MANAGEMENT ###
     def insert_user(self, email, full_name, name, password_hash=None, phone_number=None, dob=None, address=None, 
                 email_verified=False, profile_picture_url=None, google_id=None):
         """Inserts a new user into the database, supporting Google OAuth users."""
         try:
-            self.cursor.execute("""
-                INSERT INTO users (email, full_name, name, password_hash, phone_number, dob, address, 
-                                email_verified, profile_picture_url, last_login_at, last_activity_at, created_at, account_status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (email, full_name, name, password_hash, phone_number, dob, address, 
-                int(email_verified), profile_picture_url, datetime.now(), datetime.now(), datetime.now(), "active"))
-            self.conn.commit()
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    INSERT INTO users (email, full_name, name, password_hash, phone_number, dob, address, 
+                                    email_verified, profile_picture_url, last_login_at, last_activity_at, created_at, account_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (email, full_name, name, password_hash, phone_number, dob, address, 
+                    int(email_verified), profile_picture_url, datetime.now(), datetime.now(), datetime.now(), "active"))
         except sqlite3.IntegrityError:
             print(f"User with email {email} already exists!")
 
     def update_last_login(self, email, last_login_ip=None):
         """Updates the last login time and IP for a user."""
-        self.cursor.execute("""
-            UPDATE users 
-            SET last_login_at = ?, last_login_ip = ?, last_activity_at = ? 
-            WHERE email = ?
-        """, (datetime.now(), last_login_ip, datetime.now(), email))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            cursor.execute("""
+                UPDATE users 
+                SET last_login_at = ?, last_login_ip = ?, last_activity_at = ? 
+                WHERE email = ?
+            """, (datetime.now(), last_login_ip, datetime.now(), email))
 
 
     def user_exists(self, email):
         """Checks if a user exists in the database by email."""
-        self.cursor.execute("SELECT COUNT(*) FROM users WHERE email = ?", (email,))
-        result = self.cursor.fetchone()
+        with self.transaction() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM users WHERE email = ?", (email,))
+            result = cursor.fetchone()
         return result[0] > 0  # Returns True if user exists, False otherwise
     
     def get_user(self, email):
         """Retrieves user details by email."""
-        self.cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-        return self.cursor.fetchone()
+        with self.transaction() as cursor:
+            cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+            return cursor.fetchone()
 
     def delete_user(self, email):
         """Deletes a user by email."""
-        self.cursor.execute("DELETE FROM users WHERE email = ?", (email,))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM users WHERE email = ?", (email,))
 
     ### PRODUCT MANAGEMENT ###
     def insert_product(self, name, description, price, currency, rating, num_reviews, url, image_url, category, source):
         """Inserts a new product into the database."""
-        self.cursor.execute("""
-            INSERT INTO products (name, description, price, currency, rating, num_reviews, url, image_url, category, source, last_scraped_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (name, description, price, currency, rating, num_reviews, url, image_url, category, source, datetime.now()))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO products (name, description, price, currency, rating, num_reviews, url, image_url, category, source, last_scraped_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (name, description, price, currency, rating, num_reviews, url, image_url, category, source, datetime.now()))
 
     def get_product(self, url):
         """Retrieves product details by URL."""
-        self.cursor.execute("SELECT * FROM products WHERE url = ?", (url,))
-        return self.cursor.fetchone()
+        with self.transaction() as cursor:
+            cursor.execute("SELECT * FROM products WHERE url = ?", (url,))
+            return cursor.fetchone()
+
+    def update_product_price(self, url, price):
+        """Stores a freshly scraped price and marks the product as just scraped."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                UPDATE products SET price = ?, last_scraped_at = ? WHERE url = ?
+            """, (price, datetime.now(), url))
 
     ### SEARCH HISTORY ###
     def log_search(self, user_id, search_query, filters_applied=None, num_results=None):
         """Logs a user's search query."""
-        self.cursor.execute("""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO search_history (user_id, search_query, filters_applied, num_results, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, search_query, filters_applied, num_results, datetime.now()))
+
+    def queue_search(self, user_id, search_query, filters_applied=None, num_results=None):
+        """Queues a search log for the next group commit instead of committing it right away."""
+        self.writes.put("""
             INSERT INTO search_history (user_id, search_query, filters_applied, num_results, timestamp)
             VALUES (?, ?, ?, ?, ?)
         """, (user_id, search_query, filters_applied, num_results, datetime.now()))
-        self.conn.commit()
 
     def get_search_history(self, user_id):
         """Retrieves search history for a user."""
-        self.cursor.execute("SELECT * FROM search_history WHERE user_id = ? ORDER BY timestamp DESC", (user_id,))
-        return self.cursor.fetchall()
+        self.writes.flush()
+        with self.transaction() as cursor:
+            cursor.execute("SELECT * FROM search_history WHERE user_id = ? ORDER BY timestamp DESC", (user_id,))
+            return cursor.fetchall()
+
+    def get_top_queries(self, limit=20, since=None):
+        """Returns the most searched queries as (query, count) pairs, optionally only those after `since`."""
+        self.writes.flush()
+        with self.transaction() as cursor:
+            cursor.execute("""
+                SELECT lower(trim(search_query)) AS query, COUNT(*) AS searches
+                FROM search_history
+                WHERE timestamp >= ? AND trim(search_query) != ''
+                GROUP BY query
+                ORDER BY searches DESC, MAX(timestamp) DESC
+                LIMIT ?
+            """, (since or "", limit))
+            return cursor.fetchall()
 
    ### WISHLIST MANAGEMENT ###
-    def get_wishlist(self, user_id):
-        """Retrieves all products in a user's wishlist."""
-        self.cursor.execute("""
-            SELECT p.* FROM products p
-            INNER JOIN wishlists w ON p.id = w.product_id
-            WHERE w.user_id = ?
-        """, (user_id,))
-        return self.cursor.fetchall()
+    def get_wishlist(self, user_id, list_name="default"):
+        """Retrieves all products in one of a user's wishlists, in the order they were added."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                SELECT p.* FROM products p
+                INNER JOIN wishlists w ON p.id = w.product_id
+                WHERE w.user_id = ? AND w.list_name = ?
+                ORDER BY w.id
+            """, (user_id, list_name))
+            return cursor.fetchall()
     
-    def is_product_in_wishlist(self, user_id, product_id):
-        self.cursor.execute('''
-            SELECT 1 FROM wishlists WHERE user_id = ? AND product_id = ?
-        ''',    (user_id, product_id))
-        return self.cursor.fetchone() is not None
+    def is_product_in_wishlist(self, user_id, product_id, list_name="default"):
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT 1 FROM wishlists WHERE user_id = ? AND list_name = ? AND product_id = ?
+            ''',    (user_id, list_name, product_id))
+            return cursor.fetchone() is not None
 
     # def add_to_wishlist(self, user_id, title, image, price, website, rating):
     #     self.cursor.execute('''
@@ -179,54 +491,150 @@ class DatabaseManager:
     #     ''', (user_id, title, image, price, website, rating))
     #     self.conn.commit()
 
-    def remove_from_wishlist(self, user_id, product_id):
-        self.cursor.execute('''
-            DELETE FROM wishlists WHERE user_id = ? AND product_id = ?
-        ''', (user_id, product_id))
-        self.conn.commit()
+    def remove_from_wishlist(self, user_id, product_id, list_name="default"):
+        with self.transaction() as cursor:
+            cursor.execute('''
+                DELETE FROM wishlists WHERE user_id = ? AND list_name = ? AND product_id = ?
+            ''', (user_id, list_name, product_id))
+
+    def remove_wishlist_position(self, user_id, list_name, position):
+        """Removes the item at a 0-based position of a wishlist; returns True if there was one."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                DELETE FROM wishlists WHERE id = (
+                    SELECT id FROM wishlists WHERE user_id = ? AND list_name = ?
+                    ORDER BY id LIMIT 1 OFFSET ?
+                )
+            """, (user_id, list_name, position))
+            return cursor.rowcount > 0
+
+    def add_to_wishlist(self, user_id, product_id, list_name="default"):
+        """Adds a product to one of the user's wishlists, preventing duplicates."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                SELECT 1 FROM wishlists WHERE user_id = ? AND list_name = ? AND product_id = ?
+            """, (user_id, list_name, product_id))
+            
+            if cursor.fetchone():
+                return  # Product is already in the wishlist, do nothing
 
-    def add_to_wishlist(self, user_id, product_id):
-        """Adds a product to the user's wishlists, preventing duplicates."""
-        self.cursor.execute("""
-            SELECT 1 FROM wishlists WHERE user_id = ? AND product_id = ?
-        """, (user_id, product_id))
-        
-        if self.cursor.fetchone():
-            return  # Product is already in the wishlist, do nothing
+            cursor.execute("""
+                INSERT INTO wishlists (user_id, product_id, list_name, added_on)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, product_id, list_name, datetime.now()))
 
-        self.cursor.execute("""
-            INSERT INTO wishlists (user_id, product_id, added_on)
-            VALUES (?, ?, ?)
-        """, (user_id, product_id, datetime.now()))
-        self.conn.commit()
+    def create_wishlist(self, user_id, list_name):
+        """Creates an empty named wishlist; does nothing if it already exists."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT OR IGNORE INTO wishlist_names (user_id, name, created_on) VALUES (?, ?, ?)
+            """, (user_id, list_name, datetime.now()))
+
+    def get_wishlist_names(self, user_id):
+        """Names of a user's wishlists, including lists that only exist through their items."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                SELECT name FROM wishlist_names WHERE user_id = ?
+                UNION
+                SELECT DISTINCT list_name FROM wishlists WHERE user_id = ?
+            """, (user_id, user_id))
+            return [row[0] for row in cursor.fetchall()]
+
+    def delete_wishlist(self, user_id, list_name):
+        """Deletes a named wishlist and its items."""
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM wishlists WHERE user_id = ? AND list_name = ?", (user_id, list_name))
+            cursor.execute("DELETE FROM wishlist_names WHERE user_id = ? AND name = ?", (user_id, list_name))
 
 
     ### COMMENTS MANAGEMENT ###
     def add_comment(self, user_id, product_id, comment, rating_given=None):
         """Adds a comment to a product."""
-        self.cursor.execute("""
-            INSERT INTO comments (user_id, product_id, comment, rating_given, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, product_id, comment, rating_given, datetime.now()))
-        self.conn.commit()
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO comments (user_id, product_id, product_name, comment, rating_given, timestamp)
+                VALUES (?, ?, (SELECT name FROM products WHERE id = ?), ?, ?, ?)
+            """, (user_id, product_id, product_id, comment, rating_given, datetime.now()))
 
     def get_comments(self, product_id):
         """Retrieves all comments for a product."""
-        self.cursor.execute("""
-            SELECT u.name, c.comment, c.rating_given, c.timestamp
-            FROM comments c
-            INNER JOIN users u ON c.user_id = u.id
-            WHERE c.product_id = ?
-            ORDER BY c.timestamp DESC
-        """, (product_id,))
-        return self.cursor.fetchall()
+        with self.transaction() as cursor:
+            cursor.execute("""
+                SELECT u.name, c.comment, c.rating_given, c.timestamp
+                FROM comments c
+                INNER JOIN users u ON c.user_id = u.id
+                WHERE c.product_id = ?
+                ORDER BY c.timestamp DESC
+            """, (product_id,))
+            return cursor.fetchall()
+
+    def add_named_comment(self, product_name, email, comment, url=None, source=None):
+        """
+        Adds a comment to the product with this link or, failing that, this title,
+        creating the user and product rows the comment refers to when needed.
+        The comment is listed under product_name whatever the product's stored name.
+        """
+        with self.transaction() as cursor:
+            cursor.execute("INSERT OR IGNORE INTO users (email, name) VALUES (?, ?)", (email, email))
+            user_id = cursor.execute("SELECT id FROM users WHERE email = ?", (email,)).fetchone()[0]
+            product = None
+            if url:
+                product = cursor.execute("SELECT id FROM products WHERE url = ?", (url,)).fetchone()
+            if product is None:
+                product = cursor.execute("""
+                    SELECT id FROM products WHERE name = ? ORDER BY id DESC LIMIT 1
+                """, (product_name,)).fetchone()
+            if product is None:
+                # Without a link, the title stands in for it so the product is still unique.
+                cursor.execute("""
+                    INSERT INTO products (name, url, source, last_scraped_at) VALUES (?, ?, ?, ?)
+                """, (product_name, url or product_name, source or "unknown", datetime.now()))
+                product = (cursor.lastrowid,)
+            cursor.execute("""
+                INSERT INTO comments (user_id, product_id, product_name, comment, timestamp) VALUES (?, ?, ?, ?, ?)
+            """, (user_id, product[0], product_name, comment, datetime.now()))
+
+    def get_comments_for_names(self, product_names):
+        """Returns (product title, user email, comment) rows of the comments posted for these titles, oldest first."""
+        product_names = list(product_names)
+        rows = []
+        with self.transaction() as cursor:
+            for start in range(0, len(product_names), 500):
+                chunk = product_names[start:start + 500]
+                cursor.execute(f"""
+                    SELECT c.product_name, u.email, c.comment
+                    FROM comments c
+                    INNER JOIN users u ON c.user_id = u.id
+                    WHERE c.product_name IN ({", ".join("?" * len(chunk))})
+                    ORDER BY c.timestamp, c.id
+                """, chunk)
+                rows.extend(cursor.fetchall())
+        return rows
 
     def get_user_id_by_email(self, email):
-        self.cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
-        result = self.cursor.fetchone()
+        with self.transaction() as cursor:
+            cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
+            result = cursor.fetchone()
         return result[0] if result else None
 
     
     def close(self):
-        """Closes the database connection."""
-        self.conn.close()
+        """Writes any queued statements and closes every pooled connection."""
+        self.writes.close()
+        self.pool.close()
+
+
+_SHARED = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_manager(db_file="database.db"):
+    """
+    The DatabaseManager of db_file shared by the whole process, created on
+    first use, so every module writes through one pool and one write queue.
+    """
+    with _SHARED_LOCK:
+        db = _SHARED.get(db_file)
+        if db is None:
+            db = _SHARED[db_file] = DatabaseManager(db_file)
+        return db
@@ -5,21 +5,30 @@ See the LICENSE file in the project root for the full license information.
 """
 import time
 import os
-import csv
 import sqlite3
-import pandas as pd
-from flask import Flask, session, render_template, request, redirect, url_for, jsonify, make_response
+from flask import Flask, session, render_template, request, redirect, url_for, jsonify, make_response, Response, stream_with_context
 from google.oauth2 import id_token
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport import requests
 from flask_cors import CORS
-from .scraper import driver
+from .scraper import (
+    driver, iter_search, filter as filter_products, normalize_products, AMAZON_BROWSER_POOL, SEARCH_CACHE, SESSION, SEARCH_FLIGHTS, DRIVER_FLIGHTS
+)
+from .transport import DNS_CACHE, HOST_GUARDS
+from .async_scraper import run_async_driver
+from .prefetch import Prefetcher
+from .comments import CommentStore
+from .result_pages import ResultPages
+from .ranking import TopK, SORT_CODES
+from .json_provider import install as install_json_provider, json_response, records_json
+from .price_refresh import WISHLIST_REFRESHER
+from .formatter import parsePrice
 from .features import (
     create_user, check_user, wishlist_add_item,
     read_wishlist, wishlist_remove_list, share_wishlist
 )
 from .config import Config
-from .DatabaseManager import DatabaseManager
+from .DatabaseManager import shared_manager
 from dotenv import load_dotenv
 import json
 import requests as rq
@@ -36,6 +45,7 @@ GROQ_MODEL = "llama3-70b-8192"
 # Initialize Flask app
 app = Flask(__name__, template_folder=".")
 app.secret_key = Config.SECRET_KEY
+install_json_provider(app)
 # Configure session cookies
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 app.config['SESSION_COOKIE_HTTPONLY'] = True
@@ -43,7 +53,13 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Allows cookies to be sent in sa
 # Configure CORS to allow the frontend to access the backend API
 # Include support for credentials (cookies)
 CORS(app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:3000"}})
-db = DatabaseManager()
+# Shared with the CLI wishlists in features, so the database has a single write queue
+db = shared_manager()
+# Keeps the most searched queries warm in the search cache; started by run.py
+PREFETCHER = Prefetcher(db.get_top_queries)
+COMMENTS = CommentStore(db)
+# Finished searches whose later pages are served from memory
+RESULT_PAGES = ResultPages()
 
 # Google OAuth2 setup (Use secure transport in production)
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
@@ -58,26 +74,9 @@ flow = Flow.from_client_secrets_file(
     redirect_uri=Config.GOOGLE_REDIRECT_URI
 )
 
-def load_comments():
-    """Load comments from comments.csv."""
-    comments = {}
-    try:
-        with open('comments.csv', mode='r') as file:
-            reader = csv.DictReader(file)
-            if {'product_name', 'username', 'comment'} - set(reader.fieldnames):
-                raise ValueError("comments.csv is missing required headers.")
-
-            for row in reader:
-                product_name = row['product_name']
-                comments.setdefault(product_name, []).append({
-                    'username': row['username'],
-                    'comment': row['comment']
-                })
-    except FileNotFoundError:
-        print("comments.csv not found.")
-    except ValueError as e:
-        print(f"Error in loading comments: {e}")
-    return comments
+def load_comments(product_names):
+    """Load the comments of the listed products."""
+    return COMMENTS.for_products(product_names)
 
 # Sample product data
 products = {
@@ -246,6 +245,14 @@ def search():
         else:
             return redirect(url_for('login'))
 
+    # Later pages come from the result set of the first one, without scraping again
+    cursor = request.args.get("cursor")
+    if cursor:
+        page = RESULT_PAGES.from_cursor(cursor, owner=session.get('username'))
+        if page is None:
+            return jsonify({'error': 'These search results have expired, please search again.'}), 410
+        return search_page_json(page)
+
     product = request.args.get("product_name") or request.form.get("product_name")
     if not product or product == "":
         if want_json:
@@ -256,18 +263,24 @@ def search():
             )
             
     start_time = time.time()
+    site_status = {}
     try:
-        # Use a timeout for the scraper call to prevent long-running requests
-        data = driver(product, currency=None)
+        # Sites that miss their deadline are dropped so the request stays bounded. ui=True returns
+        # plain product dicts, so no DataFrame is built for a web search.
+        if Config.ASYNC_SEARCH:
+            data = run_async_driver(product, currency=None, ui=True, site_status=site_status)
+        else:
+            data = driver(product, currency=None, ui=True, site_status=site_status)
         
-        # Check if data is None or empty DataFrame
-        if data is None or (isinstance(data, pd.DataFrame) and data.empty):
+        # Check if data is None or empty
+        if not data:
             if want_json:
                 return jsonify({
                     'error': 'No results found or search timed out.',
                     'products': [],
                     'product_name': product,
-                    'total_pages': 0
+                    'total_pages': 0,
+                    'site_status': site_status
                 }), 200  # Return 200 with empty results rather than 404
             else:
                 return render_template(
@@ -296,15 +309,9 @@ def search():
     processing_time = end_time - start_time
     print("Processing time:", processing_time, "seconds")
 
-    try:
-        comments = load_comments()
-    except Exception as e:
-        print(f"Error loading comments: {str(e)}")
-        comments = {}
-    
     # Calculate total pages only if we have valid data
     total_pages = 0
-    if isinstance(data, pd.DataFrame) and not data.empty:
+    if data:
         total_pages = (len(data) + 19) // 20
 
         # Log the search to the database 
@@ -313,34 +320,138 @@ def search():
             filters_applied = ""
             num_results = len(data)
             user_id = db.get_user_id_by_email(email)
-            db.log_search(user_id, product, filters_applied, num_results)
+            db.queue_search(user_id, product, filters_applied, num_results)
         except Exception as log_error:
             print(f"Logging search failed: {log_error}")
-    # If the request wants JSON (API request), return JSON
+    # If the request wants JSON (API request), return the first page and keep the rest for its cursor
     if want_json:
-        if isinstance(data, pd.DataFrame):
-            products_list = data.to_dict(orient='records')
-        else:
-            products_list = []
-            
-        return jsonify({
-            'products': products_list,
-            'product_name': product,
-            'total_pages': total_pages,
-            'comments': comments,
-            'processing_time': processing_time
-        })
-    
+        result_id = RESULT_PAGES.store(
+            data, owner=session.get('username'),
+            meta={'product_name': product, 'site_status': site_status, 'processing_time': processing_time}
+        )
+        return search_page_json(RESULT_PAGES.page(result_id, 0, requested_page_size(), owner=session.get('username')))
+
+    try:
+        comments = load_comments([p.get('title') for p in data])
+    except Exception as e:
+        print(f"Error loading comments: {str(e)}")
+        comments = {}
+
     # Otherwise return the HTML template
     return render_template(
         "./static/result.html", 
-        data=data.to_dict(orient='records') if isinstance(data, pd.DataFrame) and not data.empty else [], 
+        data=data, 
         prod=product,
         total_pages=total_pages, 
         comments=comments
     )
 
 
+def requested_page_size():
+    """The page_size query parameter, within 1..SEARCH_PAGE_MAX."""
+    try:
+        size = int(request.args.get('page_size', Config.SEARCH_PAGE_SIZE))
+    except ValueError:
+        size = Config.SEARCH_PAGE_SIZE
+    return min(max(size, 1), Config.SEARCH_PAGE_MAX)
+
+
+def search_page_json(page):
+    """The JSON response for one page of search results, with the comments of that page's products."""
+    try:
+        comments = load_comments([record.get('title') for record in page['records']])
+    except Exception as e:
+        print(f"Error loading comments: {str(e)}")
+        comments = {}
+    meta = page['meta']
+    # The products are encoded once and spliced into the body, not copied into it.
+    return json_response(app, {
+        'product_name': meta.get('product_name'),
+        'total_results': page['total'],
+        'total_pages': page['total_pages'],
+        'page': page['page'],
+        'next_cursor': page['next_cursor'],
+        'comments': comments,
+        'processing_time': meta.get('processing_time'),
+        'site_status': meta.get('site_status')
+    }, products=records_json(page['records']))
+
+
+def stream_event(event, data, ndjson=False):
+    """Encodes one streamed search message as an SSE event or an NDJSON line."""
+    if ndjson:
+        return app.json.dumps({'event': event, **data}) + "\n"
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
+@app.route("/search/stream", methods=["GET"])
+def search_stream():
+    """
+    Streams each retailer's results as soon as its scraper finishes, followed by a summary.
+    Uses Server-Sent Events by default, or newline-delimited JSON with ?format=ndjson.
+    With ?sort= (e.g. price, rating:desc or pasc) every event also carries the best
+    page_size products across the sites finished so far.
+    """
+    if 'username' not in session:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    product = request.args.get("product_name")
+    if not product:
+        return jsonify({'error': 'Please enter a search term.'}), 400
+
+    ndjson = request.args.get('format') == 'ndjson'
+    email = session.get("username")
+    ranked = None
+    if request.args.get('sort'):
+        try:
+            ranked = TopK(request.args['sort'], requested_page_size())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    def generate():
+        start_time = time.time()
+        total_results = 0
+        sites = {}
+        for index, site, products, status in iter_search(product, currency=None):
+            # The same links and fields as /search returns
+            normalize_products(products)
+            total_results += len(products)
+            sites[site] = status
+            event = {
+                'site': site,
+                'products': products,
+                'status': status,
+                'elapsed': time.time() - start_time
+            }
+            if ranked is not None:
+                event['top'] = ranked.extend(p for p in products if p.get('title')).result()
+            yield stream_event('results', event, ndjson)
+
+        processing_time = time.time() - start_time
+        print("Processing time:", processing_time, "seconds")
+        if total_results:
+            # Log the search to the database
+            try:
+                user_id = db.get_user_id_by_email(email)
+                db.queue_search(user_id, product, "", total_results)
+            except Exception as log_error:
+                print(f"Logging search failed: {log_error}")
+
+        yield stream_event('summary', {
+            'product_name': product,
+            'total_results': total_results,
+            'total_pages': (total_results + 19) // 20,
+            'sites': sites,
+            'processing_time': processing_time
+        }, ndjson)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson' if ndjson else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/add_comment', methods=['POST'])
 def add_comment():
     product_name = request.form.get('product_name')
@@ -348,16 +459,19 @@ def add_comment():
     username = session.get('username')
 
     if product_name and comment and username:
-        with open('comments.csv', mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([product_name, username, comment])
+        COMMENTS.add(product_name, username, comment, request.form.get('link'), request.form.get('website'))
 
     return redirect(url_for('search'))
 
 
 @app.route("/filter", methods=["POST", "GET"])
 def product_search_filtered():
+    """The /search results within price and rating bounds, ranked by the chosen sort order."""
+    if 'username' not in session:
+        return redirect(url_for('login'))
     product = request.args.get("product_name")
+    if not product:
+        return render_template("./static/result.html", error="Please enter a search term.", total_pages=0)
     sort = request.form.get("sort")
     currency = request.form.get("currency")
     min_price, max_price, min_rating = map(
@@ -367,13 +481,38 @@ def product_search_filtered():
             request.form.get("min_rating")
         ]
     )
-    return product_search_filtered(
-        product, sort if sort != "default" else None,
-        currency if currency != "usd" else None, None,
-        min_price, max_price, min_rating
+    try:
+        data = driver(product, currency if currency and currency != "usd" else None, ui=True)
+        data = filter_products(data or [], min_price, max_price, min_rating)
+        if sort in SORT_CODES:
+            data = TopK(sort).extend(data).result()
+    except Exception as e:
+        print(f"Error in scraper: {str(e)}")
+        return render_template(
+            "./static/result.html",
+            error="An error occurred while searching. Please try again later.",
+            total_pages=0
+        )
+    try:
+        comments = load_comments([p.get('title') for p in data])
+    except Exception as e:
+        print(f"Error loading comments: {str(e)}")
+        comments = {}
+    return render_template(
+        "./static/result.html",
+        data=data,
+        prod=product,
+        total_pages=(len(data) + 19) // 20,
+        comments=comments
     )
 
 
+# JSON names of the products table columns, in table order.
+WISHLIST_JSON_FIELDS = (
+    'id', 'title', 'description', 'price', 'currency', 'rating', 'num_reviews',
+    'url', 'img', 'category', 'website', 'last_scraped_at'
+)
+
 
 @app.route('/wishlist')
 def wishlist():
@@ -416,26 +555,17 @@ def wishlist():
         
         wishlist_items = db.get_wishlist(user_id)
         app.logger.info(f"Wishlist items found: {len(wishlist_items)}")
+
+        # Answer with the stored prices; prices older than the TTL are re-scraped in the background
+        refreshing = WISHLIST_REFRESHER.refresh(
+            ((item[7], item[10], item[11]) for item in wishlist_items),
+            on_price=lambda link, website, price: db.update_product_price(link, parsePrice(price)[0]),
+        )
         
         # If JSON is requested, return JSON
         if request.headers.get('Accept') == 'application/json':
-            products_json = []
-            for item in wishlist_items:
-                app.logger.debug(f"Processing wishlist item: {item}")
-                products_json.append({
-                    'id': item[0],  # product_id
-                    'title': item[1],  # name
-                    'description': item[2],  # description
-                    'price': item[3],  # price
-                    'currency': item[4],  # currency
-                    'rating': item[5],  # rating
-                    'num_reviews': item[6],  # num_reviews
-                    'url': item[7],  # url
-                    'img': item[8],  # image_url
-                    'category': item[9],  # category
-                    'website': item[10]  # source
-                })
-            return jsonify({'products': products_json})
+            products_json = [dict(zip(WISHLIST_JSON_FIELDS, item)) for item in wishlist_items]
+            return jsonify({'products': products_json, 'refreshing': refreshing})
             
         # Otherwise, render the template
         return render_template('wishlist.html', products=wishlist_items)
@@ -677,6 +807,24 @@ def check_auth():
         # Not authenticated
         return jsonify({'authenticated': False}), 401
 
+@app.route('/api/metrics')
+def metrics():
+    """API endpoint exposing scraper performance counters"""
+    return jsonify({
+        'browser_pool': AMAZON_BROWSER_POOL.metrics(),
+        'search_cache': SEARCH_CACHE.stats(),
+        'http_pools': SESSION.metrics(),
+        'dns_cache': DNS_CACHE.stats() if DNS_CACHE.installed else None,
+        'coalescing': {'searches': SEARCH_FLIGHTS.stats(), 'drivers': DRIVER_FLIGHTS.stats()},
+        'circuits': HOST_GUARDS.snapshot(),
+        'prefetch': PREFETCHER.stats(),
+        'price_refresh': WISHLIST_REFRESHER.stats(),
+        'db_pool': db.pool.stats(),
+        'db_writes': db.writes.stats(),
+        'comments': COMMENTS.stats(),
+        'result_pages': RESULT_PAGES.stats()
+    }), 200
+
 def get_groq_headers():
     """Get headers for Groq API requests."""
     return {
@@ -755,7 +903,7 @@ def ai_recommendations():
                 filters_applied = ""
                 num_results = 0
                 user_id = db.get_user_id_by_email(email)
-                db.log_search(user_id, search_query, filters_applied, num_results)
+                db.queue_search(user_id, search_query, filters_applied, num_results)
             except Exception as log_error:
                 print(f"Logging search failed: {log_error}")
             
@@ -763,7 +911,7 @@ def ai_recommendations():
                 
                 results = searchWalmart(search_query, df_flag=0, currency=None)
 
-                if isinstance(results, pd.DataFrame):
+                if hasattr(results, 'to_dict'):
                     results = results.to_dict(orient='records') 
 
                 recommendations = results[:6] if isinstance(results, list) else []
@@ -0,0 +1,232 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The async_scraper module is an asyncio counterpart of the scraper module.
+Pages are fetched through one pooled httpx client per event loop and parsed
+with the same parse* functions the threaded scraper uses, so many searches
+can share a single event loop instead of a thread per site.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+import httpx
+from bs4 import BeautifulSoup
+from . import scraper
+from .config import Config
+from .transport import HTTP2_AVAILABLE, HOST_GUARDS, headersFor
+from .search_cache import make_key
+
+# One pooled client per event loop; an httpx client cannot be shared across loops.
+_CLIENTS = weakref.WeakKeyDictionary()
+
+# Background event loop used by run_async_driver() for synchronous callers.
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+
+def get_client():
+    """Returns the shared AsyncClient for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers=scraper.DEFAULT_HEADERS,
+            follow_redirects=True,
+            http2=Config.HTTP2 and HTTP2_AVAILABLE,
+            timeout=Config.ASYNC_REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=Config.ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.ASYNC_MAX_KEEPALIVE,
+            ),
+        )
+        _CLIENTS[loop] = client
+    return client
+
+
+async def close_client():
+    """Closes the shared client of the running event loop."""
+    client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def guarded_get(URL, headers=None, params=None):
+    """GET through the shared client, honouring the host's rate limit and circuit breaker."""
+    host = urlsplit(URL).hostname
+    guard = HOST_GUARDS.get(host)
+    wait = guard.acquire(host)
+    try:
+        if wait:
+            await asyncio.sleep(wait)
+        response = await get_client().get(URL, headers=headers or headersFor(URL), params=params)
+    except asyncio.CancelledError:
+        guard.breaker.release()
+        raise
+    except Exception:
+        guard.record(None)
+        raise
+    guard.record(response.status_code)
+    return response
+
+
+async def fetch(URL, headers=None, params=None):
+    """Async version of scraper.httpsGet returning the raw response, or None if blocked."""
+    response = await guarded_get(URL, headers=headers, params=params)
+    print("Status Code:", response.status_code)
+    if response.status_code != 200:
+        print("Likely redirected or blocked.")
+        return None
+    return response
+
+
+async def parse(parser, content, df_flag, currency):
+    """Builds the soup and runs a scraper.parse* function off the event loop."""
+    def work():
+        return parser(BeautifulSoup(content, "lxml"), df_flag, currency)
+    return await asyncio.to_thread(work)
+
+
+async def _search_page(URL, parser, df_flag, currency, website=None):
+    response = await fetch(URL)
+    if response is None:
+        # Mirror the threaded scrapers, which fail on a missing page.
+        raise Exception(f"No page returned for {URL}")
+    if website is not None:
+        return await asyncio.to_thread(scraper.parsePage, response.content, website, parser, df_flag, currency)
+    return await parse(parser, response.content, df_flag, currency)
+
+
+async def searchWalmart(query, df_flag, currency):
+    print("Searching Walmart...")
+    return await _search_page(scraper.walmartURL(query), scraper.parseWalmart, df_flag, currency, "walmart")
+
+
+async def searchBestbuy(query, df_flag, currency):
+    print("Searching Bestbuy...")
+    return await _search_page(scraper.bestbuyURL(query), scraper.parseBestbuy, df_flag, currency, "bestbuy")
+
+
+async def searchGoogleShopping(query, df_flag, currency):
+    print("Searching Google Shopping...")
+    return await _search_page(scraper.googleShoppingURL(query), scraper.parseGoogleShopping, df_flag, currency,
+                              "google")
+
+
+async def searchBJs(query, df_flag, currency):
+    print("Searching BJs...")
+    return await _search_page(scraper.bjsURL(query), scraper.parseBJs, df_flag, currency, "bjs")
+
+
+async def searchEtsy(query, df_flag, currency):
+    print("Searching Etsy...")
+    response = await guarded_get(scraper.etsyURL(query), headers=scraper.ETSY_HEADERS)
+    return await parse(scraper.parseEtsy, response.content, df_flag, currency)
+
+
+async def searchTarget(query, df_flag, currency):
+    print("Searching Target...")
+    try:
+        response = await guarded_get(scraper.TARGET_API_URL, params=scraper.targetApiParams(query))
+        scraper.checkTargetResponse(response.status_code, response.text)
+        return scraper.parseTargetApi(response.json(), df_flag, currency)
+    except Exception as e:
+        print(f"Target API error: {str(e)}. Attempting fallback using web scraping.")
+        try:
+            return await _search_page(scraper.targetURL(query), scraper.parseTargetPage, df_flag, currency)
+        except Exception as scrape_error:
+            print(f"Target fallback scraping also failed: {str(scrape_error)}")
+            return []
+
+
+ASYNC_SEARCHES = {
+    "walmart": searchWalmart,
+    "bestbuy": searchBestbuy,
+    "google": searchGoogleShopping,
+    "bjs": searchBJs,
+    "etsy": searchEtsy,
+    "target": searchTarget,
+}
+
+
+def in_thread(search_func):
+    """Wraps a blocking scraper (Selenium, eBay SDK) so it can be awaited."""
+    async def run(query, df_flag, currency):
+        return await asyncio.to_thread(search_func, query, df_flag, currency)
+    run.__name__ = search_func.__name__
+    return run
+
+
+def enabled_searches():
+    """The sites of scraper.enabled_searches() mapped to their awaitable search functions."""
+    return [
+        (site, ASYNC_SEARCHES.get(site) or in_thread(search_func))
+        for site, search_func in scraper.enabled_searches()
+    ]
+
+
+async def async_driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False, sort=None,
+                       site_status=None):
+    """
+    Async equivalent of scraper.driver: runs every enabled site concurrently
+    on the current event loop and returns the same DataFrame or list of dicts.
+    Sites are cancelled once they pass scraper.site_deadline().
+    """
+    searches = enabled_searches()
+    start = time.monotonic()
+    site_status = {} if site_status is None else site_status
+
+    async def safe_search(site, search_func):
+        key = make_key(product, site, currency, df_flag)
+        status = {"status": "ok"}
+        try:
+            products = await asyncio.wait_for(
+                scraper.SEARCH_CACHE.aget_or_fetch(
+                    key, lambda: scraper.SEARCH_FLIGHTS.ado(key, lambda: search_func(product, df_flag, currency))
+                ),
+                scraper.site_deadline(site),
+            )
+        except asyncio.TimeoutError:
+            print(f"{search_func.__name__} missed its {scraper.site_deadline(site)}s deadline")
+            products = []
+            status["status"] = "timeout"
+        except Exception as e:
+            print(f"Error in {search_func.__name__}: {str(e)}")
+            products = []  # Empty list on failure
+            status.update(status="error", error=str(e))
+        status.update(latency=round(time.monotonic() - start, 3), count=len(products))
+        scraper.add_circuit_state(site, status)
+        site_status[site] = status
+        return products
+
+    results = await asyncio.gather(*(safe_search(site, search_func) for site, search_func in searches))
+    return scraper.collect_results(list(results), product, currency, num, csv, cd, ui, sort)
+
+
+def get_loop():
+    """Returns the shared background event loop, starting its thread on first use."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="async-scraper", daemon=True).start()
+        return _LOOP
+
+
+def run_on_loop(*args):
+    return asyncio.run_coroutine_threadsafe(async_driver(*args), get_loop()).result()
+
+
+def run_async_driver(*args, **kwargs):
+    """
+    Runs async_driver on the shared background loop and waits for the result.
+    Lets synchronous callers such as Flask views and the CLI share one event
+    loop; identical concurrent searches are coalesced like scraper.driver.
+    """
+    return scraper.coalesced_driver(run_on_loop, *args, **kwargs)
@@ -0,0 +1,230 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The browser_pool module keeps a small set of warm headless Chrome instances
+that scrapers can borrow instead of launching a new browser per query.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+
+class BrowserPoolTimeout(Exception):
+    """Raised when no browser could be checked out of the pool in time."""
+
+
+class BrowserPoolFull(Exception):
+    """Raised when the checkout queue already holds the maximum number of waiters."""
+
+
+def chrome_factory(page_load_timeout=None):
+    """Launches a headless Chrome instance configured for scraping."""
+    options = Options()
+    options.add_argument("--headless")  # Run in background
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+    driver = webdriver.Chrome(options=options)
+    if page_load_timeout:
+        driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+
+class PooledBrowser:
+    """A browser owned by the pool together with its usage bookkeeping."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    A bounded pool of long-lived browsers.
+
+    Browsers are created lazily up to `size`, reused across checkouts and
+    recycled after `max_pages` page loads or when a health check fails.
+    At most `max_waiters` callers may queue for a browser at once; each waits
+    up to `checkout_timeout` seconds.
+    """
+
+    def __init__(self, size=2, max_pages=50, checkout_timeout=30, max_waiters=16,
+                 page_load_timeout=None, factory=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        self.max_waiters = max_waiters
+        self.factory = factory or (lambda: chrome_factory(page_load_timeout))
+        self._idle = []
+        self._created = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "launched": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    def _launch(self):
+        try:
+            browser = PooledBrowser(self.factory())
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["launched"] += 1
+        return browser
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+
+    def _discard(self, browser):
+        """Closes a browser and frees its slot for a replacement."""
+        self._quit(browser)
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, browser):
+        """Checks that the browser still responds, closing any stray tabs."""
+        try:
+            handles = browser.driver.window_handles
+            if not handles:
+                return False
+            for handle in handles[1:]:
+                browser.driver.switch_to.window(handle)
+                browser.driver.close()
+            browser.driver.switch_to.window(handles[0])
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """Checks a browser out of the pool, launching one if a slot is free."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            launch = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if not self._idle and self._created >= self.size and self._waiting >= self.max_waiters:
+                    self._stats["rejected"] += 1
+                    raise BrowserPoolFull(f"{self._waiting} callers already waiting for a browser")
+                self._waiting += 1
+                try:
+                    while not self._idle and self._created >= self.size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise BrowserPoolTimeout(f"No browser available after {timeout}s")
+                        self._cond.wait(remaining)
+                    if self._idle:
+                        browser = self._idle.pop()
+                    else:
+                        self._created += 1
+                        launch = True
+                finally:
+                    self._waiting -= 1
+            if launch:
+                browser = self._launch()
+            elif not self._is_healthy(browser):
+                with self._cond:
+                    self._stats["unhealthy"] += 1
+                self._discard(browser)
+                continue
+            waited = time.monotonic() - start
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["total_wait"] += waited
+                self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+            return browser
+
+    def release(self, browser, broken=False):
+        """Returns a browser to the pool, recycling it if it is worn out or broken."""
+        browser.pages_served += 1
+        if broken or self._closed or browser.pages_served >= self.max_pages:
+            with self._cond:
+                self._stats["recycled"] += 1
+            self._discard(browser)
+            return
+        with self._cond:
+            self._idle.append(browser)
+            self._cond.notify()
+
+    @contextmanager
+    def browser(self, timeout=None):
+        """Context manager yielding a webdriver borrowed from the pool."""
+        browser = self.acquire(timeout)
+        broken = False
+        try:
+            yield browser.driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(browser, broken)
+
+    def fetch_page(self, url, timeout=None):
+        """Loads `url` in a pooled browser and returns the rendered page source."""
+        with self.browser(timeout) as driver:
+            driver.get(url)
+            return driver.page_source
+
+    def warm(self):
+        """Launches browsers until the pool holds `size` instances."""
+        while True:
+            with self._cond:
+                if self._closed or self._created >= self.size:
+                    return
+                self._created += 1
+            try:
+                browser = self._launch()
+            except Exception as e:
+                print(f"Could not warm browser pool: {e}")
+                return
+            with self._cond:
+                self._idle.append(browser)
+                self._cond.notify()
+
+    def metrics(self):
+        """Returns checkout counters and wait-time statistics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["live"] = self._created
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._created - len(self._idle)
+            stats["waiting"] = self._waiting
+        stats["avg_wait"] = stats["total_wait"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def close(self):
+        """Quits every idle browser; browsers still checked out are quit on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for browser in idle:
+            self._quit(browser)
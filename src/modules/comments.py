@@ -0,0 +1,109 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The comments module serves product comments from the database comments
+table. Comments are looked up only for the product titles being shown and
+kept in a per-title cache that a new comment invalidates. Comments saved in
+the old comments.csv file can be imported once with
+
+    python -m src.modules.comments comments.csv
+"""
+
+import csv
+import sys
+import threading
+from collections import OrderedDict
+from .config import Config
+
+
+class CommentStore:
+    """Comments by product title, as {'username': ..., 'comment': ...} dicts, cached per title."""
+
+    def __init__(self, db, cache_size=None):
+        self.db = db
+        self.cache_size = cache_size or Config.COMMENT_CACHE_SIZE
+        self._cache = OrderedDict()
+        # Bumped by add() per title, and by import_csv() for every title, so a lookup
+        # that raced with them does not cache the old comments
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def for_products(self, product_names):
+        """Returns {title: [comments]} for the given titles that have comments."""
+        comments, missing = {}, []
+        with self._lock:
+            for name in dict.fromkeys(product_names):
+                if name in self._cache:
+                    self._cache.move_to_end(name)
+                    comments[name] = self._cache[name]
+                    self._stats["hits"] += 1
+                else:
+                    missing.append(name)
+                    self._stats["misses"] += 1
+            epoch = self._epoch
+            generations = {name: self._generations.get(name, 0) for name in missing}
+        if missing:
+            loaded = {name: [] for name in missing}
+            for name, username, comment in self.db.get_comments_for_names(missing):
+                loaded[name].append({"username": username, "comment": comment})
+            with self._lock:
+                # Titles without comments are cached too; they are the common case.
+                for name, entries in loaded.items():
+                    if self._epoch != epoch or self._generations.get(name, 0) != generations[name]:
+                        continue
+                    self._cache[name] = entries
+                    self._cache.move_to_end(name)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            comments.update(loaded)
+        return {name: entries for name, entries in comments.items() if entries}
+
+    def add(self, product_name, username, comment, url=None, source=None):
+        self.db.add_named_comment(product_name, username, comment, url, source)
+        with self._lock:
+            self._generations[product_name] = self._generations.get(product_name, 0) + 1
+            self._cache.pop(product_name, None)
+
+    def import_csv(self, path):
+        """
+        Imports a comments CSV with product_name (or product_id), username and
+        comment columns in one transaction; returns the number of comments.
+        """
+        with open(path, newline="") as file:
+            reader = csv.DictReader(file)
+            product_column = "product_name" if "product_name" in (reader.fieldnames or []) else "product_id"
+            if {product_column, "username", "comment"} - set(reader.fieldnames or []):
+                raise ValueError(f"{path} is missing required headers.")
+            count = 0
+            with self.db.transaction():
+                for row in reader:
+                    self.db.add_named_comment(row[product_column], row["username"], row["comment"])
+                    count += 1
+        with self._lock:
+            self._epoch += 1
+            self._cache.clear()
+        return count
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cached=len(self._cache))
+
+
+def main(argv):
+    from .DatabaseManager import DatabaseManager
+    if not argv:
+        print("Usage: python -m src.modules.comments comments.csv [database.db]")
+        return 1
+    store = CommentStore(DatabaseManager(*argv[1:2]))
+    print(f"Imported {store.import_csv(argv[0])} comments from {argv[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -6,6 +6,17 @@ See the LICENSE file in the project root for the full license information.
 """
 
 import os
+import tempfile
+
+
+def parse_site_values(value):
+    """Parses "amazon=20,walmart=8" into {"amazon": 20.0, "walmart": 8.0}."""
+    values = {}
+    for item in value.split(','):
+        if '=' in item:
+            site, number = item.split('=', 1)
+            values[site.strip().lower()] = float(number)
+    return values
 
 
 class Config(object):
@@ -27,6 +38,101 @@ class Config(object):
     # Use environment variables for the callback URL or fall back to the default Flask callback
     GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI', '')
     FRONTEND_URL = os.getenv('FRONTEND_URL', '')
+    # Headless browser pool used by the Amazon scraper
+    BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+    BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', '50'))
+    BROWSER_CHECKOUT_TIMEOUT = float(os.getenv('BROWSER_CHECKOUT_TIMEOUT', '30'))
+    BROWSER_MAX_WAITERS = int(os.getenv('BROWSER_MAX_WAITERS', '16'))
+    BROWSER_PAGE_LOAD_TIMEOUT = float(os.getenv('BROWSER_PAGE_LOAD_TIMEOUT', '20'))
+    # Asyncio scraping engine (src/modules/async_scraper.py)
+    ASYNC_SEARCH = os.getenv('ASYNC_SEARCH', '0') == '1'
+    ASYNC_REQUEST_TIMEOUT = float(os.getenv('ASYNC_REQUEST_TIMEOUT', '20'))
+    ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', '200'))
+    ASYNC_MAX_KEEPALIVE = int(os.getenv('ASYNC_MAX_KEEPALIVE', '40'))
+    # Search result cache; set SEARCH_CACHE_DB to a file path to enable the on-disk tier
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '512'))
+    SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '300'))
+    SEARCH_CACHE_STALE_TTL = float(os.getenv('SEARCH_CACHE_STALE_TTL', '1800'))
+    SEARCH_CACHE_DB = os.getenv('SEARCH_CACHE_DB', '')
+    # Search deadlines in seconds: one for the whole fan-out plus optional per-site limits
+    SCRAPER_WORKERS = int(os.getenv('SCRAPER_WORKERS', '32'))
+    SEARCH_DEADLINE = float(os.getenv('SEARCH_DEADLINE', '25'))
+    SITE_DEADLINES = parse_site_values(os.getenv('SITE_DEADLINES', 'walmart=10,bestbuy=10,amazon=20'))
+    # Exchange rates; EXCHANGE_RATES_FIXTURE points to a JSON file used instead of the network
+    EXCHANGE_RATES_CACHE = os.getenv(
+        'EXCHANGE_RATES_CACHE', os.path.join(tempfile.gettempdir(), 'slash_exchange_rates.json')
+    )
+    EXCHANGE_RATES_TTL = float(os.getenv('EXCHANGE_RATES_TTL', str(6 * 3600)))
+    EXCHANGE_RATES_FIXTURE = os.getenv('EXCHANGE_RATES_FIXTURE', '')
+    # HTTP transport shared by the scrapers (src/modules/transport.py). HTTP_POOL_MAXSIZE is the
+    # keep-alive limit per host; HTTP_HOST_POOL_SIZES overrides it per retailer, e.g. walmart=16
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '15'))
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '16'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '32'))
+    HTTP_HOST_POOL_SIZES = parse_site_values(os.getenv('HTTP_HOST_POOL_SIZES', ''))
+    HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', '0') == '1'
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+    HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', '0.3'))
+    # HTTP2 applies to the async httpx engine only (requests has no HTTP/2) and needs the h2
+    # package; "br" responses need the brotli package. Both are in requirements.txt
+    HTTP2 = os.getenv('HTTP2', '1') == '1'
+    # DNS_CACHE=1 makes run.py route every socket.getaddrinfo call of the process through a
+    # cache of DNS_CACHE_TTL seconds; failed lookups are remembered for DNS_NEGATIVE_TTL seconds
+    DNS_CACHE = os.getenv('DNS_CACHE', '0') == '1'
+    DNS_CACHE_TTL = float(os.getenv('DNS_CACHE_TTL', '300'))
+    DNS_NEGATIVE_TTL = float(os.getenv('DNS_NEGATIVE_TTL', '5'))
+    # Per-host rate limits (requests per second, HOST_RATE_LIMITS overrides per retailer,
+    # e.g. amazon=1) and circuit breakers that stop calling a host after repeated blocks
+    HOST_RATE_DEFAULT = float(os.getenv('HOST_RATE_DEFAULT', '5'))
+    HOST_RATE_LIMITS = parse_site_values(os.getenv('HOST_RATE_LIMITS', ''))
+    HOST_RATE_BURST = int(os.getenv('HOST_RATE_BURST', '10'))
+    HOST_RATE_MAX_WAIT = float(os.getenv('HOST_RATE_MAX_WAIT', '2'))
+    CIRCUIT_FAILURES = int(os.getenv('CIRCUIT_FAILURES', '5'))
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+    CIRCUIT_MAX_RESET_TIMEOUT = float(os.getenv('CIRCUIT_MAX_RESET_TIMEOUT', '300'))
+    CIRCUIT_JITTER = float(os.getenv('CIRCUIT_JITTER', '0.2'))
+    # Background prefetch of the most searched queries into the search cache. PREFETCH_HOURS
+    # limits runs to off-peak hours, e.g. 0-6,22-24; empty means any time
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', '1') == '1'
+    PREFETCH_INTERVAL = int(os.getenv('PREFETCH_INTERVAL', '30'))
+    PREFETCH_TOP_N = int(os.getenv('PREFETCH_TOP_N', '20'))
+    PREFETCH_WINDOW_DAYS = float(os.getenv('PREFETCH_WINDOW_DAYS', '7'))
+    PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '2'))
+    PREFETCH_BUDGET = int(os.getenv('PREFETCH_BUDGET', '40'))
+    PREFETCH_HOURS = os.getenv('PREFETCH_HOURS', '')
+    # Wishlist price refresh: prices younger than WISHLIST_PRICE_TTL seconds are not re-scraped
+    WISHLIST_PRICE_TTL = float(os.getenv('WISHLIST_PRICE_TTL', '3600'))
+    WISHLIST_REFRESH_WORKERS = int(os.getenv('WISHLIST_REFRESH_WORKERS', '8'))
+    WISHLIST_REFRESH_PER_SITE = int(os.getenv('WISHLIST_REFRESH_PER_SITE', '2'))
+    # SQLite connections: DatabaseManager opens up to DB_POOL_SIZE connections shared by the
+    # request threads, and waits up to DB_TIMEOUT seconds for a free connection or a lock
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+    DB_TIMEOUT = float(os.getenv('DB_TIMEOUT', '10'))
+    # Database file tuning: WAL journal, fsync only at checkpoints (DB_SYNCHRONOUS=NORMAL),
+    # page cache per connection in KB and memory-mapped I/O size in bytes
+    DB_WAL = os.getenv('DB_WAL', '1') == '1'
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL').upper()
+    DB_CACHE_KB = int(os.getenv('DB_CACHE_KB', '16384'))
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))
+    # Group commit for queued writes such as search logs: up to DB_WRITE_BATCH rows per
+    # transaction, written at most DB_WRITE_INTERVAL seconds after being queued
+    DB_WRITE_BATCH = int(os.getenv('DB_WRITE_BATCH', '500'))
+    DB_WRITE_INTERVAL = float(os.getenv('DB_WRITE_INTERVAL', '0.05'))
+    # Paged JSON search results: page size (the page_size parameter is capped at SEARCH_PAGE_MAX)
+    # and how many finished searches are kept, for how many seconds, to serve their later pages
+    SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', '20'))
+    SEARCH_PAGE_MAX = int(os.getenv('SEARCH_PAGE_MAX', '100'))
+    SEARCH_RESULT_SETS = int(os.getenv('SEARCH_RESULT_SETS', '256'))
+    SEARCH_RESULT_TTL = float(os.getenv('SEARCH_RESULT_TTL', '600'))
+    # JSON responses are encoded with orjson when it is installed; JSON_PROVIDER=json forces the stdlib
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto').lower()
+    # Product titles whose comments are kept in memory by the comment store
+    COMMENT_CACHE_SIZE = int(os.getenv('COMMENT_CACHE_SIZE', '2048'))
+    # Retailers whose search pages are parsed with lxml directly instead of BeautifulSoup,
+    # e.g. FAST_PARSER_SITES=walmart,bestbuy
+    FAST_PARSER_SITES = {
+        site.strip().lower() for site in os.getenv('FAST_PARSER_SITES', '').split(',') if site.strip()
+    }
 
     @classmethod
     def get_google_redirect_uri(cls, request=None):
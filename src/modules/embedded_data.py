@@ -0,0 +1,127 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The embedded_data module reads the product data that retailers ship inside
+their search pages as JSON (Next.js __NEXT_DATA__ and schema.org ld+json).
+Script tags are located with a byte scan, so no DOM is built; each reader
+returns a list of field dicts, or None when the page carries no usable payload.
+"""
+
+import json
+
+NEXT_DATA_MARKER = b'id="__NEXT_DATA__"'
+LD_JSON_MARKER = b'application/ld+json'
+
+
+def scriptPayloads(content, marker):
+    """Yields the body of every <script> tag whose opening tag contains `marker`."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    pos = content.find(marker)
+    while pos >= 0:
+        start = content.rfind(b"<script", 0, pos)
+        open_end = content.find(b">", pos)
+        if open_end < 0:
+            return
+        # The marker must sit inside the opening tag, not in text elsewhere.
+        if start < 0 or content.find(b">", start) != open_end:
+            pos = content.find(marker, open_end)
+            continue
+        end = content.find(b"</script>", open_end)
+        if end < 0:
+            return
+        yield content[open_end + 1:end]
+        pos = content.find(marker, end)
+
+
+def loadJson(payload):
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def dig(data, *keys):
+    """Follows nested keys, returning None as soon as one is missing."""
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def dollarPrice(value):
+    if value is None or value == "":
+        return None
+    return value if isinstance(value, str) else f"${value}"
+
+
+def walmartNextData(content):
+    """Products from the itemStacks of Walmart's __NEXT_DATA__ payload."""
+    for payload in scriptPayloads(content, NEXT_DATA_MARKER):
+        stacks = dig(loadJson(payload), "props", "pageProps", "initialData", "searchResult", "itemStacks")
+        if not stacks:
+            continue
+        products = []
+        for stack in stacks:
+            for item in stack.get("items") or []:
+                if item.get("__typename", "Product") != "Product" or not item.get("name"):
+                    continue
+                products.append({
+                    "title": item["name"],
+                    "price": dollarPrice(dig(item, "priceInfo", "linePrice")
+                                         or dig(item, "priceInfo", "currentPrice", "price")
+                                         or item.get("price")),
+                    "link": item.get("canonicalUrl") or "",
+                    "rating": item.get("averageRating"),
+                    "num_ratings": item.get("numberOfReviews"),
+                    "img_link": dig(item, "imageInfo", "thumbnailUrl") or item.get("image"),
+                })
+        return products or None
+    return None
+
+
+def ldProducts(data):
+    """Every schema.org Product in an ld+json document, including those wrapped in an ItemList or @graph."""
+    if isinstance(data, list):
+        for entry in data:
+            yield from ldProducts(entry)
+    elif isinstance(data, dict):
+        kind = data.get("@type")
+        if kind == "Product":
+            yield data
+        elif kind == "ItemList":
+            for element in data.get("itemListElement") or []:
+                yield from ldProducts(element.get("item", element) if isinstance(element, dict) else element)
+        elif "@graph" in data:
+            yield from ldProducts(data["@graph"])
+
+
+def ldJsonProducts(content):
+    """Products from the schema.org ld+json blocks of a page, as used by Best Buy."""
+    products = []
+    for payload in scriptPayloads(content, LD_JSON_MARKER):
+        for item in ldProducts(loadJson(payload)):
+            if not item.get("name"):
+                continue
+            offers = item.get("offers")
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            image = item.get("image")
+            if isinstance(image, list):
+                image = image[0] if image else None
+            if isinstance(image, dict):
+                image = image.get("url")
+            products.append({
+                "title": item["name"],
+                "price": dollarPrice(dig(offers, "price") or dig(offers, "lowPrice")),
+                "link": item.get("url") or "",
+                "rating": dig(item, "aggregateRating", "ratingValue"),
+                "num_ratings": dig(item, "aggregateRating", "reviewCount"),
+                "img_link": image,
+            })
+    return products or None
@@ -0,0 +1,129 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The exchange_rates module provides the USD exchange-rate table used for
+currency conversion. The table is loaded on first use, kept on disk between
+runs and refreshed in the background once it is older than its TTL.
+"""
+
+import json
+import os
+import threading
+import time
+import requests
+
+
+class ExchangeRateProvider:
+    """
+    Lazily loaded exchange-rate table.
+
+    Lookup order on first use: the offline `fixture_file` if given (the network
+    is then never used), the last good table saved in `cache_file`, and only
+    when neither exists a one-time download from `url`. Afterwards lookups are
+    served from memory; a stale table triggers a single background refresh.
+    """
+
+    def __init__(self, url, cache_file=None, ttl=6 * 3600, fixture_file=None, timeout=5):
+        self.url = url
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.fixture_file = fixture_file
+        self.timeout = timeout
+        self._table = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        # Held while the table is first loaded, so concurrent first lookups wait for one load.
+        self._load_lock = threading.Lock()
+
+    def _read_file(self, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read exchange rates from {path}: {e}")
+            return None
+        if "rates" not in data:
+            return None
+        return data
+
+    def _load(self):
+        if self.fixture_file:
+            self._table = self._read_file(self.fixture_file) or {"rates": {}}
+            self._fetched_at = float("inf")
+            return
+        if self.cache_file and os.path.exists(self.cache_file):
+            table = self._read_file(self.cache_file)
+            if table is not None:
+                self._table = table
+                self._fetched_at = os.path.getmtime(self.cache_file)
+                return
+        self.refresh()
+
+    def refresh(self):
+        """Downloads the latest table, keeping the previous one if the download fails."""
+        try:
+            response = requests.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            table = response.json()
+            if "rates" not in table:
+                raise ValueError("response has no rates")
+        except (requests.RequestException, ValueError) as e:
+            print(f"Failed to fetch exchange rates: {e}")
+            with self._lock:
+                if self._table is None:
+                    self._table = {"rates": {}}
+                # Back off for a full TTL before trying again.
+                self._fetched_at = time.time()
+            return False
+        with self._lock:
+            self._table = table
+            self._fetched_at = time.time()
+        if self.cache_file:
+            self._save(table)
+        return True
+
+    def _save(self, table):
+        tmp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(table, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Could not save exchange rates to {self.cache_file}: {e}")
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def table(self):
+        """Returns the current table, loading it on first use and refreshing it when stale."""
+        if self._table is None:
+            with self._load_lock:
+                if self._table is None:
+                    self._load()
+        with self._lock:
+            table = self._table
+            stale = time.time() - self._fetched_at > self.ttl and not self._refreshing
+            if stale:
+                self._refreshing = True
+        if stale:
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+        return table
+
+    def warm(self):
+        """Loads the table on a background thread, so the first conversion does not wait for it."""
+        thread = threading.Thread(target=self.table, name="exchange-rates", daemon=True)
+        thread.start()
+        return thread
+
+    def rate(self, currency, default=1):
+        """Returns the USD rate for a currency code."""
+        return self.table()["rates"].get(currency.upper(), default)
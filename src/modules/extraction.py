@@ -0,0 +1,241 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The extraction module describes how products are read from each retailer's
+search page. Every retailer is a RetailerSpec: a precompiled selector for the
+result rows plus one precompiled Field per product attribute. extract() runs
+any spec, so supporting a new page layout means editing RETAILER_SPECS.
+
+Every selector is also compiled to an lxml XPath, so extractFast() can read a
+raw page with lxml.html directly instead of building a BeautifulSoup tree.
+Retailers that ship their results as embedded JSON name a reader from the
+embedded_data module, which extractEmbedded() tries before any DOM is built.
+"""
+
+import re
+import soupsieve as sv
+from cssselect import HTMLTranslator
+from lxml import etree
+from lxml import html as lxml_html
+from .embedded_data import walmartNextData, ldJsonProducts
+from .formatter import formatResult
+
+CSS_TRANSLATOR = HTMLTranslator()
+
+
+def fastSelector(selector):
+    """Compiles a CSS selector to an lxml XPath that, like soupsieve's select(), matches descendants only."""
+    return etree.XPath(CSS_TRANSLATOR.css_to_xpath(selector, prefix="descendant::"))
+
+
+class LxmlNode:
+    """The part of the BeautifulSoup Tag API that formatResult and the transforms use, over an lxml element."""
+
+    __slots__ = ("el",)
+
+    def __init__(self, el):
+        self.el = el
+
+    def get_text(self):
+        return self.el.text_content()
+
+    @property
+    def text(self):
+        return self.el.text_content()
+
+    def get(self, key, default=None):
+        return self.el.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.el.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+class Field:
+    """
+    One product attribute: a compiled CSS selector, optionally keeping only
+    elements whose text matches `text`. `first` returns the first match (or
+    None) instead of the list, and `transform` post-processes the value.
+    """
+
+    __slots__ = ("selector", "fast", "text", "first", "transform")
+
+    def __init__(self, selector, text=None, first=False, transform=None):
+        self.selector = sv.compile(selector)
+        self.fast = fastSelector(selector)
+        self.text = re.compile(text) if text else None
+        self.first = first
+        self.transform = transform
+
+    def extract(self, res):
+        if self.first and self.text is None:
+            value = self.selector.select_one(res)
+        else:
+            value = self.selector.select(res)
+            if self.text is not None:
+                value = [el for el in value if self.text.search(el.get_text())]
+            if self.first:
+                value = value[0] if value else None
+        return self.transform(value) if self.transform else value
+
+    def extract_fast(self, res):
+        """Same as extract() for an lxml element."""
+        value = [LxmlNode(el) for el in self.fast(res)]
+        if self.text is not None:
+            value = [el for el in value if self.text.search(el.get_text())]
+        if self.first:
+            value = value[0] if value else None
+        return self.transform(value) if self.transform else value
+
+
+class RetailerSpec:
+    """
+    Selectors for one retailer; `post` may adjust each formatted product.
+    `start` is a snippet of the first result's markup: extractFast() only
+    parses the page from that tag onwards, skipping the head and page chrome.
+    `embedded` reads the products from JSON embedded in the raw page.
+    """
+
+    __slots__ = ("website", "results", "fast_results", "fields", "post", "start", "embedded")
+
+    def __init__(self, website, results, fields, post=None, start=None, embedded=None):
+        self.website = website
+        self.results = sv.compile(results)
+        self.fast_results = fastSelector(results)
+        self.fields = fields
+        self.post = post
+        self.start = start
+        self.embedded = embedded
+
+
+GOOGLE_REVIEW_COUNT = re.compile(r"(\d+,\d+)")
+
+
+def googleReviewCount(el):
+    match = GOOGLE_REVIEW_COUNT.search(el.get_text()) if el is not None else None
+    return match.group(1) if match else None
+
+
+def bjsStarRating(product, values):
+    # BJs draws the rating as a row of filled stars.
+    if values["stars"]:
+        product["rating"] = len(values["stars"])
+        product["rating_value"] = float(len(values["stars"]))
+
+
+RETAILER_SPECS = {
+    "amazon": RetailerSpec("amazon", "div[data-component-type='s-search-result']", {
+        "titles": Field("h2.a-size-small.a-spacing-none.a-color-base.s-line-clamp-2.a-text-normal span"),
+        "prices": Field("span.a-price span.a-offscreen"),
+        "links": Field("h2 a.a-link-normal"),
+        "ratings": Field("span.a-icon-alt"),
+        "num_ratings": Field("span.a-size-base"),
+        "trending": Field("span.a-badge-text", first=True),
+        "img_link": Field("img.s-image"),
+    }, start='data-component-type="s-search-result"'),
+    "walmart": RetailerSpec("walmart", "div[data-item-id]", {
+        "titles": Field("span.lh-title"),
+        "prices": Field("div[data-automation-id='product-price'] span.w_iUH7"),
+        "links": Field("a"),
+        "ratings": Field("span.w_iUH7", text=r"out of 5 Stars"),
+        "num_ratings": Field("span.sans-serif.gray.f7"),
+        "trending": Field("span.w_Cs", first=True),
+        "img_link": Field("div.relative.overflow-hidden img"),
+    }, start="data-item-id=", embedded=walmartNextData),
+    "bestbuy": RetailerSpec("bestbuy", "li.sku-item", {
+        "titles": Field("h4.sku-title a"),
+        "prices": Field("div.priceView-customer-price span"),
+        "links": Field("a"),
+        "ratings": Field("div.c-ratings-reviews p", text=r"out of 5 stars with"),
+        "num_ratings": Field("span.c-reviews"),
+        "img_link": Field("img.product-image"),
+    }, start='class="sku-item"', embedded=ldJsonProducts),
+    "google": RetailerSpec("google", "div.sh-dgr__grid-result", {
+        "titles": Field("h3"),
+        "prices": Field("span.a8Pemb"),
+        "links": Field("a"),
+        "ratings": Field("span.Rsc7Yb"),
+        "num_ratings": Field("span.QIrs8", first=True, transform=googleReviewCount),
+        "trending": Field("span.Ib8pOd", first=True),
+        "img_link": Field("div.SirUVb.sh-img__image img"),
+    }),
+    "bjs": RetailerSpec("bjs", "div.product", {
+        "titles": Field("p.no-select.d-none.auto-height"),
+        "prices": Field("span.price"),
+        "links": Field("a"),
+        "stars": Field("span.on"),
+        "num_ratings": Field("span.prod-comments-count"),
+        "trending": Field("p.instantSavings", first=True),
+    }, post=bjsStarRating),
+}
+
+
+def buildProduct(spec, values, df_flag, currency):
+    product = formatResult(spec.website, values.get("titles"), values.get("prices"), values.get("links"),
+                           values.get("ratings"), values.get("num_ratings"), values.get("trending"),
+                           df_flag, currency, values.get("img_link"))
+    if spec.post:
+        spec.post(product, values)
+    return product
+
+
+def extract(page, website, df_flag, currency):
+    """Runs the RetailerSpec for `website` over a parsed search page and returns formatted products."""
+    spec = RETAILER_SPECS[website]
+    return [
+        buildProduct(spec, {name: field.extract(res) for name, field in spec.fields.items()}, df_flag, currency)
+        for res in spec.results.select(page)
+    ]
+
+
+def resultMarkup(content, start):
+    """Cuts a page down to the markup from the tag containing `start` onwards, or returns it whole."""
+    if start:
+        found = content.find(start)
+        tag = content.rfind("<", 0, found) if found > 0 else -1
+        if tag >= 0:
+            return content[tag:]
+    return content
+
+
+def extractFast(content, website, df_flag, currency):
+    """
+    Like extract(), but reads the raw page (bytes or str) with lxml.html and
+    the precompiled XPath selectors, without building a BeautifulSoup tree.
+    """
+    spec = RETAILER_SPECS[website]
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    content = resultMarkup(content, spec.start)
+    if not content.strip():
+        return []
+    try:
+        root = lxml_html.document_fromstring(content)
+    except etree.ParserError:
+        return []
+    return [
+        buildProduct(spec, {name: field.extract_fast(res) for name, field in spec.fields.items()}, df_flag, currency)
+        for res in spec.fast_results(root)
+    ]
+
+
+def extractEmbedded(content, website, df_flag, currency):
+    """
+    Formats the products a retailer embeds in its page as JSON, or returns
+    None when the retailer has no reader or the page has no usable payload.
+    """
+    spec = RETAILER_SPECS.get(website)
+    items = spec.embedded(content) if spec is not None and spec.embedded else None
+    if items is None:
+        return None
+    return [
+        formatResult(spec.website, item["title"], item["price"], item["link"], item["rating"],
+                     item["num_ratings"], None, df_flag, currency, item["img_link"])
+        for item in items
+    ]
@@ -7,20 +7,41 @@ See the LICENSE file in the project root for the full license information.
 
 import logging
 import os
-import pandas as pd
 import re
 import ssl
 import smtplib
 from pathlib import Path
 from email.message import EmailMessage
 import csv
+import threading
 from .config import Config
 from . import scraper
+from .price_refresh import WISHLIST_REFRESHER
+from .formatter import parsePrice, parseRating
+from .DatabaseManager import shared_manager
 
 # Define the path for user profiles and their wishlists
 users_main_dir = Path(__file__).parent.parent / "users"
 users_main_dir.mkdir(parents=True, exist_ok=True)
 
+# Wishlists are stored in the database, user credentials still in the user directories.
+# WISHLIST_DB is set on first use to the manager the web app shares (see wishlist_db).
+WISHLIST_DB = None
+# Users whose wishlist CSV files were already looked for this run
+_CSV_CHECKED = set()
+_CSV_LOCK = threading.Lock()
+
+
+def wishlist_db():
+    """
+    The DatabaseManager holding the wishlists: the process-wide one of
+    database.db, so the CLI and the web app share a single pool and write queue.
+    """
+    global WISHLIST_DB
+    if WISHLIST_DB is None:
+        WISHLIST_DB = shared_manager()
+    return WISHLIST_DB
+
 # Helper function to get user directory path
 def usr_dir(email):
     return users_main_dir / email
@@ -34,7 +55,6 @@ def create_user(email, password=None, name=None):
     """
     user_dir = usr_dir(email)
     cred_file = user_dir / "cred.csv"
-    default_file = user_dir / "default.csv"
 
     # Create user directory if it doesn’t exist
     os.makedirs(user_dir, exist_ok=True)
@@ -47,10 +67,8 @@ def create_user(email, password=None, name=None):
             writer.writeheader()
             writer.writerow({"email": email, "name": name})
 
-    # Create an empty default.csv for wishlist if it doesn’t exist
-    if not default_file.exists():
-        with open(default_file, mode="w", newline="") as csvfile:
-            csvfile.write("")
+    # Every user starts with an empty default wishlist
+    create_wishlist(email, "default")
 
 
 def check_user(email, password=None):
@@ -63,77 +81,147 @@ def check_user(email, password=None):
 
 # Wishlist Functions
 
+# Columns of the wishlists returned by read_wishlist, as in the search results.
+WISHLIST_COLUMNS = ["title", "price", "link", "website", "rating", "img_link"]
+
+
+def wishlist_user_id(email):
+    """
+    Returns the database id of a CLI user, adding the user on first use.
+    Wishlists the user still has as CSV files are imported the first time.
+    """
+    db = wishlist_db()
+    user_id = db.get_user_id_by_email(email)
+    if user_id is None:
+        db.insert_user(email=email, full_name=None, name=email)
+        user_id = db.get_user_id_by_email(email)
+    with _CSV_LOCK:
+        check = email not in _CSV_CHECKED
+        _CSV_CHECKED.add(email)
+    if check:
+        import_csv_wishlists(email, user_id)
+    return user_id
+
+
+def import_csv_wishlists(email, user_id):
+    """
+    Moves the wishlists kept as <name>.csv files in the user's directory, as
+    written by earlier versions, into the database. Each imported file is
+    renamed to <name>.csv.imported so it is read only once. Returns the
+    number of imported items.
+    """
+    user_dir = usr_dir(email)
+    if not user_dir.is_dir():
+        return 0
+    count = 0
+    for path in sorted(user_dir.glob("*.csv")):
+        if path.name == "cred.csv":
+            continue
+        try:
+            with open(path, newline="") as file:
+                items = [row for row in csv.DictReader(file) if row.get("link")]
+            with wishlist_db().transaction():
+                wishlist_db().create_wishlist(user_id, path.stem)
+                add_items(user_id, path.stem, items)
+        except (OSError, csv.Error, KeyError) as e:
+            print(f"Importing wishlist {path} failed: {e}")
+            continue
+        path.rename(path.with_name(path.name + ".imported"))
+        count += len(items)
+    return count
+
+
+def format_price(price, currency):
+    """
+    Formats a stored product price as in the search results ("$12.50" or "INR 1040.0").
+    """
+    if price is None or isinstance(price, str):
+        return price
+    if currency in (None, "USD"):
+        return f"${price:,.2f}"
+    return f"{currency} {price}"
+
+
 def create_wishlist(email, wishlist_name):
     """
-    Creates a new wishlist file for the user.
+    Creates a new, empty wishlist for the user.
     """
-    wishlist_path = usr_dir(email) / f"{wishlist_name}.csv"
-    open(wishlist_path, "a").close()
+    wishlist_db().create_wishlist(wishlist_user_id(email), wishlist_name)
 
 
 def list_wishlists(email):
     """
     Lists all wishlists for a user.
     """
-    user_dir = usr_dir(email)
-    wishlists = [
-        wishlist.replace(".csv", "") for wishlist in os.listdir(user_dir)
-        if wishlist.endswith(".csv")
-    ]
-    return wishlists
+    return wishlist_db().get_wishlist_names(wishlist_user_id(email))
 
 
 def delete_wishlist(email, wishlist_name):
     """
-    Deletes a specified wishlist file for the user.
+    Deletes a specified wishlist and its items for the user.
     """
-    wishlist_path = usr_dir(email) / f"{wishlist_name}.csv"
-    wishlist_path.unlink(missing_ok=True)
+    wishlist_db().delete_wishlist(wishlist_user_id(email), wishlist_name)
 
 
 def wishlist_add_item(email, wishlist_name, item_data):
     """
-    Adds an item to a user's wishlist.
+    Adds one item (a dict) or every row of a DataFrame to a user's wishlist.
+    Products are stored once by link and shared between wishlists.
     """
-    wishlist_path = usr_dir(email) / f"{wishlist_name}.csv"
-    if isinstance(item_data, dict):
-        item_data = pd.DataFrame([item_data])
+    user_id = wishlist_user_id(email)
+    wishlist_db().create_wishlist(user_id, wishlist_name)
+    add_items(user_id, wishlist_name, [item_data] if isinstance(item_data, dict) else item_data.to_dict("records"))
 
-    if wishlist_path.exists() and wishlist_path.stat().st_size > 0:
-        old_data = pd.read_csv(wishlist_path)
-    else:
-        old_data = pd.DataFrame()
 
-    final_data = pd.concat([old_data, item_data])
-    final_data.to_csv(wishlist_path, index=False, header=item_data.columns)
+def add_items(user_id, wishlist_name, items):
+    """
+    Adds search result dicts to a wishlist, storing each product once by link.
+    """
+    for item in items:
+        product = wishlist_db().get_product(item["link"])
+        if product is None:
+            price, currency = parsePrice(item.get("price"))
+            wishlist_db().insert_product(
+                name=item.get("title"), description=None, price=price, currency=currency or "USD",
+                rating=parseRating(item.get("rating")), num_reviews=None, url=item["link"],
+                image_url=item.get("img_link"), category=None, source=item.get("website"),
+            )
+            product = wishlist_db().get_product(item["link"])
+        wishlist_db().add_to_wishlist(user_id, product[0], wishlist_name)
 
 
 def read_wishlist(email, wishlist_name):
     """
-    Reads items from a user's wishlist and updates their prices.
+    Reads items from a user's wishlist with their latest known prices.
+    Prices older than the refresh TTL are re-scraped in the background
+    and stored with the product.
     """
-    wishlist_path = usr_dir(email) / f"{wishlist_name}.csv"
-    if wishlist_path.exists():
-        try:
-            csv_data = pd.read_csv(wishlist_path)
-            for index, row in csv_data.iterrows():
-                new_price = update_price(row['link'], row['website'], row['price'])
-                csv_data.at[index, 'price'] = new_price
-            return csv_data
-        except Exception:
-            return pd.DataFrame()
-    return None
+    user_id = wishlist_user_id(email)
+    if wishlist_name not in wishlist_db().get_wishlist_names(user_id):
+        return None
+    rows, stale, prices = [], [], {}
+    for product in wishlist_db().get_wishlist(user_id, wishlist_name):
+        price = format_price(product[3], product[4])
+        scraped_price = WISHLIST_REFRESHER.cached(product[7])
+        if scraped_price and price:
+            price = convert_price(price, scraped_price)
+        prices[product[7]] = price
+        rows.append([product[1], price, product[7], product[10], product[5], product[8]])
+        stale.append((product[7], product[10], product[11]))
+
+    def store_price(link, website, scraped_price):
+        price = convert_price(prices[link], scraped_price) if prices[link] else scraped_price
+        wishlist_db().update_product_price(link, parsePrice(price)[0])
+    WISHLIST_REFRESHER.refresh(stale, on_price=store_price)
+    import pandas as pd
+    return pd.DataFrame(rows, columns=WISHLIST_COLUMNS)
 
 
 def wishlist_remove_list(email, wishlist_name, index):
     """
     Removes an item from a user's wishlist by index.
     """
-    wishlist_path = usr_dir(email) / f"{wishlist_name}.csv"
-    old_data = read_wishlist(email, wishlist_name)
-    if old_data is not None:
-        old_data = old_data.drop(index=index)
-        old_data.to_csv(wishlist_path, index=False, header=old_data.columns)
+    wishlist_db().remove_wishlist_position(wishlist_user_id(email), wishlist_name, index)
 
 
 # Email and Price Update Functions
@@ -182,31 +270,17 @@ def find_currency(price):
     return currency.group() if currency else None
 
 
+def convert_price(price, scraped_price):
+    """
+    Expresses a scraped price in the currency of the stored price.
+    """
+    currency = find_currency(price)
+    return scraper.getCurrency(currency, scraped_price) if currency else scraped_price
+
+
 def update_price(link, website, price):
     """
     Updates the price of an item by scraping the respective website.
     """
-    currency = find_currency(price)
-    updated_price = price
-
-    # Update price using scraper based on website
-    scraped_price = None
-    if website == "amazon":
-        scraped_price = scraper.amazon_scraper(link).strip()
-    elif website == "google":
-        scraped_price = scraper.google_scraper(link).strip()
-    elif website == "walmart":
-        scraped_price = scraper.walmart_scraper(link).strip()
-    elif website == "ebay":
-        scraped_price = scraper.ebay_scraper(link).strip()
-    elif website == "bestbuy":
-        scraped_price = scraper.bestbuy_scraper(link).strip()
-    elif website == "target":
-        scraped_price = scraper.target_scraper(link).strip()
-
-    if scraped_price:
-        updated_price = (
-            scraper.getCurrency(currency, scraped_price) if currency else scraped_price
-        )
-
-    return updated_price
+    scraped_price = WISHLIST_REFRESHER.scrape(link, website)
+    return convert_price(price, scraped_price) if scraped_price else price
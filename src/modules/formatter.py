@@ -1,19 +1,29 @@
 from datetime import datetime
-import requests
 import re
-from ast import literal_eval
+from .config import Config
+from .exchange_rates import ExchangeRateProvider
 
 CURRENCY_URL = "https://api.exchangerate-api.com/v4/latest/usd"
-try:
-    EXCHANGES = literal_eval(requests.get(CURRENCY_URL).text)
-except requests.RequestException as e:
-    print(f"Failed to fetch exchange rates: {e}")
-    EXCHANGES = {}
+# Loaded on the first conversion rather than at import time.
+EXCHANGES = ExchangeRateProvider(
+    CURRENCY_URL,
+    cache_file=Config.EXCHANGE_RATES_CACHE,
+    ttl=Config.EXCHANGE_RATES_TTL,
+    fixture_file=Config.EXCHANGE_RATES_FIXTURE or None,
+)
+
+PRICE_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# Patterns used by formatResult, compiled once instead of per product.
+PRICE_JUNK = re.compile(r'\s|,')
+PRICE_DIGITS = re.compile(r"[0-9\.]+")
+NON_DIGITS = re.compile(r"[^\d]")
+BESTBUY_RATING = re.compile(r"Rating (\d+\.\d+) out of 5 stars")
+CURRENCY_PREFIX = re.compile(r"^\s*([A-Za-z]{3})\b")
 
 
 def formatResult(website, titles, prices, links, ratings, num_ratings, trending, df_flag, currency, img_link=None):
-    title, price, link, rating, num_rating, converted_cur, trending_stmt = (
-        "", "", "", "", "", "", ""
+    title, price, link, rating, num_rating, trending_stmt = (
+        "", "", "", "", "", ""
     )
 
     if website not in ['ebay', 'target']:
@@ -25,17 +35,20 @@ def formatResult(website, titles, prices, links, ratings, num_ratings, trending,
             title = "Title not available"  # Default message if title is missing
 
         if prices:
-            price = prices[0].get_text().strip()
-            price = re.sub(r'\s|,', '', price)
-            price_match = re.search(r"[0-9\.]+", price)
+            price = prices.strip() if isinstance(prices, str) else prices[0].get_text().strip()
+            price = PRICE_JUNK.sub('', price)
+            price_match = PRICE_DIGITS.search(price)
             price = "$" + price_match.group() if price_match else "Price not available"
 
-        link = links[0]["href"] if links else ""
+        if isinstance(links, str):
+            link = links
+        else:
+            link = links[0]["href"] if links else ""
 
         if ratings:
             try:
-                if website == "bestbuy":
-                    match = re.search(r"Rating (\d+\.\d+) out of 5 stars", ratings[0].get_text().strip())
+                if website == "bestbuy" and isinstance(ratings, list):
+                    match = BESTBUY_RATING.search(ratings[0].get_text().strip())
                     rating = float(match.group(1)) if match else None
                 elif isinstance(ratings, list):
                     rating = float(ratings[0].get_text().strip().split()[0])
@@ -48,11 +61,10 @@ def formatResult(website, titles, prices, links, ratings, num_ratings, trending,
             if isinstance(num_ratings, int):
                 num_rating = num_ratings
             elif isinstance(num_ratings, str):
-                num_rating = re.sub(r"[^\d]", "", num_ratings)
+                num_rating = NON_DIGITS.sub("", num_ratings)
             else:
-                num_rating = re.sub(r"[^\d]", "", num_ratings[0].get_text()) if num_ratings else ""
+                num_rating = NON_DIGITS.sub("", num_ratings[0].get_text()) if num_ratings else ""
 
-        converted_cur = getCurrency(currency, price) if currency else None
         img_link = img_link[0].get('src') if img_link and not isinstance(img_link, str) else img_link
 
         product = {
@@ -65,10 +77,9 @@ def formatResult(website, titles, prices, links, ratings, num_ratings, trending,
             "rating": rating,
             "no_of_ratings": num_rating,
             "trending": trending_stmt,
-            "converted_price": converted_cur,
+            "converted_price": None,  # Filled in for the whole result set by convertResults
         }
     else:
-        converted_cur = getCurrency(currency, prices) if currency else None
         product = {
             "timestamp": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
             "title": titles,
@@ -79,14 +90,76 @@ def formatResult(website, titles, prices, links, ratings, num_ratings, trending,
             "rating": ratings,
             "no_of_ratings": num_ratings,
             "trending": trending,
-            "converted_price": converted_cur,
+            "converted_price": None,
         }
 
+    # Parse the display strings once so sorting, filtering and conversion stay numeric.
+    product.update(numericFields(product["price"], product["rating"], product["no_of_ratings"]))
     return product
 
 
+def parsePrice(price):
+    """Returns (value, currency_code) for prices such as "$1,299.99" or "INR 80.5"."""
+    if price is None or isinstance(price, bool):
+        return None, None
+    if isinstance(price, (int, float)):
+        return (None, None) if price != price else (float(price), "USD")
+    text = str(price).replace(",", "")
+    match = PRICE_NUMBER.search(text)
+    if not match:
+        return None, None
+    if "$" in text:
+        code = "USD"
+    else:
+        prefix = CURRENCY_PREFIX.match(text)
+        code = prefix.group(1).upper() if prefix else None
+    return float(match.group()), code
+
+
+def parseRating(rating):
+    """Returns a rating as a float, or None when it is missing."""
+    try:
+        value = float(str(rating).split()[0])
+    except (ValueError, IndexError):
+        return None
+    return None if value != value else value
+
+
+def parseCount(num_ratings):
+    """Returns a review count such as "1,024 ratings" as an int, or None."""
+    digits = NON_DIGITS.sub("", str(num_ratings)) if num_ratings is not None else ""
+    return int(digits) if digits else None
+
+
+def numericFields(price, rating, num_ratings):
+    """The typed columns stored next to a product's display strings."""
+    price_value, currency_code = parsePrice(price)
+    return {
+        "price_value": price_value,
+        "currency_code": currency_code,
+        "rating_value": parseRating(rating),
+        "num_ratings_int": parseCount(num_ratings),
+    }
+
+
+def priceValue(row):
+    """Numeric price of a product dict or DataFrame row, parsing "price" only for rows without price_value."""
+    value = row["price_value"] if "price_value" in row else parsePrice(row.get("price"))[0]
+    return None if value is None or value != value else value
+
+
+def ratingValue(row):
+    """Numeric rating of a product dict or DataFrame row."""
+    value = row["rating_value"] if "rating_value" in row else parseRating(row.get("rating"))
+    return None if value is None or value != value else value
+
+
 def sortList(arr, sortBy, reverse):
-    if sortBy == "pr":
+    if sortBy == "pr" and "price_value" in arr.columns:
+        return arr.sort_values(key=lambda x: x.fillna(0), by=["price_value"], ascending=reverse)
+    elif sortBy == "ra" and "rating_value" in arr.columns:
+        return arr.sort_values(by=["rating_value"], ascending=reverse)
+    elif sortBy == "pr":
         return arr.sort_values(
             key=lambda x: x.apply(lambda y: getNumbers(y)),
             by=["price"],
@@ -114,9 +187,34 @@ def getCurrency(currency, price):
     converted_cur = 0.0
     try:
         if price and "$" in price:
-            numeric_price = int(re.sub(r"[^\d]", "", price.split("$")[1]))
-            converted_cur = numeric_price * EXCHANGES["rates"].get(currency.upper(), 1)
+            numeric_price = float(re.sub(r"[^\d.]", "", price.split("$")[1]))
+            converted_cur = numeric_price * EXCHANGES.rate(currency)
             return f"{currency.upper()} {round(converted_cur, 2)}"
     except Exception as e:
         print(f"Error in currency conversion: {e}")
     return converted_cur
+
+
+def convertResults(products, currency, target="converted_price"):
+    """
+    Converts every dollar-priced product dict with one rate lookup, using the
+    numeric price_value, and stores the "<CURRENCY> <amount>" string under
+    `target`. When `target` is "price" the typed columns follow the new currency.
+    """
+    if not products:
+        return products
+    code = currency.upper()
+    rate = EXCHANGES.rate(currency)
+    parsed = [
+        (p["price_value"], p.get("currency_code")) if "price_value" in p else parsePrice(p.get("price"))
+        for p in products
+    ]
+    for p, (value, price_code) in zip(products, parsed):
+        if value is None or price_code != "USD":
+            p[target] = 0.0
+            continue
+        converted = round(value * rate, 2)
+        p[target] = f"{code} {converted}"
+        if target == "price":
+            p["price_value"], p["currency_code"] = converted, code
+    return products
@@ -0,0 +1,94 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The json_provider module speeds up the JSON responses of the web app. When
+orjson is installed, Flask's JSON provider encodes straight to bytes with it,
+falling back to the standard library for anything orjson cannot encode.
+Search results, lists of product dicts, are encoded once as a JSON array and
+spliced into the response body without being decoded again.
+"""
+
+import json
+from flask.json.provider import DefaultJSONProvider
+from .config import Config
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def orjson_options(sort_keys=False, indent=False):
+    # Dates and dataclasses go through Flask's default() so responses look the same with either encoder.
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME \
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    if indent:
+        options |= orjson.OPT_INDENT_2
+    return options
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the default provider as fallback."""
+
+    def dumps_bytes(self, obj, indent=False):
+        try:
+            return orjson.dumps(obj, default=self.default, option=orjson_options(self.sort_keys, indent))
+        except (TypeError, orjson.JSONEncodeError):
+            # E.g. integers beyond 64 bits; the standard encoder handles them.
+            return super().dumps(obj, indent=2 if indent else None).encode()
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def install(app):
+    """Makes the app use FastJSONProvider when orjson is installed and JSON_PROVIDER allows it."""
+    if ORJSON_AVAILABLE and Config.JSON_PROVIDER != "json":
+        app.json = FastJSONProvider(app)
+    return app.json
+
+
+def records_json(records):
+    """
+    Encodes search results, a list of product dicts, as a JSON array of
+    objects, with orjson when it is installed.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(records, default=str, option=orjson_options())
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(records, default=str).encode()
+
+
+def json_response(app, body, **raw):
+    """
+    A JSON response for the dict `body` plus keys whose values are already
+    encoded JSON bytes, which are spliced in without decoding them again.
+    """
+    dumps_bytes = getattr(app.json, "dumps_bytes", None)
+    encoded = dumps_bytes(body) if dumps_bytes else app.json.dumps(body).encode()
+    if raw:
+        fields = b",".join(json.dumps(key).encode() + b":" + value for key, value in raw.items())
+        encoded = b"{" + fields + (b"," + encoded[1:] if encoded != b"{}" else b"}")
+    return app.response_class(encoded + b"\n", mimetype=app.json.mimetype)
@@ -0,0 +1,124 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The prefetch module keeps the most common searches warm. On a schedule it
+reads the top queries from search_history and scrapes every site whose
+cached result is missing or stale, within a per-run budget, a concurrency
+limit and, optionally, off-peak hours only.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import schedule
+from . import scraper
+from .config import Config
+from .search_cache import make_key, FRESH
+
+
+def parse_hours(value):
+    """Parses "0-6,22-24" into the set of hours {0, ..., 5, 22, 23}; empty means every hour."""
+    hours = set()
+    for item in value.split(','):
+        if '-' in item:
+            start, end = item.split('-', 1)
+            hours.update(range(int(start), int(end)))
+        elif item.strip():
+            hours.add(int(item))
+    return hours or set(range(24))
+
+
+class Prefetcher:
+    """
+    Scrapes the top queries returned by `top_queries(limit, since)` into
+    scraper.SEARCH_CACHE, using the same keys as the web search (no currency
+    conversion, no DataFrame).
+    """
+
+    def __init__(self, top_queries, top_n=None, window_days=None, concurrency=None, budget=None, hours=None):
+        self.top_queries = top_queries
+        self.top_n = Config.PREFETCH_TOP_N if top_n is None else top_n
+        self.window_days = Config.PREFETCH_WINDOW_DAYS if window_days is None else window_days
+        self.concurrency = Config.PREFETCH_CONCURRENCY if concurrency is None else concurrency
+        self.budget = Config.PREFETCH_BUDGET if budget is None else budget
+        self.hours = parse_hours(Config.PREFETCH_HOURS if hours is None else hours)
+        self.scheduler = schedule.Scheduler()
+        self._running = threading.Lock()
+        self._thread = None
+        self._stats = {"runs": 0, "skipped_runs": 0, "scraped": 0, "already_warm": 0, "over_budget": 0,
+                       "errors": 0, "last_run": None}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def plan(self):
+        """Returns the (key, site, search_func, query) jobs of one run, most searched first, within the budget."""
+        since = datetime.now() - timedelta(days=self.window_days) if self.window_days else None
+        jobs = []
+        for query, _ in self.top_queries(self.top_n, since):
+            for site, search_func in scraper.enabled_searches():
+                key = make_key(query, site, None, 0)
+                if scraper.SEARCH_CACHE.peek(key) == FRESH:
+                    self._count("already_warm")
+                    continue
+                circuit = scraper.HOST_GUARDS.circuit(site)
+                if circuit is not None and circuit["state"] != "closed":
+                    continue
+                if len(jobs) == self.budget:
+                    self._count("over_budget")
+                    continue
+                jobs.append((key, site, search_func, query))
+        return jobs
+
+    def _scrape(self, key, site, search_func, query):
+        try:
+            products = scraper.SEARCH_FLIGHTS.do(key, lambda: search_func(query, 0, None))
+        except Exception as e:
+            print(f"Prefetch of {query!r} on {site} failed: {e}")
+            self._count("errors")
+            return
+        scraper.SEARCH_CACHE.store(key, products)
+        self._count("scraped")
+
+    def run_once(self, now=None):
+        """Runs one prefetch pass unless outside the off-peak hours or a pass is already running."""
+        now = now or datetime.now()
+        if now.hour not in self.hours or not self._running.acquire(blocking=False):
+            self._count("skipped_runs")
+            return 0
+        try:
+            jobs = self.plan()
+            with ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix="prefetch") as pool:
+                for job in jobs:
+                    pool.submit(self._scrape, *job)
+            with self._stats_lock:
+                self._stats["runs"] += 1
+                self._stats["last_run"] = now.isoformat(timespec="seconds")
+            return len(jobs)
+        finally:
+            self._running.release()
+
+    def start(self, interval=None):
+        """Schedules run_once every `interval` minutes on a daemon thread."""
+        if self._thread is not None:
+            return self._thread
+        self.scheduler.every(interval or Config.PREFETCH_INTERVAL).minutes.do(self.run_once)
+
+        def loop():
+            while True:
+                self.scheduler.run_pending()
+                time.sleep(1)
+        self._thread = threading.Thread(target=loop, name="prefetch-scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
@@ -0,0 +1,147 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The price_refresh module re-scrapes the prices of saved products in batches.
+Links are grouped by website and fetched concurrently with a per-site limit;
+links refreshed within the TTL are skipped, and refreshes run in the
+background so wishlists can be shown right away with the last known prices.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import chain, zip_longest
+from . import scraper
+from .config import Config
+
+# Product page price scrapers by website.
+PRICE_SCRAPERS = {
+    "amazon": scraper.amazon_scraper,
+    "google": scraper.google_scraper,
+    "walmart": scraper.walmart_scraper,
+    "ebay": scraper.ebay_scraper,
+    "bestbuy": scraper.bestbuy_scraper,
+    "target": scraper.target_scraper,
+}
+
+
+def age_seconds(refreshed_at):
+    """Seconds since a datetime, or a "YYYY-MM-DD HH:MM:SS" string as stored by sqlite; None if unknown."""
+    if refreshed_at is None:
+        return None
+    if isinstance(refreshed_at, str):
+        try:
+            refreshed_at = datetime.fromisoformat(refreshed_at)
+        except ValueError:
+            return None
+    return (datetime.now() - refreshed_at).total_seconds()
+
+
+class PriceRefresher:
+    """
+    Refreshes product prices with at most `max_workers` scrapes in total and
+    `per_site` per website. Scraped prices are remembered for `ttl` seconds.
+    """
+
+    def __init__(self, ttl=None, max_workers=None, per_site=None, scrapers=None):
+        self.ttl = Config.WISHLIST_PRICE_TTL if ttl is None else ttl
+        self.per_site = per_site or Config.WISHLIST_REFRESH_PER_SITE
+        self.scrapers = PRICE_SCRAPERS if scrapers is None else scrapers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.WISHLIST_REFRESH_WORKERS, thread_name_prefix="price-refresh"
+        )
+        self._limits = {}
+        self._prices = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stats = {"scraped": 0, "skipped_fresh": 0, "failed": 0}
+
+    def _limit(self, website):
+        with self._lock:
+            limit = self._limits.get(website)
+            if limit is None:
+                limit = self._limits[website] = threading.BoundedSemaphore(self.per_site)
+            return limit
+
+    def cached(self, link):
+        """The price scraped for link within the TTL, or None."""
+        with self._lock:
+            entry = self._prices.get(link)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def _is_fresh(self, link, refreshed_at):
+        age = age_seconds(refreshed_at)
+        return (age is not None and age < self.ttl) or self.cached(link) is not None
+
+    def scrape(self, link, website):
+        """Scrapes one price right away, within the site's limit; returns None on failure."""
+        scrape = self.scrapers.get(website)
+        if scrape is None:
+            return None
+        with self._limit(website):
+            price = scrape(link)
+        price = price.strip() if isinstance(price, str) else None
+        with self._lock:
+            if price:
+                self._prices[link] = (price, time.time())
+                self._stats["scraped"] += 1
+            else:
+                self._stats["failed"] += 1
+        return price
+
+    def _run(self, link, website, on_price):
+        try:
+            price = self.scrape(link, website)
+            if price and on_price is not None:
+                on_price(link, website, price)
+        except Exception as e:
+            print(f"Price refresh of {link} failed: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(link)
+
+    def refresh(self, items, on_price=None, wait=False):
+        """
+        Queues a refresh of every stale (link, website, refreshed_at) item,
+        grouped by website, and calls on_price(link, website, price) for each
+        new price. Returns the number of queued links; with wait=True it
+        returns once they are all done.
+        """
+        by_site = {}
+        for link, website, refreshed_at in items:
+            if not link or website not in self.scrapers:
+                continue
+            if self._is_fresh(link, refreshed_at):
+                with self._lock:
+                    self._stats["skipped_fresh"] += 1
+                continue
+            by_site.setdefault(website, []).append(link)
+
+        # Interleave the sites so one slow retailer does not hold every worker.
+        rounds = zip_longest(*([(link, website) for link in links] for website, links in by_site.items()))
+        futures = []
+        for link, website in (job for job in chain.from_iterable(rounds) if job is not None):
+            with self._lock:
+                if link in self._in_flight:
+                    continue
+                self._in_flight.add(link)
+            futures.append(self._executor.submit(self._run, link, website, on_price))
+        if wait:
+            for future in futures:
+                future.result()
+        return len(futures)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._in_flight), remembered=len(self._prices))
+
+
+# Shared by the web wishlist and the CLI wishlists.
+WISHLIST_REFRESHER = PriceRefresher()
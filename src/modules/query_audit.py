@@ -0,0 +1,125 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The query_audit module is a debugging aid for the database layer. It calls
+every DatabaseManager method against a scratch in-memory database, records
+the statements they send to SQLite and runs EXPLAIN QUERY PLAN over each,
+flagging full table scans and temporary sorts.
+
+    python -m src.modules.query_audit
+"""
+
+import inspect
+import sys
+from .DatabaseManager import DatabaseManager
+
+EMAIL = "audit@example.com"
+URL = "https://www.walmart.com/ip/audit"
+
+# Methods that do not query the tables themselves.
+NOT_QUERIES = {"close", "create_tables", "migrate", "schema_version", "transaction"}
+QUERY_VERBS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def sample_calls():
+    """(method, args) pairs that exercise every DatabaseManager query, in an order that keeps the rows valid."""
+    return [
+        ("insert_user", (EMAIL, "Audit", "audit")),
+        ("update_last_login", (EMAIL,)),
+        ("user_exists", (EMAIL,)),
+        ("get_user", (EMAIL,)),
+        ("get_user_id_by_email", (EMAIL,)),
+        ("insert_product", ("Lamp", None, 9.99, "USD", 4.5, 10, URL, None, None, "walmart")),
+        ("get_product", (URL,)),
+        ("update_product_price", (URL, 8.99)),
+        ("log_search", (1, "lamp")),
+        ("queue_search", (1, "lamp")),
+        ("get_search_history", (1,)),
+        ("get_top_queries", (20, "2020-01-01")),
+        ("create_wishlist", (1, "gifts")),
+        ("add_to_wishlist", (1, 1, "gifts")),
+        ("is_product_in_wishlist", (1, 1, "gifts")),
+        ("get_wishlist", (1, "gifts")),
+        ("get_wishlist_names", (1,)),
+        ("add_comment", (1, 1, "Works well")),
+        ("get_comments", (1,)),
+        ("add_named_comment", ("Lamp", EMAIL, "Bright", URL)),
+        ("add_named_comment", ("Desk", EMAIL, "Sturdy")),
+        ("get_comments_for_names", (["Lamp", "Desk"],)),
+        ("remove_wishlist_position", (1, "gifts", 0)),
+        ("remove_from_wishlist", (1, 1, "gifts")),
+        ("delete_wishlist", (1, "gifts")),
+        ("delete_user", (EMAIL,)),
+    ]
+
+
+def uncovered_methods(calls):
+    """DatabaseManager methods that sample_calls does not exercise."""
+    methods = {name for name, member in inspect.getmembers(DatabaseManager, inspect.isfunction)
+               if not name.startswith("_")}
+    return sorted(methods - NOT_QUERIES - {name for name, _ in calls})
+
+
+def record_statements(db, calls):
+    """Runs the calls and returns the distinct (method, sql) pairs they executed, with the parameters inlined."""
+    statements = []
+    current = [None]
+
+    def trace(sql):
+        # Foreign key cascades report their parent statement again; keep it once.
+        statement = (current[0], sql)
+        if sql.lstrip().split(None, 1)[0].upper() in QUERY_VERBS and statement not in statements:
+            statements.append(statement)
+    # The callback stays on the connection once it is back in the pool; an audit
+    # database such as :memory: has a single pooled connection.
+    with db.pool.connection() as conn:
+        conn.set_trace_callback(trace)
+    try:
+        for name, args in calls:
+            current[0] = name
+            getattr(db, name)(*args)
+            db.writes.flush()
+    finally:
+        with db.pool.connection() as conn:
+            conn.set_trace_callback(None)
+    return statements
+
+
+def audit(db=None):
+    """Returns one finding per statement: its method, SQL, query plan, full scans and temporary sorts."""
+    db = db or DatabaseManager(":memory:")
+    findings = []
+    for method, sql in record_statements(db, sample_calls()):
+        with db.pool.connection() as conn:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+        findings.append({
+            "method": method,
+            "sql": " ".join(sql.split()),
+            "plan": plan,
+            "scans": [step for step in plan if step.startswith("SCAN ") and step != "SCAN CONSTANT ROW"],
+            "temp_btrees": [step for step in plan if step.startswith("USE TEMP B-TREE")],
+        })
+    return findings
+
+
+def main():
+    findings = audit()
+    for finding in findings:
+        flag = "SCAN" if finding["scans"] else "sort" if finding["temp_btrees"] else "ok"
+        print(f"[{flag:>4}] {finding['method']}: {finding['sql'][:100]}")
+        for step in finding["plan"]:
+            print(f"         {step}")
+    missing = uncovered_methods(sample_calls())
+    if missing:
+        print("Not audited:", ", ".join(missing))
+    scans = sum(1 for finding in findings if finding["scans"])
+    print(f"{len(findings)} statements, {scans} with full table scans")
+    return 1 if scans or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The ranking module orders products across retailers. Each site's results
+are pushed through a heap holding at most k rows as the site finishes, so
+the global top k by a score such as price or rating is known at any point
+without concatenating and sorting every row.
+"""
+
+import heapq
+import itertools
+from .formatter import priceValue, ratingValue, parseCount
+
+
+def reviewCount(row):
+    """Number of reviews of a product dict, or None."""
+    count = row.get("num_ratings_int")
+    return parseCount(row.get("no_of_ratings")) if count is None else count
+
+
+def pricePerStar(row):
+    """Rating-weighted price: the price divided by the rating, so cheap well-rated products come first."""
+    price, rating = priceValue(row), ratingValue(row)
+    if price is None or not rating:
+        return None
+    return price / rating
+
+
+# Scores by name, with their natural direction (True for highest first).
+SCORES = {
+    "price": (priceValue, False),
+    "rating": (ratingValue, True),
+    "value": (pricePerStar, False),
+    "reviews": (reviewCount, True),
+}
+
+# The sort options of the result page.
+SORT_CODES = {
+    "pasc": "price:asc",
+    "pdes": "price:desc",
+    "raasc": "rating:asc",
+    "rades": "rating:desc",
+}
+
+
+def parse_order(order):
+    """
+    Parses "price", "rating:desc" or a result page code such as "pasc" into
+    (score function, descending). Raises ValueError for unknown scores.
+    """
+    name, _, direction = SORT_CODES.get(order, order).partition(":")
+    if name not in SCORES or direction not in ("", "asc", "desc"):
+        raise ValueError(f"Unknown sort order {order!r}; use one of {', '.join(list(SCORES) + list(SORT_CODES))}")
+    score, descending = SCORES[name]
+    return score, descending if not direction else direction == "desc"
+
+
+class TopK:
+    """
+    Keeps the best `k` products pushed into it by `order` (see parse_order);
+    k=None keeps and sorts every product. Products without a score rank after
+    all others, and ties keep the order in which products were pushed.
+    """
+
+    def __init__(self, order="price", k=None):
+        self.score, self.descending = parse_order(order)
+        self.k = None if k is None else max(0, int(k))
+        self._heap = []
+        self._seq = itertools.count()
+
+    def _rank(self, row):
+        value = self.score(row)
+        if value is None or value != value:
+            return (1, 0, next(self._seq))
+        return (0, -value if self.descending else value, next(self._seq))
+
+    def push(self, row):
+        missing, value, seq = self._rank(row)
+        # A max-heap of the kept rows: the worst one is at the top, ready to be replaced.
+        entry = (-missing, -value, -seq, row)
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self.k and entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, rows):
+        for row in rows:
+            self.push(row)
+        return self
+
+    def __len__(self):
+        return len(self._heap)
+
+    def result(self):
+        """The kept products, best first."""
+        return [entry[3] for entry in sorted(self._heap, reverse=True)]
+
+
+def top_k(site_results, order, k=None):
+    """The best k products of several per-site product lists, merged by `order`."""
+    ranked = TopK(order, k)
+    for products in site_results:
+        ranked.extend(products)
+    return ranked.result()
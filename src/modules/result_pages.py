@@ -0,0 +1,102 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The result_pages module serves search results a page at a time. A finished
+search is kept in memory as a result set, and each page of the JSON API
+carries an opaque cursor pointing at the next slice of that set, so later
+pages are answered without scraping again and every response has the same
+bounded size.
+"""
+
+import base64
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from .config import Config
+
+
+def encode_cursor(result_id, offset, size):
+    payload = json.dumps([result_id, offset, size], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (result_id, offset, size), or None for a malformed cursor."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        result_id, offset, size = json.loads(payload)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(result_id, str) or not isinstance(offset, int) or not isinstance(size, int):
+        return None
+    return result_id, offset, size
+
+
+class ResultPages:
+    """
+    Keeps up to `max_sets` result lists for `ttl` seconds each. A result set
+    can only be paged through by the user who ran the search.
+    """
+
+    def __init__(self, max_sets=None, ttl=None):
+        self.max_sets = max_sets or Config.SEARCH_RESULT_SETS
+        self.ttl = Config.SEARCH_RESULT_TTL if ttl is None else ttl
+        self._sets = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "pages": 0, "expired": 0}
+
+    def store(self, records, owner=None, meta=None):
+        """Keeps a list of result records and returns its id."""
+        result_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._sets[result_id] = (records, owner, meta or {}, time.time())
+            while len(self._sets) > self.max_sets:
+                self._sets.popitem(last=False)
+            self._stats["stored"] += 1
+        return result_id
+
+    def page(self, result_id, offset, size, owner=None):
+        """
+        Returns one page as a dict with the page's records, the total number of
+        results, the page number and the cursor of the next page (None on the
+        last page), or None if the result set expired or is someone else's.
+        """
+        with self._lock:
+            entry = self._sets.get(result_id)
+            if entry is not None and time.time() - entry[3] > self.ttl:
+                del self._sets[result_id]
+                entry = None
+            if entry is None or entry[1] != owner:
+                self._stats["expired"] += 1
+                return None
+            self._sets.move_to_end(result_id)
+            self._stats["pages"] += 1
+        records, _, meta, _ = entry
+        offset = max(0, offset)
+        end = offset + size
+        return {
+            "records": records[offset:end],
+            "total": len(records),
+            "page": offset // size + 1,
+            "total_pages": (len(records) + size - 1) // size,
+            "next_cursor": encode_cursor(result_id, end, size) if end < len(records) else None,
+            "meta": meta,
+        }
+
+    def from_cursor(self, cursor, owner=None):
+        decoded = decode_cursor(cursor or "")
+        if decoded is None or decoded[2] < 1:
+            return None
+        result_id, offset, size = decoded
+        # Cursors come back from the client, so their page size is capped like the page_size parameter.
+        return self.page(result_id, offset, min(size, Config.SEARCH_PAGE_MAX), owner=owner)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, sets=len(self._sets))
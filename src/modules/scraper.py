@@ -8,122 +8,182 @@ You should have received a copy of the MIT license with this file. If not, pleas
 The scraper module contains functions that scrape various e-commerce websites.
 """
 
-import requests
+import atexit
 import os
 import re
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 import time
 from bs4 import BeautifulSoup
 from datetime import datetime
 from ebaysdk.finding import Connection
-from .formatter import formatSearchQuery, formatResult, getCurrency, sortList
-from concurrent.futures import ThreadPoolExecutor
-
-# Create a global session to enable connection pooling.
-SESSION = requests.Session()
-
-def httpsGet(URL):
+from .formatter import (
+    formatSearchQuery, formatResult, getCurrency, sortList, convertResults,
+    numericFields, priceValue, ratingValue
+)
+from .browser_pool import BrowserPool, BrowserPoolTimeout, BrowserPoolFull
+from .extraction import extract, extractFast, extractEmbedded
+from .search_cache import SearchCache, make_key, copy_result
+from .ranking import top_k
+from .single_flight import SingleFlight
+from .config import Config
+from . import transport
+from .transport import ScraperSession, HOST_GUARDS, headersFor
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Global session with tuned per-host connection pools, retries and metrics.
+SESSION = ScraperSession()
+
+# Browser-like headers sent with scraped page requests; see transport.HEADER_PROFILES.
+DEFAULT_HEADERS = transport.DEFAULT_HEADERS
+ETSY_HEADERS = transport.HEADER_PROFILES[transport.SITE_HOSTS["etsy"]]
+TARGET_API_URL = 'https://redsky.target.com/redsky_aggregations/v1/web/plp_search_v1'
+
+# Warm headless browsers shared by every Amazon search; browsers are launched lazily.
+AMAZON_BROWSER_POOL = BrowserPool(
+    size=Config.BROWSER_POOL_SIZE,
+    max_pages=Config.BROWSER_MAX_PAGES,
+    checkout_timeout=Config.BROWSER_CHECKOUT_TIMEOUT,
+    max_waiters=Config.BROWSER_MAX_WAITERS,
+    page_load_timeout=Config.BROWSER_PAGE_LOAD_TIMEOUT,
+)
+atexit.register(AMAZON_BROWSER_POOL.close)
+
+# Shared worker threads for the per-site fan-out, so a search neither creates
+# a pool nor waits for stragglers that missed their deadline.
+SCRAPER_EXECUTOR = ThreadPoolExecutor(max_workers=Config.SCRAPER_WORKERS, thread_name_prefix="scraper")
+
+# Recent results of every search* function, keyed by query, site, currency and df_flag.
+SEARCH_CACHE = SearchCache(
+    max_entries=Config.SEARCH_CACHE_SIZE,
+    ttl=Config.SEARCH_CACHE_TTL,
+    stale_ttl=Config.SEARCH_CACHE_STALE_TTL,
+    db_file=Config.SEARCH_CACHE_DB or None,
+)
+
+
+def copy_driver_result(value):
+    """Copies a (site statuses, DataFrame or product list) driver result for a coalesced caller."""
+    statuses, result = value
+    statuses = {site: dict(status) for site, status in statuses.items()}
+    if isinstance(result, list):
+        return statuses, copy_result(result)
+    return statuses, result.copy()
+
+
+# Identical searches running at the same time share one scrape. Per-site results
+# need no copy here because SEARCH_CACHE hands every caller its own rows.
+SEARCH_FLIGHTS = SingleFlight()
+DRIVER_FLIGHTS = SingleFlight(copy=copy_driver_result)
+
+def httpsGetContent(URL):
     """
-    Makes an HTTP GET request to the specified URL with custom headers.
-    Reuses the global SESSION for connection pooling.
-    Uses the "lxml" parser without an extra prettify call.
+    Makes an HTTP GET request to the specified URL with custom headers and
+    returns the raw page, or None if the request was redirected or blocked.
+    Reuses the global SESSION for connection pooling and sends the header
+    profile of the URL's host.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.108 Safari/537.36',
-        'Accept-Encoding': 'gzip, deflate',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Cache-Control': 'no-cache'
-    }
-    response = SESSION.get(URL, headers=headers, allow_redirects=True)
+    response = SESSION.get(URL, headers=headersFor(URL), allow_redirects=True, timeout=Config.HTTP_TIMEOUT)
     print("Status Code:", response.status_code)
     if response.status_code != 200:
         print("Likely redirected or blocked.")
         with open("amazon_response_debug.html", "wb") as f:
             f.write(response.content)
         return None
-    # Parse once using the fast "lxml" parser.
-    return BeautifulSoup(response.content, "lxml")
-
-def seleniumGetAmazonHTML(query):
-    options = Options()
-    options.add_argument("--headless")  # Run in background
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+    return response.content
 
-    driver = webdriver.Chrome(options=options)
-    url = f"https://www.amazon.com/s?k={query}"
-    driver.get(url)
+def httpsGet(URL):
+    """
+    Fetches a page with httpsGetContent and parses it once using the "lxml"
+    parser, without an extra prettify call.
+    """
+    content = httpsGetContent(URL)
+    return BeautifulSoup(content, "lxml") if content is not None else None
 
-    # Wait for page to load (you may need to tune this)
-    #time.sleep(2)
+def parsePage(content, website, parser, df_flag, currency):
+    """
+    Parses one raw retailer search page. Products embedded as JSON are used
+    when present; otherwise the DOM is read with extractFast for sites in
+    Config.FAST_PARSER_SITES, or with BeautifulSoup and `parser`.
+    """
+    products = extractEmbedded(content, website, df_flag, currency)
+    if products is not None:
+        return products
+    if website in Config.FAST_PARSER_SITES:
+        return extractFast(content, website, df_flag, currency)
+    return parser(BeautifulSoup(content, "lxml"), df_flag, currency)
+
+def searchPage(URL, website, parser, df_flag, currency):
+    """Fetches a retailer search page and parses it with parsePage."""
+    content = httpsGetContent(URL)
+    if content is None:
+        raise Exception(f"No page returned for {URL}")
+    return parsePage(content, website, parser, df_flag, currency)
+
+def browserGet(URL):
+    """
+    Renders a page in a browser borrowed from AMAZON_BROWSER_POOL, behind the
+    same per-host rate limit and circuit breaker as plain HTTP requests.
+    """
+    host = transport.SITE_HOSTS["amazon"]
+    guard = HOST_GUARDS.get(host)
+    wait = guard.acquire(host)
+    if wait:
+        time.sleep(wait)
+    try:
+        html = AMAZON_BROWSER_POOL.fetch_page(URL)
+    except (BrowserPoolTimeout, BrowserPoolFull):
+        # Our own pool was busy; that says nothing about the host.
+        guard.breaker.release()
+        raise
+    except Exception:
+        guard.record(None)
+        raise
+    guard.record(200)
+    return html
 
-    html = driver.page_source
-    driver.quit()
+def seleniumGetAmazonHTML(query):
+    """
+    Renders the Amazon search page in a browser borrowed from AMAZON_BROWSER_POOL,
+    so only the page load is paid per query instead of a full browser start.
+    """
+    url = f"https://www.amazon.com/s?k={query}"
+    html = browserGet(url)
     return BeautifulSoup(html, "lxml")
 
 def searchAmazon(query, df_flag, currency):
     print("Searching Amazon...")
     query = formatSearchQuery(query)
+    if "amazon" in Config.FAST_PARSER_SITES:
+        html = browserGet(f"https://www.amazon.com/s?k={query}")
+        return extractFast(html, "amazon", df_flag, currency)
     soup = seleniumGetAmazonHTML(query)
+    return parseAmazon(soup, df_flag, currency)
 
-    results = soup.findAll("div", {"data-component-type": "s-search-result"})
-    products = []
 
-    for res in results:
-        #titles = res.select("h2 a span")
-        titles = res.select("h2.a-size-small.a-spacing-none.a-color-base.s-line-clamp-2.a-text-normal span") # Updated selector
-        '''if titles:  # Check if the list is not empty
-           for title in titles:
-               product_title = title.text
-               print(product_title)
-        else:
-           print("No title found for this result") # Handle cases where no title is found'''
+def parseAmazon(page, df_flag, currency):
+    return extract(page, "amazon", df_flag, currency)
 
-        prices = res.select("span.a-price span.a-offscreen")
 
-        # Product Link
-        links = res.select("h2 a.a-link-normal")
-        ratings = res.select("span.a-icon-alt")
-        num_ratings = res.select("span.a-size-base")
-        trending = res.select("span.a-badge-text")
-        img_links = res.select("img.s-image")
+def walmartURL(query):
+    return f"https://www.walmart.com/search?q={formatSearchQuery(query)}"
 
-        trending = trending[0] if trending else None
-        product = formatResult("amazon", titles, prices, links, ratings,
-                               num_ratings, trending, df_flag, currency, img_links)
-        products.append(product)
-
-    return products
 
 def searchWalmart(query, df_flag, currency):
     print("Searching Walmart...")
-    query = formatSearchQuery(query)
-    URL = f"https://www.walmart.com/search?q={query}"
-    page = httpsGet(URL)
-    results = page.findAll("div", {"data-item-id": True})
-    products = []
-    pattern = re.compile(r"out of 5 Stars")
-    for res in results:
-        titles, prices, links = (
-            res.select("span.lh-title"),
-            res.select("div[data-automation-id='product-price'] span.w_iUH7"),
-            res.select("a")
-        )
-        ratings = res.findAll("span", {"class": "w_iUH7"}, text=pattern)
-        num_ratings = res.findAll("span", {"class": "sans-serif gray f7"})
-        trending = res.select("span.w_Cs")
-        img_links = res.select("div.relative.overflow-hidden img")
-        trending = trending[0] if trending else None
-        product = formatResult("walmart", titles, prices, links, ratings,
-                                num_ratings, trending, df_flag, currency, img_links)
-        products.append(product)
-    return products
+    return searchPage(walmartURL(query), "walmart", parseWalmart, df_flag, currency)
+
+
+def parseWalmart(page, df_flag, currency):
+    return extract(page, "walmart", df_flag, currency)
+
+
+def amazon_scraper(link):
+    try:
+        page = BeautifulSoup(browserGet(link), "lxml")
+        res = page.select('#corePrice_feature_div span.a-offscreen, span.a-price span.a-offscreen')[0].text
+        return res
+    except Exception as e:
+        print(f'There was an error in scraping {link}, Error is {e}')
+        return None
 
 
 def google_scraper(link):
@@ -180,15 +240,18 @@ def target_scraper(link):
         return None
 
 
+def etsyURL(query):
+    return f"https://www.etsy.com/search?q={formatSearchQuery(query)}"
+
+
 def searchEtsy(query, df_flag, currency):
     print("Searching Etsy...")
-    query = formatSearchQuery(query)
-    url = f"https://www.etsy.com/search?q={query}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_2) AppleWebKit/601.3.9 (KHTML, like Gecko) Version/9.0.2 Safari/601.3.9"
-    }
-    response = SESSION.get(url, headers=headers)
+    response = SESSION.get(etsyURL(query), headers=ETSY_HEADERS, timeout=Config.HTTP_TIMEOUT)
     soup = BeautifulSoup(response.content, "lxml")
+    return parseEtsy(soup, df_flag, currency)
+
+
+def parseEtsy(soup, df_flag, currency):
     products = []
     for item in soup.findAll(".wt-grid__item-xs-6"):
         links = item.select("a")
@@ -207,60 +270,30 @@ def searchEtsy(query, df_flag, currency):
     return products
 
 
+def googleShoppingURL(query):
+    return f"https://www.google.com/search?tbm=shop&q={formatSearchQuery(query)}"
+
+
 def searchGoogleShopping(query, df_flag, currency):
     print("Searching Google Shopping...")
-    query = formatSearchQuery(query)
-    URL = f"https://www.google.com/search?tbm=shop&q={query}"
-    page = httpsGet(URL)
-    results = page.findAll("div", {"class": "sh-dgr__grid-result"})
-    results1 = page.find_all()
-    products = []
-    pattern = re.compile(r"[0-9]+ product reviews")
-    for i, res in enumerate(results):
-        titles, prices, links = (
-            res.select("h3"),
-            res.select("span.a8Pemb"),
-            res.select("a"),
-        )
-        ratings = res.findAll("span", {"class": "Rsc7Yb"})
-        num_ratings = None
-        ratings_number = res.find("span", {"class": "QIrs8"}).get_text()
-        if ratings_number:
-            match = re.search(r'(\d+,\d+)', ratings_number)
-            if match:
-                num_ratings = match.group(1)
-        trending = res.select("span.Ib8pOd")
-        img_links = results1[i].select("div.SirUVb.sh-img__image img")
-        trending = trending[0] if trending else None
-        product = formatResult("google", titles, prices, links, ratings,
-                                num_ratings, trending, df_flag, currency, img_links)
-        products.append(product)
-    return products
+    return searchPage(googleShoppingURL(query), "google", parseGoogleShopping, df_flag, currency)
+
+
+def parseGoogleShopping(page, df_flag, currency):
+    return extract(page, "google", df_flag, currency)
+
+
+def bjsURL(query):
+    return f"https://www.bjs.com/search/{formatSearchQuery(query)}"
 
 
 def searchBJs(query, df_flag, currency):
     print("Searching BJs...")
-    query = formatSearchQuery(query)
-    URL = f"https://www.bjs.com/search/{query}"
-    page = httpsGet(URL)
-    results = page.findAll("div", {"class": "product"})
-    products = []
-    for res in results:
-        titles, prices, links = (
-            res.find("p", {"class": "no-select d-none auto-height"}),
-            res.select("span.price"),
-            res.select("a"),
-        )
-        ratings = res.findAll("span", {"class": "on"})
-        num_ratings = res.select("span.prod-comments-count")
-        trending = res.select("p.instantSavings")
-        trending = trending[0] if trending else None
-        product = formatResult("bjs", titles, prices, links, "", num_ratings,
-                                trending, df_flag, currency)
-        if ratings:
-            product["rating"] = len(ratings)
-        products.append(product)
-    return products
+    return searchPage(bjsURL(query), "bjs", parseBJs, df_flag, currency)
+
+
+def parseBJs(page, df_flag, currency):
+    return extract(page, "bjs", df_flag, currency)
 
 
 def searchEbay(query, df_flag, currency):
@@ -288,156 +321,148 @@ def searchEbay(query, df_flag, currency):
     return products
 
 
+def targetApiParams(query):
+    """Query parameters for the Target product search API."""
+    return {
+        'key': 'ff457966e64d5e877fdbad070f276d18ecec4a01',
+        'channel': 'WEB',
+        'count': '24',
+        'default_purchasability_filter': 'false',
+        'include_sponsored': 'true',
+        'keyword': query,
+        'offset': '0',
+        'page': '/s/' + query,
+        'platform': 'desktop',
+        'pricing_store_id': '3991',
+        'useragent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0',
+        'visitor_id': 'AAA',
+    }
+
+
+def targetURL(query):
+    return f"https://www.target.com/s?searchTerm={formatSearchQuery(query)}"
+
+
+def checkTargetResponse(status_code, text):
+    """Raises if the Target API response cannot be used."""
+    # Check if we got rate limited (410 Gone or 429 Too Many Requests)
+    if status_code in [410, 429]:
+        print(f"Rate limited by Target API (status {status_code}). Using fallback scraping method.")
+        raise Exception("Rate limited")
+
+    # Check for other response errors
+    if status_code != 200:
+        print(f"Error: Received status code {status_code} from {TARGET_API_URL}")
+        print(f"Response content: {text}")
+        raise Exception(f"API error: {status_code}")
+
+
 def searchTarget(query, df_flag, currency):
     print("Searching Target...")
     # Try the Target API first, but have fallbacks ready
     try:
-        # First attempt with the API
-        api_url = 'https://redsky.target.com/redsky_aggregations/v1/web/plp_search_v1'
-        page = '/s/' + query
-        params = {
-            'key': 'ff457966e64d5e877fdbad070f276d18ecec4a01',
-            'channel': 'WEB',
-            'count': '24',
-            'default_purchasability_filter': 'false',
-            'include_sponsored': 'true',
-            'keyword': query,
-            'offset': '0',
-            'page': page,
-            'platform': 'desktop',
-            'pricing_store_id': '3991',
-            'useragent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:91.0) Gecko/20100101 Firefox/91.0',
-            'visitor_id': 'AAA',
-        }
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.108 Safari/537.36',
-            'Accept-Encoding': 'gzip, deflate',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'no-cache'
-        }
-        response = SESSION.get(api_url, headers=headers, params=params)
-        
-        # Check if we got rate limited (410 Gone or 429 Too Many Requests)
-        if response.status_code in [410, 429]:
-            print(f"Rate limited by Target API (status {response.status_code}). Using fallback scraping method.")
-            raise Exception("Rate limited")
-            
-        # Check for other response errors
-        if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code} from {api_url}")
-            print(f"Response content: {response.text}")
-            raise Exception(f"API error: {response.status_code}")
-            
-        # Parse the JSON response    
-        data = response.json()
-        
-        # Extract product data
-        products = []
-        for p in data.get('data', {}).get('search', {}).get('products', []):
-            titles = p['item']['product_description']['title']
-            prices = '$' + str(p['price']['reg_retail'])
-            links = p['item']['enrichment']['buy_url']
-            img_link = p['item']['enrichment']['images']['primary_image_url']
-            try:
-                ratings = p['ratings_and_reviews']['statistics']['rating']['average']
-            except KeyError:
-                ratings = None
-            try:
-                num_ratings = p['ratings_and_reviews']['statistics']['rating']['count']
-            except KeyError:
-                num_ratings = None
-            trending = None
-            product = formatResult("target", titles, prices, links, ratings,
-                                   num_ratings, trending, df_flag, currency, img_link)
-            products.append(product)
-        return products
-        
+        response = SESSION.get(TARGET_API_URL, headers=headersFor(TARGET_API_URL), params=targetApiParams(query),
+                               timeout=Config.HTTP_TIMEOUT)
+        checkTargetResponse(response.status_code, response.text)
+        return parseTargetApi(response.json(), df_flag, currency)
+
     except Exception as e:
         # If the API call failed, try web scraping as fallback
         print(f"Target API error: {str(e)}. Attempting fallback using web scraping.")
         try:
             # Fallback to scraping the Target website directly
-            query = formatSearchQuery(query)
-            URL = f"https://www.target.com/s?searchTerm={query}"
-            page = httpsGet(URL)
-            
-            # Extract products using HTML parsing
-            products = []
-            results = page.select("li[data-test='product-list-item']")
-            
-            for res in results:
-                try:
-                    title_elem = res.select_one("a[data-test='product-title']")
-                    price_elem = res.select_one("span[data-test='current-price']")
-                    
-                    if not title_elem or not price_elem:
-                        continue
-                        
-                    title = title_elem.text.strip()
-                    price = price_elem.text.strip()
-                    link = "https://www.target.com" + title_elem.get("href", "")
-                    
-                    # Try to get image
-                    img_elem = res.select_one("img")
-                    img_link = img_elem.get("src", "") if img_elem else ""
-                    
-                    product = {
-                        "title": title,
-                        "price": price,
-                        "link": link,
-                        "rating": None,  # Ratings are harder to get from HTML
-                        "num_ratings": None,
-                        "website": "target",
-                        "image_url": img_link
-                    }
-                    
-                    if df_flag:
-                        if product["price"] and product["price"].startswith("$"):
-                            try:
-                                product["price_float"] = float(product["price"][1:].replace(",", ""))
-                            except:
-                                product["price_float"] = 0
-                    
-                    products.append(product)
-                except Exception as item_error:
-                    print(f"Error parsing Target product: {str(item_error)}")
-                    continue
-                    
-            return products
-            
+            page = httpsGet(targetURL(query))
+            return parseTargetPage(page, df_flag, currency)
+
         except Exception as scrape_error:
             print(f"Target fallback scraping also failed: {str(scrape_error)}")
             # Return empty list on total failure
             return []
 
 
-def searchBestbuy(query, df_flag, currency):
-    print("Searching Bestbuy...")
-    query = formatSearchQuery(query)
-    URL = f"https://www.bestbuy.com/site/searchpage.jsp?st={query}"
-    page = httpsGet(URL)
-    results = page.findAll("li", {'class': 'sku-item'})
+def parseTargetApi(data, df_flag, currency):
+    """Extracts products from a Target API JSON response."""
     products = []
-    pattern = re.compile(r"out of 5 stars with")
-    for res in results:
-        titles, prices, links = (
-            res.select("h4.sku-title a"),
-            res.select("div.priceView-customer-price span"),
-            res.select("a"),
-        )
-        ratings = res.find("div", class_="c-ratings-reviews").findAll("p", text=pattern)
-        num_ratings = res.select("span.c-reviews")
+    for p in data.get('data', {}).get('search', {}).get('products', []):
+        titles = p['item']['product_description']['title']
+        prices = '$' + str(p['price']['reg_retail'])
+        links = p['item']['enrichment']['buy_url']
+        img_link = p['item']['enrichment']['images']['primary_image_url']
+        try:
+            ratings = p['ratings_and_reviews']['statistics']['rating']['average']
+        except KeyError:
+            ratings = None
+        try:
+            num_ratings = p['ratings_and_reviews']['statistics']['rating']['count']
+        except KeyError:
+            num_ratings = None
         trending = None
-        img_link = res.select("img.product-image")
-        product = formatResult("bestbuy", titles, prices, links, ratings,
-                                num_ratings, trending, df_flag, currency, img_link)
+        product = formatResult("target", titles, prices, links, ratings,
+                               num_ratings, trending, df_flag, currency, img_link)
         products.append(product)
     return products
 
 
+def parseTargetPage(page, df_flag, currency):
+    """Extracts products from a Target search results page."""
+    products = []
+    results = page.select("li[data-test='product-list-item']")
+
+    for res in results:
+        try:
+            title_elem = res.select_one("a[data-test='product-title']")
+            price_elem = res.select_one("span[data-test='current-price']")
+
+            if not title_elem or not price_elem:
+                continue
+
+            title = title_elem.text.strip()
+            price = price_elem.text.strip()
+            link = "https://www.target.com" + title_elem.get("href", "")
+
+            # Try to get image
+            img_elem = res.select_one("img")
+            img_link = img_elem.get("src", "") if img_elem else ""
+
+            product = {
+                "title": title,
+                "price": price,
+                "link": link,
+                "rating": None,  # Ratings are harder to get from HTML
+                "num_ratings": None,
+                "website": "target",
+                "image_url": img_link
+            }
+            product.update(numericFields(price, None, None))
+
+            if df_flag:
+                if product["price"] and product["price"].startswith("$"):
+                    try:
+                        product["price_float"] = float(product["price"][1:].replace(",", ""))
+                    except:
+                        product["price_float"] = 0
+
+            products.append(product)
+        except Exception as item_error:
+            print(f"Error parsing Target product: {str(item_error)}")
+            continue
+
+    return products
+
+
+def bestbuyURL(query):
+    return f"https://www.bestbuy.com/site/searchpage.jsp?st={formatSearchQuery(query)}"
+
+
+def searchBestbuy(query, df_flag, currency):
+    print("Searching Bestbuy...")
+    return searchPage(bestbuyURL(query), "bestbuy", parseBestbuy, df_flag, currency)
+
+
+def parseBestbuy(page, df_flag, currency):
+    return extract(page, "bestbuy", df_flag, currency)
+
+
 def condense_helper(result_condensed, lst, num):
     """Helper function to limit number of entries in the result."""
     for p in lst:
@@ -448,17 +473,34 @@ def condense_helper(result_condensed, lst, num):
                 result_condensed.append(p)
 
 
+def titled_products(results):
+    """The per-site product lists without the rows that have no title, as condense_helper skips them."""
+    return ([p for p in product_list if p["title"]] for product_list in results)
+
+
+def normalize_products(products, keep_converted=False):
+    """
+    Fixes up product links in place the way every web response shows them, and
+    drops the unused converted_price unless keep_converted is set.
+    """
+    for p in products:
+        if not keep_converted:
+            p.pop("converted_price", None)
+        link = p.get("link")
+        if not link:
+            continue
+        if p.get("website") == "Etsy":
+            p["link"] = link[12:]
+        elif "http" not in link:
+            p["link"] = "http://" + link
+    return products
+
+
 def filter(data, price_min=None, price_max=None, rating_min=None):
     filtered_result = []
     for row in data:
-        try:
-            price = float(row['price'][1:])
-        except:
-            price = None
-        try:
-            rating = float(row['rating'])
-        except:
-            rating = None
+        price = priceValue(row)
+        rating = ratingValue(row)
         if price_min is not None and (price is None or price < price_min):
             continue
         elif price_max is not None and (price is None or price > price_max):
@@ -470,42 +512,142 @@ def filter(data, price_min=None, price_max=None, rating_min=None):
     return filtered_result
 
 
-def driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False, sort=None):
+def enabled_searches():
+    """Returns the (site, search function) pairs that driver() fans out to, in display order."""
+    return [
+        ("walmart", searchWalmart),
+        ("amazon", searchAmazon),
+        #("etsy", searchEtsy),
+        #("google", searchGoogleShopping),
+        #("bjs", searchBJs),
+        #("ebay", searchEbay),
+        ("bestbuy", searchBestbuy),
+        #("target", searchTarget),
+    ]
+
+
+def cached_search(site, search_func, query, df_flag, currency):
+    """
+    Calls search_func through SEARCH_CACHE so repeated queries skip the scrape,
+    and through SEARCH_FLIGHTS so concurrent identical misses scrape once.
+    """
+    key = make_key(query, site, currency, df_flag)
+    return SEARCH_CACHE.get_or_fetch(
+        key, lambda: SEARCH_FLIGHTS.do(key, lambda: search_func(query, df_flag, currency))
+    )
+
+
+def site_deadline(site):
+    """Seconds a single site may take, never more than the global search deadline."""
+    return min(Config.SITE_DEADLINES.get(site, Config.SEARCH_DEADLINE), Config.SEARCH_DEADLINE)
+
+
+def add_circuit_state(site, status):
+    """Adds the state of the site's circuit breaker to a per-site status, once the site was contacted."""
+    circuit = HOST_GUARDS.circuit(site)
+    if circuit is not None:
+        status["circuit"] = circuit["state"]
+    return status
+
+
+def iter_search(product, currency, df_flag=0):
+    """
+    Runs every enabled site concurrently and yields (index, site, products, status)
+    as soon as each site finishes, fastest site first.
+
+    Each site is bounded by site_deadline(); a site that misses it is reported
+    with status "timeout" and no products. status is a dict holding the
+    outcome ("ok", "error" or "timeout"), the latency, the product count and
+    the site's circuit breaker state.
+    """
+    searches = enabled_searches()
+    start = time.monotonic()
+
+    # Launch all scrapers in parallel on the shared pool
+    futures = {}
+    for index, (site, search_func) in enumerate(searches):
+        future = SCRAPER_EXECUTOR.submit(cached_search, site, search_func, product, df_flag, currency)
+        futures[future] = (index, site, search_func, start + site_deadline(site))
+
+    pending = set(futures)
+    while pending:
+        timeout = max(0, min(futures[f][3] for f in pending) - time.monotonic())
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        now = time.monotonic()
+        for future in done:
+            index, site, search_func, _ = futures[future]
+            status = {"status": "ok", "latency": round(now - start, 3)}
+            try:
+                products = future.result()
+            except Exception as e:
+                print(f"Error in {search_func.__name__}: {str(e)}")
+                products = []  # Empty list on failure
+                status.update(status="error", error=str(e))
+            status["count"] = len(products)
+            yield index, site, products, add_circuit_state(site, status)
+        for future in [f for f in pending if futures[f][3] <= now]:
+            # A thread that already started cannot be interrupted; it finishes in the
+            # background and its result still lands in SEARCH_CACHE.
+            future.cancel()
+            pending.discard(future)
+            index, site, search_func, _ = futures[future]
+            print(f"{search_func.__name__} missed its {site_deadline(site)}s deadline")
+            status = {"status": "timeout", "latency": round(now - start, 3), "count": 0}
+            yield index, site, [], add_circuit_state(site, status)
+
+
+def driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False, sort=None, site_status=None):
     """
     Returns CSV if the user enters the --csv arg,
     else displays the result table in the terminal based on the args entered by the user.
     This version uses ThreadPoolExecutor with a global requests.Session for faster concurrent scraping.
+    Sites that miss their deadline are left out; pass a dict as site_status
+    to receive the per-site outcome.
+    """
+    return coalesced_driver(run_driver, product, currency, num, df_flag, csv, cd, ui, sort, site_status)
+
+
+def coalesced_driver(run, product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False, sort=None,
+                     site_status=None):
+    """
+    Calls a driver implementation through DRIVER_FLIGHTS, so identical searches
+    arriving while one is running share its fan-out. CSV exports write files
+    and always run on their own.
     """
+    if csv:
+        return run(product, currency, num, df_flag, csv, cd, ui, sort, site_status)
+
+    def fetch():
+        statuses = {}
+        return statuses, run(product, currency, num, df_flag, csv, cd, ui, sort, statuses)
+
+    key = f"{make_key(product, '*', currency, df_flag)}|{num}|{int(bool(ui))}|{sort}"
+    statuses, result = DRIVER_FLIGHTS.do(key, fetch)
+    if site_status is not None:
+        site_status.update(statuses)
+    return result
+
+
+def run_driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False, sort=None, site_status=None):
+    """The uncoalesced driver: fans out to every enabled site and collects the results."""
     # Initialize results container for each source
-    results = [[] for _ in range(8)]
-    
-    # Define a wrapper function to handle exceptions in each scraper
-    def safe_search(search_func, product, df_flag, currency, index):
-        try:
-            results[index] = search_func(product, df_flag, currency)
-        except Exception as e:
-            print(f"Error in {search_func.__name__}: {str(e)}")
-            results[index] = []  # Empty list on failure
-    
-    # Launch all scrapers in parallel
-    with ThreadPoolExecutor(max_workers=16) as executor:
-        futures = []
-        futures.append(executor.submit(safe_search, searchWalmart, product, df_flag, currency, 0))
-        futures.append(executor.submit(safe_search, searchAmazon, product, df_flag, currency, 1))
-        #futures.append(executor.submit(safe_search, searchEtsy, product, df_flag, currency, 2))
-        #futures.append(executor.submit(safe_search, searchGoogleShopping, product, df_flag, currency, 3))
-        #futures.append(executor.submit(safe_search, searchBJs, product, df_flag, currency, 4))
-        #futures.append(executor.submit(safe_search, searchEbay, product, df_flag, currency, 5))
-        futures.append(executor.submit(safe_search, searchBestbuy, product, df_flag, currency, 6))
-        #futures.append(executor.submit(safe_search, searchTarget, product, df_flag, currency, 7))
-        
-        # Wait for all futures to complete
-        for future in futures:
-            try:
-                future.result()  # This will re-raise any exceptions from the thread
-            except Exception as e:
-                print(f"Error in scraper thread: {str(e)}")
+    results = [[] for _ in enabled_searches()]
+    for index, site, products, status in iter_search(product, currency, df_flag):
+        results[index] = products
+        if site_status is not None:
+            site_status[site] = status
+
+    return collect_results(results, product, currency, num, csv, cd, ui, sort)
+
 
+def collect_results(results, product, currency, num=None, csv=False, cd=None, ui=False, sort=None):
+    """
+    Turns the per-site product lists gathered by a driver into its return value:
+    a condensed DataFrame for the CLI, or a list of product dicts when ui is set.
+    The ui path never builds a DataFrame unless it writes a CSV file. With a
+    sort order (see ranking.parse_order) the result holds the best `num`
+    products across every site instead of the first `num` of each.
+    """
     # Check if we have any results at all
     total_results = sum(len(r) for r in results)
     if total_results == 0:
@@ -514,20 +656,29 @@ def driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False,
         print(f"Found a total of {total_results} results across all sources")
 
     if not ui:
+        # pandas is only needed for the CLI table and CSV files, so the web app never imports it.
+        import pandas as pd
         all_results = []
         result_condensed = []
         for product_list in results:
             all_results.extend(product_list)
+            if sort is not None:
+                continue  # ranked across every site below
             if num is not None:
                 result_condensed.extend(product_list[:num])
             else:
                 result_condensed.extend(product_list)
+        if sort is not None:
+            result_condensed = top_k(titled_products(results), sort, num)
         
         # Make sure we have results before creating DataFrames
         if not result_condensed:
             print("No results to display")
             return pd.DataFrame()  # Return empty DataFrame
-            
+
+        if currency:
+            # One pass over every product with a single rate lookup; condensed rows share these dicts
+            convertResults(all_results, currency)
         result_condensed = pd.DataFrame.from_dict(result_condensed, orient="columns")
         all_results = pd.DataFrame.from_dict(all_results, orient="columns")
         if not currency:
@@ -541,8 +692,11 @@ def driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False,
         return result_condensed
     else:
         result_condensed = []
-        for i in range(8):
-            condense_helper(result_condensed, results[i], num)
+        if sort is not None:
+            result_condensed = top_k(titled_products(results), sort, num)
+        else:
+            for product_list in results:
+                condense_helper(result_condensed, product_list, num)
             
         # Make sure we have results
         if not result_condensed:
@@ -550,30 +704,12 @@ def driver(product, currency, num=None, df_flag=0, csv=False, cd=None, ui=False,
             return []
             
         if currency is not None:
-            for p in result_condensed:
-                p["price"] = getCurrency(currency, p["price"])
-        for p in result_condensed:
-            link = p["link"]
-            if p["website"] == "Etsy":
-                link = link[12:]
-                p["link"] = link
-            elif "http" not in link:
-                p["link"] = "http://" + link
-        if sort is not None:
-            result_condensed = pd.DataFrame(result_condensed)
-            if sort == "rades":
-                result_condensed = sortList(result_condensed, "ra", False)
-            elif sort == "raasc":
-                result_condensed = sortList(result_condensed, "ra", True)
-            elif sort == "pasc":
-                result_condensed = sortList(result_condensed, "pr", False)
-            else:
-                result_condensed = sortList(result_condensed, "pr", True)
-            result_condensed = result_condensed.to_dict(orient="records")
+            convertResults(result_condensed, currency, target="price")
+        normalize_products(result_condensed, keep_converted=currency is not None)
         if csv:
+            import pandas as pd
             file_name = os.path.join(cd, product + datetime.now().strftime("%y%m%d_%H%M") + ".csv")
             result_condensed = pd.DataFrame(result_condensed)
             result_condensed.to_csv(file_name, index=False, header=result_condensed.columns)
             print(result_condensed)
         return result_condensed
-#
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The search_cache module caches the product lists returned by the search*
+functions. Entries live in an in-process LRU and, optionally, in a SQLite
+file shared between processes. Entries past their TTL are still served for
+a grace period while a single background refresh replaces them.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+
+def make_key(query, site, currency, df_flag):
+    """Builds the cache key from the normalized query, site, currency and df_flag."""
+    query = " ".join(str(query or "").lower().split())
+    currency = (currency or "").lower()
+    return f"{site}|{query}|{currency}|{int(bool(df_flag))}"
+
+
+def copy_result(value):
+    """Copies a cached product list so callers can mutate their rows freely."""
+    if isinstance(value, list):
+        return [dict(p) if isinstance(p, dict) else p for p in value]
+    return value
+
+
+class SearchCache:
+    """
+    Two-tier cache for search results.
+
+    `ttl` is how long an entry is fresh, `stale_ttl` how much longer it may be
+    served while being refreshed. When `db_file` is set, entries are also
+    written to a SQLite table so they survive restarts and are shared by workers.
+    """
+
+    def __init__(self, max_entries=512, ttl=300, stale_ttl=1800, db_file=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.db_file = db_file
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "disk_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+        self._conn = None
+        self._db_lock = threading.Lock()
+        if db_file:
+            self._conn = sqlite3.connect(db_file, timeout=5, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _state(self, stored_at):
+        age = time.time() - stored_at
+        if age < self.ttl:
+            return FRESH
+        if age < self.ttl + self.stale_ttl:
+            return STALE
+        return MISS
+
+    def _remember(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key):
+        try:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT value, stored_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Search cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _write_disk(self, key, value, stored_at):
+        try:
+            with self._db_lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), stored_at),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Search cache write failed: {e}")
+
+    def lookup(self, key):
+        """Returns (value, state) where state is FRESH, STALE or MISS."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.db_file:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                self._remember(key, *entry)
+        if entry is None:
+            state = MISS
+        else:
+            state = self._state(entry[1])
+        with self._lock:
+            self._stats[{FRESH: "hits", STALE: "stale_hits", MISS: "misses"}[state]] += 1
+        if state == MISS:
+            return None, MISS
+        return copy_result(entry[0]), state
+
+    def peek(self, key):
+        """Returns the state of key without counting a lookup or copying the value."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.db_file:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, *entry)
+        return MISS if entry is None else self._state(entry[1])
+
+    def store(self, key, value):
+        """Caches a non-empty result; empty lists usually mean the site blocked us."""
+        if not value:
+            return
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+        if self.db_file:
+            self._write_disk(key, value, stored_at)
+
+    def _claim_refresh(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
+
+    def _refresh(self, key, fetch):
+        try:
+            self.store(key, fetch())
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_fetch(self, key, fetch):
+        """Returns the cached value for key, calling fetch() on a miss and refreshing stale entries in the background."""
+        value, state = self.lookup(key)
+        if state == MISS:
+            value = fetch()
+            self.store(key, value)
+            return copy_result(value)
+        if state == STALE and self._claim_refresh(key):
+            threading.Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+        return value
+
+    async def aget_or_fetch(self, key, fetch):
+        """Async variant of get_or_fetch where fetch is a coroutine function."""
+        value, state = self.lookup(key)
+        if state == MISS:
+            value = await fetch()
+            self.store(key, value)
+            return copy_result(value)
+        if state == STALE and self._claim_refresh(key):
+            async def refresh():
+                try:
+                    self.store(key, await fetch())
+                except Exception as e:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                    print(f"Background refresh of {key} failed: {e}")
+                finally:
+                    with self._lock:
+                        self._refreshing.discard(key)
+            task = asyncio.get_running_loop().create_task(refresh())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return value
+
+    def clear(self):
+        """Drops every cached entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+        if self.db_file:
+            with self._db_lock:
+                self._conn.execute("DELETE FROM search_cache")
+                self._conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and the number of entries held in memory."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
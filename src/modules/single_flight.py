@@ -0,0 +1,108 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The single_flight module coalesces identical concurrent calls: while a call
+for a key is running, later callers with the same key wait for it and share
+its result instead of starting their own scrape.
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self, done):
+        self.done = done
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Every caller gets the result of
+    the call in flight; `copy` is applied to the value handed to each caller
+    once a result is shared, so nobody mutates a list another caller holds.
+    """
+
+    def __init__(self, copy=None):
+        self.copy = copy or (lambda value: value)
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def _join(self, key, make_done):
+        """Returns (call, leader), registering a new call for key unless one is running."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = _Call(make_done())
+            self._stats["executions"] += 1
+            return call, True
+
+    def _finish(self, key, error=None):
+        """Unregisters key and reports whether other callers are waiting for its result."""
+        with self._lock:
+            call = self._calls.pop(key)
+            if error is not None:
+                self._stats["errors"] += 1
+            return call.waiters > 0
+
+    def do(self, key, fetch):
+        """Returns fetch(), or the result of the identical call already running."""
+        call, leader = self._join(key, threading.Event)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self.copy(call.value)
+        try:
+            call.value = fetch()
+        except BaseException as e:
+            call.error = e
+            self._finish(key, e)
+            call.done.set()
+            raise
+        shared = self._finish(key)
+        call.done.set()
+        return self.copy(call.value) if shared else call.value
+
+    async def ado(self, key, fetch):
+        """Async variant of do() where fetch is a coroutine function; calls are shared per event loop."""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key)
+        call, leader = self._join(key, loop.create_future)
+        if not leader:
+            # A follower that times out must not cancel the shared call.
+            return self.copy(await asyncio.shield(call.done))
+        try:
+            value = await fetch()
+        except BaseException as e:
+            if self._finish(key, e):
+                if isinstance(e, asyncio.CancelledError):
+                    call.done.set_exception(Exception("The shared search was cancelled"))
+                else:
+                    call.done.set_exception(e)
+            else:
+                call.done.cancel()
+            raise
+        shared = self._finish(key)
+        call.done.set_result(value)
+        return self.copy(value) if shared else value
+
+    def stats(self):
+        """Returns call counters and the number of calls currently in flight."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,201 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The throttle module protects retailers, and our latency budget, from each
+other. Every host gets an adaptive token bucket that spaces out requests and
+a circuit breaker that stops calling a host which keeps answering with
+errors or blocks, so a blocked retailer fails fast instead of using up the
+search deadline.
+"""
+
+import random
+import threading
+import time
+from .config import Config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Responses that mean the host is blocking us or struggling, rather than a missing page.
+FAILURE_STATUSES = {403, 410, 429, 500, 502, 503, 504}
+SLOW_DOWN_STATUSES = {429, 503}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class RateLimitedError(Exception):
+    """Raised when a request would have to wait longer than allowed for a token."""
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second with bursts of up to `burst`. The rate
+    halves when the host signals overload (slow_down) and creeps back to the
+    configured rate on successful responses (speed_up).
+    """
+
+    def __init__(self, rate, burst, min_rate=0.2):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """Takes a token and returns the seconds to wait before using it, or raises RateLimitedError."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                raise RateLimitedError(f"would wait {wait:.1f}s for a request slot")
+            self._tokens -= 1
+            return wait
+
+    def slow_down(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. While open every call
+    is refused; once the jittered backoff has passed a single half-open probe
+    is let through, which closes the circuit on success or reopens it with a
+    doubled backoff (capped at `max_reset_timeout`) on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, max_reset_timeout=300, jitter=0.2):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.jitter = jitter
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._retry_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns True if a request may be sent now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self._retry_at:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self):
+        """Gives up a half-open probe that was never sent, so another caller may probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened += 1
+                backoff = min(self.max_reset_timeout, self.reset_timeout * 2 ** (self.opened - 1))
+                self._retry_at = time.monotonic() + backoff * random.uniform(1 - self.jitter, 1 + self.jitter)
+                self.state = OPEN
+                self._probing = False
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {"state": self.state, "failures": self.failures}
+            if self.state == OPEN:
+                snapshot["retry_in"] = round(max(0.0, self._retry_at - time.monotonic()), 1)
+            return snapshot
+
+
+class HostGuard:
+    """The token bucket and circuit breaker of one host."""
+
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.CIRCUIT_FAILURES,
+            reset_timeout=Config.CIRCUIT_RESET_TIMEOUT,
+            max_reset_timeout=Config.CIRCUIT_MAX_RESET_TIMEOUT,
+            jitter=Config.CIRCUIT_JITTER,
+        )
+
+    def acquire(self, host):
+        """Checks the circuit and reserves a token; returns the seconds the caller must wait first."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}, not sending the request")
+        try:
+            return self.bucket.reserve(Config.HOST_RATE_MAX_WAIT)
+        except RateLimitedError:
+            self.breaker.release()
+            raise
+
+    def record(self, status_code):
+        """Feeds a response status (None for a connection error) back into the breaker and bucket."""
+        if status_code is None or status_code in FAILURE_STATUSES:
+            self.breaker.record_failure()
+            if status_code in SLOW_DOWN_STATUSES:
+                self.bucket.slow_down()
+        else:
+            self.breaker.record_success()
+            self.bucket.speed_up()
+
+
+class HostGuards:
+    """Creates a HostGuard per host on first use, with the rate configured for its retailer."""
+
+    def __init__(self, site_hosts):
+        self.site_hosts = site_hosts
+        self._guards = {}
+        self._lock = threading.Lock()
+
+    def get(self, host):
+        with self._lock:
+            guard = self._guards.get(host)
+            if guard is None:
+                sites = [site for site, site_host in self.site_hosts.items() if site_host == host]
+                rate = next((Config.HOST_RATE_LIMITS[s] for s in sites if s in Config.HOST_RATE_LIMITS),
+                            Config.HOST_RATE_DEFAULT)
+                guard = self._guards[host] = HostGuard(rate, Config.HOST_RATE_BURST)
+            return guard
+
+    def circuit(self, site):
+        """Circuit snapshot for a retailer name, or None if it was never contacted."""
+        host = self.site_hosts.get(site)
+        with self._lock:
+            guard = self._guards.get(host)
+        return guard.breaker.snapshot() if guard is not None else None
+
+    def snapshot(self):
+        with self._lock:
+            guards = dict(self._guards)
+        return {
+            host: dict(guard.breaker.snapshot(), rate=round(guard.bucket.rate, 2))
+            for host, guard in guards.items()
+        }
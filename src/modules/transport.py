@@ -0,0 +1,247 @@
+"""
+Copyright (C) 2021 SE Slash - All Rights Reserved
+You may use, distribute and modify this code under the terms of the MIT license.
+You should have received a copy of the MIT license with this file. If not, please write to: secheaper@gmail.com
+"""
+
+"""
+The transport module builds the HTTP plumbing shared by the scrapers: the
+requests session with per-host connection pools and retry/backoff, the
+header profile sent to each retailer, the per-host rate limits and circuit
+breakers, an opt-in DNS cache and the pool usage counters reported by
+/api/metrics. Responses are brotli-compressed when the brotli package is
+installed. requests only speaks HTTP/1.1, so HTTP/2 (with the h2 package) is
+used by the async httpx engine alone.
+"""
+
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from .config import Config
+from .throttle import HostGuards
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# The system resolver, kept before a DnsCache replaces socket.getaddrinfo.
+SYSTEM_GETADDRINFO = socket.getaddrinfo
+
+# urllib3 only advertises "br" when a brotli decoder is installed.
+BROTLI_AVAILABLE = "br" in ACCEPT_ENCODING
+
+# Hosts behind each retailer name used in the config.
+SITE_HOSTS = {
+    "amazon": "www.amazon.com",
+    "walmart": "www.walmart.com",
+    "bestbuy": "www.bestbuy.com",
+    "google": "www.google.com",
+    "bjs": "www.bjs.com",
+    "etsy": "www.etsy.com",
+    "target": "www.target.com",
+    "redsky": "redsky.target.com",
+}
+
+# Rate limiter and circuit breaker of every host the scrapers talk to.
+HOST_GUARDS = HostGuards(SITE_HOSTS)
+
+CHROME_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.108 Safari/537.36'
+SAFARI_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_2) AppleWebKit/601.3.9 (KHTML, like Gecko) Version/9.0.2 Safari/601.3.9"
+
+# Browser-like headers sent with every scraped page request.
+DEFAULT_HEADERS = {
+    'User-Agent': CHROME_USER_AGENT,
+    'Accept-Encoding': 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'no-cache'
+}
+
+# Pre-built headers per host; hosts not listed get DEFAULT_HEADERS.
+HEADER_PROFILES = {
+    SITE_HOSTS["etsy"]: {"User-Agent": SAFARI_USER_AGENT},
+    SITE_HOSTS["bestbuy"]: dict(DEFAULT_HEADERS, **{'Accept-Language': 'en-US,en;q=0.9'}),
+    SITE_HOSTS["walmart"]: dict(DEFAULT_HEADERS, **{'Accept-Language': 'en-US,en;q=0.9'}),
+    SITE_HOSTS["redsky"]: dict(DEFAULT_HEADERS, Accept='application/json'),
+}
+
+
+def headersFor(URL):
+    """Returns the pre-built header profile for the host of `URL`."""
+    return HEADER_PROFILES.get(urlsplit(URL).hostname, DEFAULT_HEADERS)
+
+
+class MeteredAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts requests per host so pool saturation is visible:
+    a `saturated` request found all `pool_maxsize` keep-alive connections
+    busy and had to open (and later drop) an extra connection, or block.
+    Every request first passes the host's HOST_GUARDS rate limit and circuit.
+    """
+
+    def __init__(self, pool_maxsize, **kwargs):
+        self.maxsize = pool_maxsize
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        super().__init__(pool_maxsize=pool_maxsize, **kwargs)
+
+    def _host_stats(self, host):
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = {
+                "requests": 0, "in_flight": 0, "peak_in_flight": 0, "saturated": 0, "retries": 0, "errors": 0,
+            }
+        return stats
+
+    def send(self, request, *args, **kwargs):
+        host = urlsplit(request.url).hostname
+        guard = HOST_GUARDS.get(host)
+        wait = guard.acquire(host)
+        if wait:
+            time.sleep(wait)
+        with self._stats_lock:
+            stats = self._host_stats(host)
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+            if stats["in_flight"] > self.maxsize:
+                stats["saturated"] += 1
+        try:
+            response = super().send(request, *args, **kwargs)
+        except Exception:
+            guard.record(None)
+            with self._stats_lock:
+                stats["errors"] += 1
+            raise
+        finally:
+            with self._stats_lock:
+                stats["in_flight"] -= 1
+        guard.record(response.status_code)
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            with self._stats_lock:
+                stats["retries"] += len(retries.history)
+        return response
+
+    def metrics(self):
+        with self._stats_lock:
+            return {host: dict(stats, pool_maxsize=self.maxsize) for host, stats in self._stats.items()}
+
+
+def retryPolicy():
+    return Retry(
+        total=Config.HTTP_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF,
+        status_forcelist=(500, 502, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        # Hand non-200 responses back to the scrapers, which decide what a block means.
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+
+
+class ScraperSession(requests.Session):
+    """
+    The shared requests session: one MeteredAdapter per retailer listed in
+    Config.HTTP_HOST_POOL_SIZES plus a default adapter for every other host.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.metered = [MeteredAdapter(
+            Config.HTTP_POOL_MAXSIZE, pool_connections=Config.HTTP_POOL_CONNECTIONS,
+            pool_block=Config.HTTP_POOL_BLOCK, max_retries=retryPolicy(),
+        )]
+        self.mount("https://", self.metered[0])
+        self.mount("http://", self.metered[0])
+        for site, size in Config.HTTP_HOST_POOL_SIZES.items():
+            adapter = MeteredAdapter(int(size), pool_connections=1, pool_block=Config.HTTP_POOL_BLOCK,
+                                     max_retries=retryPolicy())
+            self.mount(f"https://{SITE_HOSTS.get(site, site)}", adapter)
+            self.metered.append(adapter)
+
+    def metrics(self):
+        """Per-host request and pool-saturation counters."""
+        metrics = {}
+        for adapter in self.metered:
+            metrics.update(adapter.metrics())
+        return metrics
+
+
+class DnsCache:
+    """
+    Caches socket.getaddrinfo lookups for `ttl` seconds, so the scrapers do
+    not resolve the same retailer hosts on every new connection. Failed
+    lookups are remembered for `negative_ttl` seconds and raise again
+    without asking the resolver; 0 does not remember them.
+    """
+
+    def __init__(self, ttl, resolver=None, negative_ttl=0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.resolver = resolver or SYSTEM_GETADDRINFO
+        self.hits = 0
+        self.misses = 0
+        self.installed = False
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < (self.negative_ttl if entry[2] else self.ttl):
+                self.hits += 1
+                if entry[2]:
+                    raise entry[0]
+                return entry[0]
+            self.misses += 1
+        try:
+            result = self.resolver(*args, **kwargs)
+        except socket.gaierror as e:
+            with self._lock:
+                if self.negative_ttl > 0:
+                    self._entries[key] = (e, now, True)
+                else:
+                    self._entries.pop(key, None)
+            raise
+        with self._lock:
+            self._entries[key] = (result, now, False)
+        return result
+
+    def install(self):
+        """Routes every socket.getaddrinfo call of the process through the cache."""
+        socket.getaddrinfo = self.getaddrinfo
+        self.installed = True
+        return self
+
+    def uninstall(self):
+        if socket.getaddrinfo == self.getaddrinfo:
+            socket.getaddrinfo = SYSTEM_GETADDRINFO
+        self.installed = False
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# Not installed on import: it replaces socket.getaddrinfo for the whole process,
+# so run.py opts in through install_dns_cache() when Config.DNS_CACHE is set.
+DNS_CACHE = DnsCache(Config.DNS_CACHE_TTL, negative_ttl=Config.DNS_NEGATIVE_TTL)
+
+
+def install_dns_cache():
+    """Installs DNS_CACHE if enabled in the config; returns it, or None when it stays off."""
+    if not Config.DNS_CACHE or Config.DNS_CACHE_TTL <= 0:
+        return None
+    return DNS_CACHE.install()
@@ -9,7 +9,7 @@ this file. If not, please write to: secheaper@gmail.com
 
 import argparse
 from src.modules.scraper import driver
-from src.modules.formatter import sortList
+from src.modules.async_scraper import run_async_driver
 from tabulate import tabulate
 import os
 import csv
@@ -17,6 +17,18 @@ from src.modules.full_version import full_version
 import pandas as pd
 from shutil import get_terminal_size
 
+# --sort keys and the ranking scores they stand for; re keeps each site's own order
+CLI_SORTS = {"pr": "price", "ra": "rating", "value": "value", "reviews": "reviews"}
+
+
+def sort_order(sorts, descending):
+    """The ranking order for the --sort keys, where the last key other than re wins."""
+    for key in reversed(sorts):
+        if key in CLI_SORTS:
+            return f"{CLI_SORTS[key]}:{'desc' if descending else 'asc'}"
+    return None
+
+
 def main():
     """Provides help for every argument"""
     pd.set_option("display.max_rows", None)
@@ -36,8 +48,10 @@ def main():
         "--sort",
         type=str,
         nargs="+",
-        help="Sort according to re (relevance: default), pr (price) or ra (rating)",
-        default="re",
+        choices=["re"] + list(CLI_SORTS),
+        help="Sort according to re (relevance: default), pr (price), ra (rating), "
+        "value (price per rating star) or reviews; with --num, keeps the best results across all sites",
+        default=["re"],
     )
     parser.add_argument("--link", action="store_true", help="Show links in the table")
     parser.add_argument(
@@ -61,6 +75,12 @@ def main():
         type=str,
         help="Display the amount in specified currency(inr, euro, aud, yuan, yen, pound)",
     )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Scrape all sites concurrently on one asyncio event loop",
+    )
     args = parser.parse_args()
 
     if args.full == "T":
@@ -68,17 +88,16 @@ def main():
         full_version().driver()
         return
 
-    results = driver(
+    search = run_async_driver if args.use_async else driver
+    results = search(
         args.search,
         args.currency,
         args.num,
         csv=args.csv,
         cd=args.cd,
+        sort=sort_order(args.sort, args.des),
     )
 
-    for sortBy in args.sort:
-        results = sortList(results, sortBy, args.des)
-
     print()
     print()
     print(results)
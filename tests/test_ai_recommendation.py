@@ -84,7 +84,7 @@ def test_ai_recommendations_success_with_recommendations(client):
             
             with patch('src.modules.app.session', {'username': 'test@example.com'}):
                 with patch('src.modules.app.db.get_user_id_by_email', return_value=1):
-                    with patch('src.modules.app.db.log_search'):
+                    with patch('src.modules.app.db.queue_search'):
                         with patch('src.modules.app.searchWalmart') as mock_search:
                             mock_search.return_value = [
                                 {
@@ -128,7 +128,7 @@ def test_ai_recommendations_search_error(client):
             
             with patch('src.modules.app.session', {'username': 'test@example.com'}):
                 with patch('src.modules.app.db.get_user_id_by_email', return_value=1):
-                    with patch('src.modules.app.db.log_search'):
+                    with patch('src.modules.app.db.queue_search'):
                         with patch('src.modules.app.searchWalmart', side_effect=Exception("Search error")):
                             with patch('src.modules.app.app.logger.error') as mock_logger:
                                 response = client.post('/ai-recommendations', json={'conversation': valid_conversation})
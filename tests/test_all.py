@@ -1,4 +1,5 @@
 import pytest
+import json
 import sys
 import os
 import re
@@ -26,6 +27,7 @@ from slash.src.modules.scraper import (
     sortList,
     driver
 )
+from slash.src.modules.formatter import convertResults, parsePrice, numericFields
   
 
 @pytest.fixture
@@ -223,6 +225,71 @@ def test_search_requires_login(client):
     assert '/login' in response.headers['Location']
 
 
+def test_search_stream_requires_login(client):
+    """Test that the streaming search endpoint rejects anonymous users."""
+    response = client.get('/search/stream', query_string={'product_name': 'laptop'})
+    assert response.status_code == 401
+
+
+def test_search_stream_emits_each_site_then_summary(client, monkeypatch):
+    """Test that streamed search sends one event per retailer followed by a summary."""
+    def fake_iter_search(product, currency, df_flag=0):
+        yield 1, "walmart", [{"title": "Fast", "link": "walmart.com/ip/1", "website": "walmart",
+                              "converted_price": None}], {"status": "ok", "count": 1}
+        yield 0, "amazon", [{"title": "Slow"}, {"title": "Slower"}], {"status": "ok", "count": 2}
+        yield 2, "bestbuy", [], {"status": "timeout", "count": 0}
+    monkeypatch.setattr("slash.src.modules.app.iter_search", fake_iter_search)
+    monkeypatch.setattr("slash.src.modules.app.db.queue_search", lambda *args: None)
+    with client.session_transaction() as session:
+        session['username'] = "TestUser"
+
+    response = client.get('/search/stream', query_string={'product_name': 'laptop', 'format': 'ndjson'})
+    events = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [e['event'] for e in events] == ['results', 'results', 'results', 'summary']
+    assert events[0]['site'] == "walmart"
+    assert "converted_price" not in events[0]['products'][0]
+    assert events[0]['products'][0]['link'] == "http://walmart.com/ip/1"
+    assert events[3]['total_results'] == 3
+    assert events[3]['sites']['bestbuy']['status'] == "timeout"
+
+    response = client.get('/search/stream', query_string={'product_name': 'laptop'})
+    assert response.mimetype == 'text/event-stream'
+    assert response.data.decode().startswith("event: results\ndata: ")
+
+
+def test_search_stream_ranks_across_finished_sites(client, monkeypatch):
+    """Test that a sorted stream carries the best products of every site finished so far."""
+    def fake_iter_search(product, currency, df_flag=0):
+        yield 1, "walmart", [{"title": "B", "price": "$5"}, {"title": "C", "price": "$9"}], {"status": "ok"}
+        yield 0, "amazon", [{"title": "A", "price": "$2"}, {"title": "D", "price": "$12"}], {"status": "ok"}
+    monkeypatch.setattr("slash.src.modules.app.iter_search", fake_iter_search)
+    monkeypatch.setattr("slash.src.modules.app.db.queue_search", lambda *args: None)
+    with client.session_transaction() as session:
+        session['username'] = "TestUser"
+
+    query = {'product_name': 'laptop', 'format': 'ndjson', 'sort': 'price', 'page_size': 2}
+    events = [json.loads(line) for line in client.get('/search/stream', query_string=query).data.decode().splitlines()]
+    assert [p['title'] for p in events[0]['top']] == ["B", "C"]
+    assert [p['title'] for p in events[1]['top']] == ["A", "B"]
+    assert client.get('/search/stream', query_string=dict(query, sort='cheapest')).status_code == 400
+
+
+def test_filter_ranks_filtered_results(client, monkeypatch):
+    """Test that /filter applies the price bounds before ranking by the chosen order."""
+    from slash.src.modules import app as app_module
+    rows = [numericFields(p, r, None) for p, r in [("$30", "4"), ("$5", "5"), ("$12", "3"), ("$50", "2")]]
+    for n, row in enumerate(rows):
+        row.update(title=f"Item {n}", price=f"${row['price_value']:g}", link=f"http://a.com/{n}", website="walmart")
+    monkeypatch.setattr(app_module, "driver", lambda *args, **kwargs: [dict(row) for row in rows])
+    monkeypatch.setattr(app_module, "render_template", lambda template, **context: json.dumps(context))
+    with client.session_transaction() as session:
+        session['username'] = "a@b.com"
+    response = client.post('/filter?product_name=lamp', data={'sort': 'rades', 'currency': 'usd', 'min_price': '10'})
+    assert [p['title'] for p in json.loads(response.data)['data']] == ["Item 0", "Item 2", "Item 3"]
+    response = client.post('/filter?product_name=lamp', data={'sort': 'pdes', 'max_price': '40'})
+    assert [p['title'] for p in json.loads(response.data)['data']] == ["Item 0", "Item 2", "Item 1"]
+
+
 # def test_share_wishlist(client, monkeypatch):
 #     """Test sharing a wishlist with an email."""
 #     with client.session_transaction() as session:
@@ -326,27 +393,26 @@ sample_target_html = """
 def httpsGet(monkeypatch):
     def get_(url):
         if "amazon.com" in url:
-            return BeautifulSoup(sample_amazon_html, "lxml")
+            return sample_amazon_html.encode()
         elif "walmart.com" in url:
-            return BeautifulSoup(sample_walmart_html, "lxml")
+            return sample_walmart_html.encode()
         elif "etsy.com" in url:
-            return BeautifulSoup(sample_etsy_html, "lxml")
+            return sample_etsy_html.encode()
         elif "google.com/search" in url:
-            return BeautifulSoup(sample_google_shopping_html, "lxml")
+            return sample_google_shopping_html.encode()
         elif "bjs.com" in url:
-            return BeautifulSoup(sample_bjs_html, "lxml")
+            return sample_bjs_html.encode()
         elif "bestbuy.com" in url:
-            return BeautifulSoup(sample_bestbuy_html, "lxml")
+            return sample_bestbuy_html.encode()
         elif "redsky.target.com" in url:
-            return BeautifulSoup(sample_target_html, "lxml")
+            return sample_target_html.encode()
         else:
-            return BeautifulSoup("", "lxml")
-    monkeypatch.setattr("slash.src.modules.scraper.httpsGet", get_)
+            return b""
+    monkeypatch.setattr("slash.src.modules.scraper.httpsGetContent", get_)
 
 @pytest.fixture
 def httpsGetempty(monkeypatch):
-    monkeypatch.setattr("slash.src.modules.scraper.httpsGet", lambda url: BeautifulSoup("", "lxml"))
-
+    monkeypatch.setattr("slash.src.modules.scraper.httpsGetContent", lambda url: b"")
 
 #def test_amazon_(httpsGet):
 #    products = searchAmazon("test", 0, "usd")
@@ -400,6 +466,32 @@ def test_driver_integration_(httpsGet):
     titles = df["title"].astype(str).tolist()
     assert any("Sample" in title for title in titles)
 
+def test_driver_returns_partial_results_on_deadline(monkeypatch):
+    """A site that misses its deadline is dropped and reported as a timeout."""
+    import time
+    from slash.src.modules import scraper
+
+    def fast(query, df_flag, currency):
+        return [{"title": "Fast", "price": "$1", "link": "http://a.com", "website": "fast"}]
+
+    def slow(query, df_flag, currency):
+        time.sleep(1)
+        return [{"title": "Slow", "price": "$2", "link": "http://b.com", "website": "slow"}]
+
+    def broken(query, df_flag, currency):
+        raise Exception("blocked")
+
+    monkeypatch.setattr(scraper, "enabled_searches", lambda: [("fast", fast), ("slow", slow), ("broken", broken)])
+    monkeypatch.setattr(scraper.Config, "SITE_DEADLINES", {"slow": 0.2})
+    site_status = {}
+    started = time.monotonic()
+    df = driver("deadline test", None, site_status=site_status)
+    assert time.monotonic() - started < 0.9
+    assert df["title"].tolist() == ["Fast"]
+    assert site_status["fast"]["status"] == "ok"
+    assert site_status["slow"]["status"] == "timeout"
+    assert site_status["broken"]["status"] == "error"
+
 #def test_amazon_empty(httpsGetempty):
 #    products = searchAmazon("test", 0, "usd")
 #    assert products == []
@@ -430,4 +522,203 @@ def test_sortList():
     """Fix sorting assertion by ensuring expected order in sorted DataFrame."""
     df = pd.DataFrame([{"price": 19.99}, {"price": 9.99}])
     sorted_df = sortList(df, "pr", ascending=True)
-    assert sorted_df.iloc[0]["price"] < sorted_df.iloc[1]["price"], "Expected sorting in ascending order"
\ No newline at end of file
+    assert sorted_df.iloc[0]["price"] < sorted_df.iloc[1]["price"], "Expected sorting in ascending order"
+
+
+@pytest.fixture
+def inr_rates(monkeypatch):
+    monkeypatch.setattr("slash.src.modules.formatter.EXCHANGES._table", {"rates": {"INR": 80.0}})
+    monkeypatch.setattr("slash.src.modules.formatter.EXCHANGES._fetched_at", float("inf"))
+
+
+def test_convert_results_matches_getCurrency(inr_rates):
+    prices = ["$12.50", "$1,000.00", "Price not available"]
+    converted = [p["converted_price"] for p in convertResults([{"price": p} for p in prices], "inr")]
+    assert converted == [getCurrency("inr", p) for p in prices]
+    assert converted == ["INR 1000.0", "INR 80000.0", 0.0]
+
+
+def test_convert_results_in_place(inr_rates):
+    products = [{"price": "$2"}, {"price": "$3.25"}]
+    convertResults(products, "inr")
+    assert [p["converted_price"] for p in products] == ["INR 160.0", "INR 260.0"]
+
+
+def test_walmart_rows_carry_numeric_fields(httpsGet):
+    product = searchWalmart("test", 0, None)[0]
+    assert product["rating_value"] == 4.0
+    assert product["num_ratings_int"] == 50
+
+
+def test_parse_price_and_numeric_fields():
+    assert parsePrice("$1,299.99") == (1299.99, "USD")
+    assert parsePrice("INR 80.5") == (80.5, "INR")
+    assert parsePrice("Price not available") == (None, None)
+    assert numericFields("$5", "4.5 out of 5 stars", "1,024") == {
+        "price_value": 5.0, "currency_code": "USD", "rating_value": 4.5, "num_ratings_int": 1024
+    }
+
+
+def test_sort_and_filter_use_numeric_fields():
+    rows = [numericFields(p, r, None) for p, r in [("$1,200.00", "3"), ("$30", "5"), ("N/A", "")]]
+    for row, price in zip(rows, ["$1,200.00", "$30", "N/A"]):
+        row["price"] = price
+    assert [r["price"] for r in filter_results(rows, price_min=20)] == ["$1,200.00", "$30"]
+    df = sortList(pd.DataFrame(rows), "pr", True)
+    assert df["price"].tolist() == ["N/A", "$30", "$1,200.00"]
+    df = sortList(pd.DataFrame(rows), "ra", False)
+    assert df["price"].tolist()[0] == "$30"
+
+
+def test_ui_driver_returns_sorted_records_without_pandas(monkeypatch):
+    from slash.src.modules import scraper
+
+    def site(prices):
+        return lambda query, df_flag, currency: [
+            dict(numericFields(price, None, None), title=f"Item {price}", price=price, link="a.com", website="a",
+                 converted_price=None)
+            for price in prices
+        ]
+    monkeypatch.setattr(scraper, "enabled_searches", lambda: [("a", site(["$9", "$3"])), ("b", site(["$1", "$7"]))])
+    rows = driver("ui sort test", None, num=3, ui=True, sort="pasc")
+    assert isinstance(rows, list)
+    assert [r["price"] for r in rows] == ["$1", "$3", "$7"]
+    assert rows[0]["link"] == "http://a.com" and "converted_price" not in rows[0]
+
+
+def test_bjs_uses_extraction_spec(httpsGet):
+    product = searchBJs("test", 0, None)[0]
+    assert product["title"] == "Sample Product BJs"
+    assert product["rating"] == 1
+
+
+def test_extraction_spec_is_data_driven(monkeypatch):
+    from slash.src.modules.extraction import RETAILER_SPECS, RetailerSpec, Field, extract
+    spec = RetailerSpec("shop", "div.item", {
+        "titles": Field("h2"),
+        "prices": Field("span", text=r"\$"),
+        "links": Field("a"),
+    })
+    monkeypatch.setitem(RETAILER_SPECS, "shop", spec)
+    page = BeautifulSoup(
+        '<div class="item"><h2>Lamp</h2><span>Sale</span><span>$4.50</span><a href="http://shop.com/1">x</a></div>',
+        "lxml"
+    )
+    product = extract(page, "shop", 0, None)[0]
+    assert (product["title"], product["price"], product["link"]) == ("Lamp", "$4.50", "http://shop.com/1")
+
+
+
+@pytest.mark.parametrize("site, html", [
+    ("amazon", sample_amazon_html),
+    ("walmart", sample_walmart_html),
+    ("bestbuy", sample_bestbuy_html),
+    ("google", sample_google_shopping_html),
+    ("bjs", sample_bjs_html),
+])
+def test_fast_parser_matches_beautifulsoup(site, html):
+    from slash.src.modules.extraction import extract, extractFast
+    slow = extract(BeautifulSoup(html, "lxml"), site, 0, None)
+    fast = extractFast(html.encode(), site, 0, None)
+    for product in slow + fast:
+        product.pop("timestamp")
+    assert fast == slow
+
+
+def test_fast_parser_selected_per_site(monkeypatch):
+    from slash.src.modules import scraper
+    monkeypatch.setattr(scraper.Config, "FAST_PARSER_SITES", {"bestbuy"})
+    monkeypatch.setattr(scraper, "httpsGet", lambda url: pytest.fail("BeautifulSoup path used"))
+    monkeypatch.setattr(scraper, "httpsGetContent", lambda url: b"<html><head></head><body>" +
+                        sample_bestbuy_html.encode() + b"</body></html>")
+    product = searchBestbuy("test", 0, None)[0]
+    assert (product["title"], product["price"]) == ("Sample Product Bestbuy", "$25.99")
+
+
+walmart_next_data_html = """
+<html><head><script id="__NEXT_DATA__" type="application/json">{"props": {"pageProps": {"initialData": {
+  "searchResult": {"itemStacks": [{"items": [
+    {"__typename": "AdPlaceholder"},
+    {"__typename": "Product", "name": "Walmart JSON item", "canonicalUrl": "/ip/123",
+     "priceInfo": {"linePrice": "$12.50"}, "averageRating": 4.5, "numberOfReviews": 210,
+     "imageInfo": {"thumbnailUrl": "http://example.com/w.jpg"}}
+  ]}]}}}}}</script></head><body><div data-item-id="1"><span class="lh-title">DOM item</span></div></body></html>
+"""
+
+bestbuy_ld_json_html = """
+<html><head><script type="application/ld+json">{"@context": "https://schema.org", "@type": "ItemList",
+  "itemListElement": [{"@type": "ListItem", "position": 1, "item": {"@type": "Product",
+    "name": "Best Buy JSON item", "url": "https://www.bestbuy.com/site/1.p", "image": ["http://example.com/b.jpg"],
+    "offers": {"@type": "Offer", "price": 99.99, "priceCurrency": "USD"},
+    "aggregateRating": {"ratingValue": "4.7", "reviewCount": 88}}}]}</script></head><body></body></html>
+"""
+
+
+def test_walmart_reads_next_data(monkeypatch):
+    monkeypatch.setattr("slash.src.modules.scraper.httpsGetContent", lambda url: walmart_next_data_html.encode())
+    products = searchWalmart("test", 0, None)
+    assert len(products) == 1
+    product = products[0]
+    assert (product["title"], product["price"], product["link"]) == (
+        "Walmart JSON item", "$12.50", "https://www.walmart.com/ip/123")
+    assert (product["rating"], product["num_ratings_int"], product["img_link"]) == (
+        4.5, 210, "http://example.com/w.jpg")
+
+
+def test_bestbuy_reads_ld_json(monkeypatch):
+    monkeypatch.setattr("slash.src.modules.scraper.httpsGetContent", lambda url: bestbuy_ld_json_html.encode())
+    product = searchBestbuy("test", 0, None)[0]
+    assert (product["title"], product["price_value"], product["rating"]) == ("Best Buy JSON item", 99.99, 4.7)
+    assert product["link"] == "https://www.bestbuy.com/site/1.p"
+
+
+def test_embedded_json_falls_back_to_dom():
+    from slash.src.modules.embedded_data import scriptPayloads, walmartNextData
+    assert walmartNextData(sample_walmart_html.encode()) is None
+    page = b'<p>id="__NEXT_DATA__"</p><script id="__NEXT_DATA__">{"a": 1}</script>'
+    assert list(scriptPayloads(page, b'id="__NEXT_DATA__"')) == [b'{"a": 1}']
+
+
+def test_search_page_gets_comments_for_its_products(client, monkeypatch):
+    """Test that /search only returns the comments of the products it lists."""
+    from slash.src.modules import app as app_module
+    from slash.src.modules.comments import CommentStore
+    from slash.src.modules.DatabaseManager import DatabaseManager
+    store = CommentStore(DatabaseManager(":memory:"))
+    store.add("Lamp", "a@b.com", "Bright")
+    store.add("Desk", "a@b.com", "Sturdy")
+    monkeypatch.setattr(app_module, "COMMENTS", store)
+    monkeypatch.setattr(app_module, "driver", lambda *args, **kwargs: [
+        {"title": "Lamp", "price": "$5", "link": "l", "website": "walmart", "rating": 4}])
+    monkeypatch.setattr(app_module.db, "queue_search", lambda *args: None)
+    with client.session_transaction() as session:
+        session['username'] = "a@b.com"
+    response = client.get('/search', query_string={'product_name': 'lamp'}, headers={'Accept': 'application/json'})
+    assert response.get_json()['comments'] == {"Lamp": [{"username": "a@b.com", "comment": "Bright"}]}
+
+
+def test_search_json_is_paged_with_cursors(client, monkeypatch):
+    """Test that /search returns one page plus a cursor, and later pages do not search again."""
+    from slash.src.modules import app as app_module
+    calls = []
+
+    def fake_driver(*args, **kwargs):
+        calls.append(args)
+        assert kwargs["ui"]
+        return [{"title": f"Item {n}", "price": f"${n}", "link": f"l{n}", "website": "walmart"} for n in range(25)]
+    monkeypatch.setattr(app_module, "driver", fake_driver)
+    monkeypatch.setattr(app_module.db, "queue_search", lambda *args: None)
+    with client.session_transaction() as session:
+        session['username'] = "a@b.com"
+
+    first = client.get('/search', query_string={'product_name': 'item', 'format': 'json', 'page_size': 10}).get_json()
+    assert [p['title'] for p in first['products']] == [f"Item {n}" for n in range(10)]
+    assert (first['total_results'], first['total_pages'], first['page']) == (25, 3, 1)
+    second = client.get('/search', query_string={'cursor': first['next_cursor'], 'format': 'json'}).get_json()
+    third = client.get('/search', query_string={'cursor': second['next_cursor'], 'format': 'json'}).get_json()
+    assert [p['title'] for p in third['products']] == [f"Item {n}" for n in range(20, 25)]
+    assert (third['page'], third['next_cursor'], third['product_name']) == (3, None, "item")
+    assert len(calls) == 1
+
+    expired = client.get('/search', query_string={'cursor': 'bm9wZQ', 'format': 'json'})
+    assert expired.status_code == 410
@@ -0,0 +1,64 @@
+import asyncio
+import pandas as pd
+import pytest
+from slash.src.modules import async_scraper
+
+
+sample_walmart_html = b"""
+<div data-item-id="123">
+  <span class="lh-title">Sample Product Walmart</span>
+  <span class="w_iUH7">4.0 out of 5 Stars</span>
+  <span class="sans-serif gray f7">50</span>
+</div>
+"""
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.fixture
+def fetch(monkeypatch):
+    async def fetch_(url, headers=None, params=None):
+        if "walmart.com" in url:
+            return FakeResponse(sample_walmart_html)
+        return None
+    monkeypatch.setattr("slash.src.modules.async_scraper.fetch", fetch_)
+
+
+def test_async_walmart(fetch):
+    products = asyncio.run(async_scraper.searchWalmart("test", 0, None))
+    assert isinstance(products, list)
+    assert "Sample Product Walmart" in str(products[0].get("title", ""))
+
+
+def test_async_blocked_page_raises(fetch):
+    with pytest.raises(Exception):
+        asyncio.run(async_scraper.searchBestbuy("test", 0, None))
+
+
+def test_blocking_scrapers_are_wrapped(monkeypatch):
+    monkeypatch.setattr(
+        "slash.src.modules.scraper.enabled_searches",
+        lambda: [("walmart", None), ("amazon", lambda q, d, c: [])],
+    )
+    searches = dict(async_scraper.enabled_searches())
+    assert searches["walmart"] is async_scraper.searchWalmart
+    assert asyncio.iscoroutinefunction(searches["amazon"])
+
+
+def test_async_driver_collects_all_sites(monkeypatch):
+    async def site_a(query, df_flag, currency):
+        return [{"title": "A", "price": "$1", "link": "http://a.com", "website": "a"}]
+
+    async def site_b(query, df_flag, currency):
+        raise Exception("blocked")
+
+    monkeypatch.setattr(
+        "slash.src.modules.async_scraper.enabled_searches",
+        lambda: [("a", site_a), ("b", site_b)],
+    )
+    df = async_scraper.run_async_driver("test", None)
+    assert isinstance(df, pd.DataFrame)
+    assert df["title"].tolist() == ["A"]
@@ -0,0 +1,101 @@
+import threading
+import pytest
+from slash.src.modules.browser_pool import BrowserPool, BrowserPoolTimeout, BrowserPoolFull
+
+
+class FakeDriver:
+    """Minimal stand-in for a selenium webdriver."""
+
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.page_source = ""
+        self.quit_called = False
+        self.switch_to = self
+
+    def window(self, handle):
+        pass
+
+    def close(self):
+        pass
+
+    def get(self, url):
+        self.page_source = f"<html>{url}</html>"
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def launched():
+    return []
+
+
+@pytest.fixture
+def pool(launched):
+    def factory():
+        driver = FakeDriver()
+        launched.append(driver)
+        return driver
+    pool = BrowserPool(size=2, max_pages=3, checkout_timeout=0.2, max_waiters=1, factory=factory)
+    yield pool
+    pool.close()
+
+
+def test_browser_is_reused(pool, launched):
+    assert pool.fetch_page("http://a") == "<html>http://a</html>"
+    assert pool.fetch_page("http://b") == "<html>http://b</html>"
+    assert len(launched) == 1
+
+
+def test_browser_recycled_after_max_pages(pool, launched):
+    for i in range(4):
+        pool.fetch_page(f"http://{i}")
+    assert len(launched) == 2
+    assert launched[0].quit_called
+    assert pool.metrics()["recycled"] == 1
+
+
+def test_unhealthy_browser_is_replaced(pool, launched):
+    pool.fetch_page("http://a")
+    del launched[0].window_handles
+    pool.fetch_page("http://b")
+    assert len(launched) == 2
+    assert pool.metrics()["unhealthy"] == 1
+
+
+def test_broken_browser_is_discarded(pool, launched):
+    with pytest.raises(ValueError):
+        with pool.browser():
+            raise ValueError("page crashed")
+    assert launched[0].quit_called
+    assert pool.metrics()["live"] == 0
+
+
+def test_checkout_times_out_when_exhausted(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(BrowserPoolTimeout):
+        pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.metrics()["timeouts"] == 1
+
+
+def test_checkout_queue_is_bounded(pool):
+    held = [pool.acquire(), pool.acquire()]
+    waiter = threading.Thread(target=lambda: pytest.raises(BrowserPoolTimeout, pool.acquire))
+    waiter.start()
+    while pool.metrics()["waiting"] == 0 and waiter.is_alive():
+        pass
+    with pytest.raises(BrowserPoolFull):
+        pool.acquire()
+    waiter.join()
+    for browser in held:
+        pool.release(browser)
+
+
+def test_metrics_track_wait_time(pool):
+    pool.fetch_page("http://a")
+    stats = pool.metrics()
+    assert stats["checkouts"] == 1
+    assert stats["avg_wait"] >= 0
+    assert stats["idle"] == 1 and stats["in_use"] == 0
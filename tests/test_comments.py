@@ -0,0 +1,66 @@
+from slash.src.modules.comments import CommentStore
+from slash.src.modules.DatabaseManager import DatabaseManager
+
+
+def test_comments_are_loaded_for_listed_titles_only():
+    store = CommentStore(DatabaseManager(":memory:"))
+    store.add("Lamp", "a@b.com", "Bright", "https://walmart.com/lamp", "walmart")
+    store.add("Lamp", "c@d.com", "Too bright")
+    store.add("Desk", "a@b.com", "Sturdy")
+    assert store.for_products(["Lamp", "Chair"]) == {
+        "Lamp": [{"username": "a@b.com", "comment": "Bright"}, {"username": "c@d.com", "comment": "Too bright"}]
+    }
+    # Both titles are now cached, including the one without comments.
+    store.for_products(["Lamp", "Chair"])
+    assert store.stats() == {"hits": 2, "misses": 2, "cached": 2}
+
+
+def test_new_comment_invalidates_its_title():
+    store = CommentStore(DatabaseManager(":memory:"))
+    assert store.for_products(["Lamp"]) == {}
+    store.add("Lamp", "a@b.com", "Bright")
+    assert store.for_products(["Lamp"])["Lamp"] == [{"username": "a@b.com", "comment": "Bright"}]
+
+
+def test_cache_is_bounded():
+    store = CommentStore(DatabaseManager(":memory:"), cache_size=2)
+    store.for_products(["a", "b", "c"])
+    assert store.stats()["cached"] == 2
+
+
+def test_csv_import(tmp_path):
+    path = tmp_path / "comments.csv"
+    path.write_text("product_name,username,comment\nLamp,a@b.com,Bright\nLamp,c@d.com,\"Dim, but ok\"\n")
+    db = DatabaseManager(":memory:")
+    store = CommentStore(db)
+    assert store.import_csv(path) == 2
+    assert [c["comment"] for c in store.for_products(["Lamp"])["Lamp"]] == ["Bright", "Dim, but ok"]
+    with db.pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 1
+
+
+
+def test_comments_follow_the_posted_title():
+    db = DatabaseManager(":memory:")
+    db.insert_product("Desk Lamp 60W", None, 10.0, "USD", None, None, "https://walmart.com/lamp", None, None, "walmart")
+    store = CommentStore(db)
+    store.add("Lamp", "a@b.com", "Bright", "https://walmart.com/lamp", "walmart")
+    assert store.for_products(["Lamp"]) == {"Lamp": [{"username": "a@b.com", "comment": "Bright"}]}
+    assert store.for_products(["Desk Lamp 60W"]) == {}
+    assert len(db.get_comments(db.get_product("https://walmart.com/lamp")[0])) == 1
+
+
+def test_lookup_racing_with_add_does_not_cache_old_comments():
+    db = DatabaseManager(":memory:")
+    store = CommentStore(db)
+    load = db.get_comments_for_names
+
+    def add_during_lookup(names):
+        rows = load(names)
+        # The comment lands after the lookup read the database but before it fills the cache.
+        store.add("Lamp", "a@b.com", "Bright")
+        return rows
+    db.get_comments_for_names = add_during_lookup
+    assert store.for_products(["Lamp"]) == {}
+    db.get_comments_for_names = load
+    assert store.for_products(["Lamp"]) == {"Lamp": [{"username": "a@b.com", "comment": "Bright"}]}
@@ -1,7 +1,7 @@
 import pytest
 import sqlite3
 from datetime import datetime
-from slash.src.modules.DatabaseManager import DatabaseManager
+from slash.src.modules.DatabaseManager import DatabaseManager, MIGRATIONS
 from flask import Flask
 from flask.testing import FlaskClient
 
@@ -26,7 +26,8 @@ def test_insert_duplicate_user(db):
     """Test inserting a duplicate user should fail."""
     db.insert_user(email="user@example.com", full_name="John Doe", name="johndoe")
     db.insert_user(email="user@example.com", full_name="Jane Doe", name="janedoe")
-    user_count = db.cursor.execute("SELECT COUNT(*) FROM users WHERE email = 'user@example.com'").fetchone()[0]
+    with db.pool.connection() as conn:
+        user_count = conn.execute("SELECT COUNT(*) FROM users WHERE email = 'user@example.com'").fetchone()[0]
     assert user_count == 1
 
 
@@ -159,9 +160,8 @@ def test_wishlist_empty(db):
 
 def test_product_source_required(db):
     """Test if product source is required."""
-    with pytest.raises(sqlite3.IntegrityError):
-        db.cursor.execute("INSERT INTO products (name, url) VALUES ('Laptop', 'http://example.com')")
-        db.conn.commit()
+    with pytest.raises(sqlite3.IntegrityError), db.pool.connection() as conn:
+        conn.execute("INSERT INTO products (name, url) VALUES ('Laptop', 'http://example.com')")
 
 def setup_test_data(db):
     user_id = db.add_user("testuser", "test@example.com", "password")
@@ -310,3 +310,108 @@ def get_comments(self, product_id):
     """, (product_id,))
     return self.cursor.fetchall()
 
+
+
+def test_wishlists_from_older_databases_get_default_list(tmp_path):
+    """Test that wishlist items stored before named lists end up in the default list."""
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE wishlists (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+                                product_id INTEGER NOT NULL, added_on DATETIME DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO wishlists (user_id, product_id) VALUES (1, 1);
+        INSERT INTO wishlists (user_id, product_id) VALUES (1, 1);
+    """)
+    conn.close()
+    db = DatabaseManager(path)
+    with db.pool.connection() as conn:
+        assert conn.execute("SELECT id, list_name FROM wishlists").fetchall() == [(1, "default")]
+    assert db.schema_version() == len(MIGRATIONS)
+    db.close()
+    # Reopening finds nothing left to migrate.
+    assert DatabaseManager(path).schema_version() == len(MIGRATIONS)
+
+
+def test_migrate_skips_steps_applied_by_another_process(tmp_path, monkeypatch):
+    """Test that a migration is re-checked inside its transaction before it runs."""
+    path = str(tmp_path / "race.db")
+    DatabaseManager(path).close()
+    # A second process that read user_version before the first one committed.
+    monkeypatch.setattr(DatabaseManager, "schema_version", lambda self: 0)
+    db = DatabaseManager(path)
+    with db.pool.connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    db.close()
+
+
+def test_concurrent_threads_use_separate_connections(tmp_path):
+    """Test that writes from many threads all land, without sharing a cursor."""
+    import threading
+    db = DatabaseManager(str(tmp_path / "threads.db"), pool_size=4)
+    db.insert_user(email="user@example.com", full_name="John Doe", name="johndoe")
+    user_id = db.get_user_id_by_email("user@example.com")
+    errors = []
+
+    def search(n):
+        try:
+            for i in range(25):
+                db.log_search(user_id, f"query {n}")
+                assert db.get_user("user@example.com")[1] == "user@example.com"
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=search, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(db.get_search_history(user_id)) == 200
+    stats = db.pool.stats()
+    assert stats["open"] <= 4 and stats["idle"] == stats["open"]
+    db.close()
+
+
+def test_transaction_rolls_back_on_error(db):
+    """Test that a failing transaction leaves no partial writes behind."""
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.transaction() as cursor:
+            cursor.execute("INSERT INTO users (email) VALUES ('a@example.com')")
+            with db.transaction() as inner:
+                inner.execute("INSERT INTO users (email) VALUES ('a@example.com')")
+    assert not db.user_exists("a@example.com")
+
+
+def test_file_databases_use_wal(tmp_path):
+    """Test that file databases are opened in WAL mode with relaxed syncing."""
+    db = DatabaseManager(str(tmp_path / "wal.db"))
+    with db.pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    db.close()
+
+
+def test_queued_searches_are_group_committed(tmp_path):
+    """Test that queued search logs are written in batches, and bad rows do not sink a batch."""
+    db = DatabaseManager(str(tmp_path / "queue.db"))
+    db.insert_user(email="user@example.com", full_name="John Doe", name="johndoe")
+    user_id = db.get_user_id_by_email("user@example.com")
+    db.writes.interval = 1  # long enough for every row to share a batch
+    for i in range(50):
+        db.queue_search(user_id, f"query {i}")
+    db.queue_search(None, "no user")
+    assert len(db.get_search_history(user_id)) == 50
+    stats = db.writes.stats()
+    assert (stats["written"], stats["failed"], stats["pending"]) == (50, 1, 0)
+    db.queue_search(user_id, "last")
+    db.close()
+    assert DatabaseManager(str(tmp_path / "queue.db")).get_search_history(user_id)[0][2] == "last"
+
+
+def test_hot_queries_use_indexes():
+    """Test that no DatabaseManager statement needs a full table scan."""
+    from slash.src.modules.query_audit import audit, sample_calls, uncovered_methods
+    assert uncovered_methods(sample_calls()) == []
+    findings = audit()
+    assert [finding["sql"] for finding in findings if finding["scans"]] == []
+    assert any("idx_search_history_user_time" in step
+               for finding in findings if finding["method"] == "get_search_history" for step in finding["plan"])
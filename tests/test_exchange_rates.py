@@ -0,0 +1,105 @@
+import json
+import os
+import time
+import pytest
+import requests
+from slash.src.modules.exchange_rates import ExchangeRateProvider
+
+URL = "https://api.exchangerate-api.com/v4/latest/usd"
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def fake_get(url, timeout=None):
+        calls.append(url)
+        return FakeResponse({"base": "USD", "rates": {"INR": 80.0, "EUR": 0.9}})
+    monkeypatch.setattr("slash.src.modules.exchange_rates.requests.get", fake_get)
+    return calls
+
+
+def test_nothing_loaded_until_first_use(calls):
+    ExchangeRateProvider(URL)
+    assert calls == []
+
+
+def test_fixture_never_touches_network(tmp_path, calls):
+    fixture = tmp_path / "rates.json"
+    fixture.write_text(json.dumps({"rates": {"INR": 83.0}}))
+    rates = ExchangeRateProvider(URL, fixture_file=str(fixture))
+    assert rates.rate("inr") == 83.0
+    assert rates.rate("xyz") == 1
+    assert calls == []
+
+
+def test_download_is_saved_and_reused(tmp_path, calls):
+    cache_file = str(tmp_path / "rates.json")
+    assert ExchangeRateProvider(URL, cache_file=cache_file).rate("eur") == 0.9
+    assert ExchangeRateProvider(URL, cache_file=cache_file).rate("inr") == 80.0
+    assert len(calls) == 1
+
+
+def test_stale_table_refreshes_in_background(tmp_path, calls):
+    cache_file = tmp_path / "rates.json"
+    cache_file.write_text(json.dumps({"rates": {"INR": 70.0}}))
+    old = time.time() - 3600
+    os.utime(cache_file, (old, old))
+    rates = ExchangeRateProvider(URL, cache_file=str(cache_file), ttl=60)
+    assert rates.rate("inr") == 70.0
+    for _ in range(100):
+        if rates.rate("inr") == 80.0:
+            break
+        time.sleep(0.01)
+    assert rates.rate("inr") == 80.0
+    assert len(calls) == 1
+
+
+def test_failed_download_keeps_previous_table(monkeypatch):
+    def offline(url, timeout=None):
+        raise requests.ConnectionError("offline")
+    monkeypatch.setattr("slash.src.modules.exchange_rates.requests.get", offline)
+    rates = ExchangeRateProvider(URL)
+    assert rates.rate("inr") == 1
+    rates._table = {"rates": {"INR": 80.0}}
+    assert rates.refresh() is False
+    assert rates.rate("inr") == 80.0
+
+
+def test_concurrent_first_lookups_download_once(monkeypatch):
+    import threading
+    calls = []
+
+    def slow_get(url, timeout=None):
+        calls.append(url)
+        time.sleep(0.05)
+        return FakeResponse({"rates": {"INR": 80.0}})
+    monkeypatch.setattr("slash.src.modules.exchange_rates.requests.get", slow_get)
+    provider = ExchangeRateProvider(URL)
+    rates = []
+    threads = [threading.Thread(target=lambda: rates.append(provider.rate("inr"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert rates == [80.0] * 8
+    assert len(calls) == 1
+
+
+def test_warm_loads_in_the_background(calls):
+    provider = ExchangeRateProvider(URL)
+    provider.warm().join()
+    assert len(calls) == 1
+    assert provider.rate("eur") == 0.9
+    assert len(calls) == 1
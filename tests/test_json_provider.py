@@ -0,0 +1,46 @@
+import json
+import numpy as np
+import pytest
+from flask import Flask
+from slash.src.modules import json_provider
+from slash.src.modules.json_provider import FastJSONProvider, install, json_response, records_json
+
+needs_orjson = pytest.mark.skipif(not json_provider.ORJSON_AVAILABLE, reason="orjson is not installed")
+
+
+def test_records_json_encodes_product_dicts():
+    data = [{"title": "Lamp", "price": "$3.00", "rating": 4.5}, {"title": "Desk", "price": "$40", "rating": None}]
+    assert json.loads(records_json(data)) == data
+    assert json.loads(records_json([])) == []
+
+
+def test_json_response_splices_encoded_values():
+    app = Flask(__name__)
+    with app.app_context():
+        response = json_response(app, {"total": 2}, products=b'[{"n":1},{"n":2}]')
+        assert response.mimetype == "application/json"
+        assert json.loads(response.get_data()) == {"products": [{"n": 1}, {"n": 2}], "total": 2}
+        assert json.loads(json_response(app, {}, products=b"[]").get_data()) == {"products": []}
+
+
+@needs_orjson
+def test_fast_provider_matches_the_default_output():
+    app = Flask(__name__)
+    install(app)
+    assert isinstance(app.json, FastJSONProvider)
+    body = {"price": np.float64(2.5), "count": np.int64(3), "ids": {1: "one"}}
+    assert json.loads(app.json.dumps(body)) == {"price": 2.5, "count": 3, "ids": {"1": "one"}}
+    # Integers beyond 64 bits fall back to the standard encoder.
+    assert json.loads(app.json.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    assert app.json.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+    with app.test_request_context():
+        assert json.loads(app.json.response(products=[], refreshing=False).get_data()) == {
+            "products": [], "refreshing": False
+        }
+
+
+def test_json_provider_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(json_provider.Config, "JSON_PROVIDER", "json")
+    app = Flask(__name__)
+    install(app)
+    assert not isinstance(app.json, FastJSONProvider)
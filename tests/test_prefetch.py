@@ -0,0 +1,49 @@
+from datetime import datetime
+from slash.src.modules import scraper
+from slash.src.modules.DatabaseManager import DatabaseManager
+from slash.src.modules.prefetch import Prefetcher, parse_hours
+from slash.src.modules.search_cache import SearchCache, make_key, FRESH, MISS
+
+
+def fake_search(calls):
+    def search(query, df_flag, currency):
+        calls.append(query)
+        return [{"title": query, "price": "$1"}]
+    return search
+
+
+def test_top_queries_from_search_history():
+    db = DatabaseManager(":memory:")
+    db.insert_user("a@b.com", "A", "A")
+    user_id = db.get_user_id_by_email("a@b.com")
+    for query in ["AirPods", "airpods ", "laptop", "airpods", "laptop", "tv"]:
+        db.log_search(user_id, query)
+    assert db.get_top_queries(2) == [("airpods", 3), ("laptop", 2)]
+    assert db.get_top_queries(5, since=datetime(2999, 1, 1)) == []
+
+
+def test_run_warms_cache_within_budget(monkeypatch):
+    calls = []
+    monkeypatch.setattr(scraper, "SEARCH_CACHE", SearchCache())
+    monkeypatch.setattr(scraper, "enabled_searches", lambda: [("walmart", fake_search(calls)),
+                                                                ("bestbuy", fake_search(calls))])
+    prefetcher = Prefetcher(lambda limit, since: [("airpods", 9), ("laptop", 4)][:limit],
+                            top_n=2, concurrency=2, budget=3, hours="")
+    assert prefetcher.run_once() == 3
+    assert sorted(calls) == ["airpods", "airpods", "laptop"]
+    assert scraper.SEARCH_CACHE.peek(make_key("airpods", "walmart", None, 0)) == FRESH
+    assert scraper.SEARCH_CACHE.stats()["misses"] == 0
+    assert prefetcher.stats()["over_budget"] == 1
+
+    # Only the site left out by the budget is scraped on the next pass.
+    assert prefetcher.run_once() == 1
+    assert prefetcher.stats()["already_warm"] == 3
+
+
+def test_off_peak_hours():
+    assert parse_hours("0-6,23") == {0, 1, 2, 3, 4, 5, 23}
+    assert parse_hours("") == set(range(24))
+    prefetcher = Prefetcher(lambda limit, since: [], hours="1-5")
+    assert prefetcher.run_once(now=datetime(2024, 1, 1, 12)) == 0
+    assert prefetcher.stats()["skipped_runs"] == 1
+    assert scraper.SEARCH_CACHE.peek("missing") == MISS
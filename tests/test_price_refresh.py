@@ -0,0 +1,87 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from slash.src.modules import features
+from slash.src.modules.DatabaseManager import DatabaseManager
+from slash.src.modules.price_refresh import PriceRefresher
+
+
+def counting_scraper(active, peaks, site, price="$5.00", delay=0.02):
+    lock = threading.Lock()
+
+    def scrape(link):
+        with lock:
+            active[site] = active.get(site, 0) + 1
+            peaks[site] = max(peaks.get(site, 0), active[site])
+        time.sleep(delay)
+        with lock:
+            active[site] -= 1
+        return f" {price} "
+    return scrape
+
+
+def test_batches_respect_per_site_limit():
+    active, peaks = {}, {}
+    refresher = PriceRefresher(ttl=60, max_workers=8, per_site=2, scrapers={
+        "walmart": counting_scraper(active, peaks, "walmart"),
+        "bestbuy": counting_scraper(active, peaks, "bestbuy"),
+    })
+    items = [(f"https://walmart.com/{i}", "walmart", None) for i in range(6)]
+    items += [(f"https://bestbuy.com/{i}", "bestbuy", None) for i in range(6)]
+    items.append(("https://unknown.com/1", "unknown", None))
+    assert refresher.refresh(items, wait=True) == 12
+    assert peaks == {"walmart": 2, "bestbuy": 2}
+    assert refresher.cached("https://walmart.com/0") == "$5.00"
+
+
+def test_fresh_items_are_skipped():
+    calls = []
+    refresher = PriceRefresher(ttl=3600, scrapers={"walmart": lambda link: calls.append(link) or "$1"})
+    recent = datetime.now() - timedelta(minutes=5)
+    old = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S.%f")
+    assert refresher.refresh([("a", "walmart", recent), ("b", "walmart", old)], wait=True) == 1
+    assert calls == ["b"]
+    # "b" is now remembered, so another pass scrapes nothing.
+    assert refresher.refresh([("b", "walmart", old)], wait=True) == 0
+    assert refresher.stats()["skipped_fresh"] == 2
+
+
+def test_new_prices_are_stored_with_scrape_time():
+    db = DatabaseManager(":memory:")
+    db.insert_product("Lamp", None, 10.0, "USD", None, None, "https://walmart.com/lamp", None, None, "walmart")
+    with db.pool.connection() as conn:
+        conn.execute("UPDATE products SET last_scraped_at = '2020-01-01 00:00:00'")
+    product = db.get_product("https://walmart.com/lamp")
+    refresher = PriceRefresher(ttl=60, scrapers={"walmart": lambda link: "$8.50"})
+    refresher.refresh([(product[7], product[10], product[11])], wait=True,
+                      on_price=lambda link, website, price: db.update_product_price(link, 8.5))
+    product = db.get_product("https://walmart.com/lamp")
+    assert product[3] == 8.5
+    assert product[11] > "2020-01-01 00:00:00"
+
+
+def test_read_wishlist_returns_before_refresh(monkeypatch):
+    release = threading.Event()
+    refresher = PriceRefresher(ttl=60, scrapers={"walmart": lambda link: release.wait(5) and "$2.00"})
+    monkeypatch.setattr(features, "WISHLIST_REFRESHER", refresher)
+    monkeypatch.setattr(features, "WISHLIST_DB", DatabaseManager(":memory:"))
+    features.wishlist_add_item("a@b.com", "default", {
+        "title": "Lamp", "price": "$3.00", "link": "https://walmart.com/lamp", "website": "walmart"
+    })
+    with features.WISHLIST_DB.pool.connection() as conn:
+        conn.execute("UPDATE products SET last_scraped_at = '2020-01-01 00:00:00'")
+    assert features.read_wishlist("a@b.com", "default")["price"].tolist() == ["$3.00"]
+    release.set()
+    for _ in range(100):
+        if features.WISHLIST_DB.get_product("https://walmart.com/lamp")[3] == 2.0:
+            break
+        time.sleep(0.01)
+    assert features.read_wishlist("a@b.com", "default")["price"].tolist() == ["$2.00"]
+    assert features.WISHLIST_DB.get_product("https://walmart.com/lamp")[3] == 2.0
+
+
+def test_update_price_handles_every_site(monkeypatch):
+    refresher = PriceRefresher(scrapers={"amazon": lambda link: "$9.99", "walmart": lambda link: None})
+    monkeypatch.setattr(features, "WISHLIST_REFRESHER", refresher)
+    assert features.update_price("https://amazon.com/x", "amazon", "$10.00") == "$9.99"
+    assert features.update_price("https://walmart.com/x", "walmart", "$10.00") == "$10.00"
@@ -0,0 +1,58 @@
+import random
+import pytest
+from slash.src.modules import scraper
+from slash.src.modules.formatter import numericFields
+from slash.src.modules.ranking import TopK, parse_order, top_k
+
+
+def product(title, price, rating=None, reviews=None):
+    return dict(numericFields(price, rating, reviews), title=title, price=price, link="a.com", website="a")
+
+
+def test_top_k_merges_sites_by_price():
+    sites = [
+        [product("a1", "$9"), product("a2", "$3"), product("a3", "N/A")],
+        [product("b1", "$1"), product("b2", "$7")],
+        [],
+    ]
+    assert [p["title"] for p in top_k(sites, "price", 3)] == ["b1", "a2", "b2"]
+    assert [p["title"] for p in top_k(sites, "pdes")] == ["a1", "b2", "a2", "b1", "a3"]
+    assert top_k(sites, "price", 0) == []
+
+
+def test_top_k_matches_a_full_sort():
+    rng = random.Random(7)
+    rows = [product(str(n), f"${rng.randint(1, 50)}", str(rng.choice([1, 2, 3, 4, 5, ""]))) for n in range(300)]
+    for order in ("price", "price:desc", "rating", "raasc", "value"):
+        everything = TopK(order).extend(rows).result()
+        assert len(everything) == len(rows)
+        assert top_k([rows[:100], rows[100:]], order, 25) == everything[:25]
+
+
+def test_ties_keep_push_order_and_missing_scores_rank_last():
+    rows = [product("x", "$2", "4"), product("none", "$1"), product("y", "$3", "4"), product("z", "$9", "5")]
+    assert [p["title"] for p in top_k([rows], "rating")] == ["z", "x", "y", "none"]
+    assert [p["title"] for p in top_k([rows], "rating:asc")] == ["x", "y", "z", "none"]
+    assert [p["title"] for p in top_k([rows], "value")] == ["x", "y", "z", "none"]
+
+
+def test_review_counts_and_unknown_orders():
+    rows = [product("few", "$1", "5", "12 ratings"), product("many", "$1", "4", "1,024"), product("none", "$1")]
+    rows[0].pop("num_ratings_int")
+    assert [p["title"] for p in top_k([rows], "reviews", 2)] == ["many", "few"]
+    assert parse_order("rades")[1] is True
+    with pytest.raises(ValueError):
+        parse_order("cheapest")
+    with pytest.raises(ValueError):
+        parse_order("price:up")
+
+
+def test_driver_keeps_the_best_rows_across_sites(monkeypatch):
+    monkeypatch.setattr(scraper, "enabled_searches", lambda: [
+        ("a", lambda query, df_flag, currency: [product("a1", "$8"), product("a2", "$6")]),
+        ("b", lambda query, df_flag, currency: [product("b1", "$2"), product("b2", "$4"), product("", "$9")]),
+    ])
+    df = scraper.driver("ranking test", None, num=2, sort="price:desc")
+    assert df["title"].tolist() == ["a1", "a2"]
+    df = scraper.driver("ranking test", None, num=1)
+    assert df["title"].tolist() == ["a1", "b1"]
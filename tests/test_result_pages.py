@@ -0,0 +1,46 @@
+import time
+from slash.src.modules.result_pages import ResultPages, decode_cursor, encode_cursor
+
+
+def test_pages_follow_cursors_to_the_end():
+    pages = ResultPages()
+    result_id = pages.store([{"n": n} for n in range(45)], owner="a@b.com")
+    page = pages.page(result_id, 0, 20, owner="a@b.com")
+    seen = []
+    while page is not None:
+        seen += [record["n"] for record in page["records"]]
+        assert page["total"] == 45 and page["total_pages"] == 3
+        page = pages.from_cursor(page["next_cursor"], owner="a@b.com") if page["next_cursor"] else None
+    assert seen == list(range(45))
+
+
+def test_other_users_and_bad_cursors_get_nothing():
+    pages = ResultPages()
+    result_id = pages.store([{"n": 1}], owner="a@b.com")
+    cursor = encode_cursor(result_id, 0, 10)
+    assert decode_cursor(cursor) == (result_id, 0, 10)
+    assert pages.from_cursor(cursor, owner="c@d.com") is None
+    assert pages.from_cursor("not a cursor", owner="a@b.com") is None
+    assert pages.from_cursor(encode_cursor(result_id, 0, 0), owner="a@b.com") is None
+
+
+def test_result_sets_expire_and_are_bounded():
+    pages = ResultPages(max_sets=2, ttl=0.01)
+    first = pages.store([1])
+    pages.store([2])
+    pages.store([3])
+    assert pages.page(first, 0, 10) is None
+    assert pages.stats()["sets"] == 2
+    latest = pages.store([4])
+    time.sleep(0.02)
+    assert pages.page(latest, 0, 10) is None
+
+
+def test_forged_cursors_cannot_exceed_the_page_limit(monkeypatch):
+    from slash.src.modules.result_pages import Config
+    monkeypatch.setattr(Config, "SEARCH_PAGE_MAX", 10)
+    pages = ResultPages()
+    result_id = pages.store(list(range(50)), owner="a@b.com")
+    page = pages.from_cursor(encode_cursor(result_id, 0, 1000), owner="a@b.com")
+    assert page["records"] == list(range(10))
+    assert decode_cursor(page["next_cursor"]) == (result_id, 10, 10)
@@ -0,0 +1,61 @@
+import time
+import pytest
+from slash.src.modules.search_cache import SearchCache, make_key, FRESH, MISS
+
+
+@pytest.fixture
+def cache():
+    return SearchCache(max_entries=2, ttl=60, stale_ttl=60)
+
+
+def test_key_normalizes_query():
+    assert make_key("  AirPods   Pro ", "amazon", "USD", 0) == make_key("airpods pro", "amazon", "usd", False)
+    assert make_key("airpods", "amazon", None, 0) != make_key("airpods", "walmart", None, 0)
+    assert make_key("airpods", "amazon", None, 0) != make_key("airpods", "amazon", "inr", 0)
+
+
+def test_hit_after_miss(cache):
+    calls = []
+    fetch = lambda: calls.append(1) or [{"title": "A"}]
+    assert cache.get_or_fetch("k", fetch) == [{"title": "A"}]
+    assert cache.get_or_fetch("k", fetch) == [{"title": "A"}]
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_cached_rows_are_copies(cache):
+    cache.get_or_fetch("k", lambda: [{"price": "$1"}])[0]["price"] = "INR 80"
+    assert cache.get_or_fetch("k", lambda: [])[0]["price"] == "$1"
+
+
+def test_empty_results_are_not_cached(cache):
+    cache.get_or_fetch("k", lambda: [])
+    assert cache.lookup("k") == (None, MISS)
+
+
+def test_lru_eviction(cache):
+    for key in ["a", "b", "c"]:
+        cache.store(key, [key])
+    assert cache.lookup("a")[1] == MISS
+    assert cache.lookup("c")[1] == FRESH
+
+
+def test_stale_entry_served_while_refreshing(cache):
+    cache.store("k", ["old"])
+    cache._entries["k"] = (["old"], time.time() - 90)
+    assert cache.get_or_fetch("k", lambda: ["new"]) == ["old"]
+    for _ in range(100):
+        if cache.lookup("k") == (["new"], FRESH):
+            break
+        time.sleep(0.01)
+    assert cache.lookup("k") == (["new"], FRESH)
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    SearchCache(db_file=db_file).store("k", [{"title": "A"}])
+    cache = SearchCache(db_file=db_file)
+    assert cache.lookup("k") == ([{"title": "A"}], FRESH)
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from slash.src.modules import scraper
+from slash.src.modules.single_flight import SingleFlight
+
+
+def run_together(count, target):
+    results = [None] * count
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight(copy=list)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["result"]
+    threads, results = run_together(5, lambda: flights.do("airpods", fetch))
+    while flights.stats()["calls"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [["result"]] * 5
+    assert len({id(result) for result in results}) == 5
+    stats = flights.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ValueError("blocked")
+    errors = []
+
+    def call():
+        try:
+            flights.do("k", fetch)
+        except ValueError as e:
+            errors.append(e)
+    threads, _ = run_together(3, call)
+    while flights.stats()["calls"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    assert flights.do("k", lambda: "fresh") == "fresh"
+
+
+def test_async_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    async def main():
+        return await asyncio.gather(*(flights.ado("k", fetch) for _ in range(4)))
+    assert asyncio.run(main()) == [["result"]] * 4
+    assert len(calls) == 1
+    assert flights.stats()["coalesced"] == 3
+
+
+def test_identical_driver_calls_are_coalesced(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def search(query, df_flag, currency):
+        calls.append(query)
+        release.wait(5)
+        return [{"title": "AirPods", "price": "$99", "link": "l", "website": "walmart", "rating": 4.5}]
+    monkeypatch.setattr(scraper, "enabled_searches", lambda: [("walmart", search)])
+    monkeypatch.setattr(scraper, "SEARCH_CACHE", scraper.SearchCache())
+    before = scraper.DRIVER_FLIGHTS.stats()
+    statuses = [{}, {}, {}]
+    threads = [
+        threading.Thread(target=scraper.driver, args=("airpods", None), kwargs={"ui": True, "site_status": status})
+        for status in statuses
+    ]
+    for thread in threads:
+        thread.start()
+    while scraper.DRIVER_FLIGHTS.stats()["calls"] - before["calls"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ["airpods"]
+    assert all(status["walmart"]["status"] == "ok" for status in statuses)
+    assert scraper.DRIVER_FLIGHTS.stats()["coalesced"] - before["coalesced"] == 2
@@ -0,0 +1,74 @@
+import pytest
+from slash.src.modules import scraper
+from slash.src.modules.throttle import (
+    CircuitBreaker, TokenBucket, HostGuards, CircuitOpenError, RateLimitedError, CLOSED, OPEN, HALF_OPEN
+)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, jitter=0)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    assert 59 <= breaker.snapshot()["retry_in"] <= 60
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, jitter=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.opened == 2
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_backoff_doubles_with_jitter():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, max_reset_timeout=25, jitter=0.2)
+    breaker.record_failure()
+    assert 8 <= breaker.snapshot()["retry_in"] <= 12
+    breaker.state = HALF_OPEN
+    breaker.record_failure()
+    assert 16 <= breaker.snapshot()["retry_in"] <= 24
+    breaker.state = HALF_OPEN
+    breaker.record_failure()
+    assert 20 <= breaker.snapshot()["retry_in"] <= 30
+
+
+def test_bucket_spaces_requests_and_adapts():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve(1) == 0 and bucket.reserve(1) == 0
+    assert 0 < bucket.reserve(1) <= 0.1
+    with pytest.raises(RateLimitedError):
+        bucket.reserve(0.05)
+    bucket.slow_down()
+    assert bucket.rate == 5
+    bucket.speed_up()
+    assert bucket.rate == 6
+
+
+def test_blocked_site_fails_fast_with_circuit_in_status(monkeypatch):
+    guards = HostGuards(scraper.transport.SITE_HOSTS)
+    monkeypatch.setattr(scraper, "HOST_GUARDS", guards)
+    monkeypatch.setattr(scraper, "SEARCH_CACHE", scraper.SearchCache())
+    guard = guards.get("www.walmart.com")
+    for _ in range(guard.breaker.failure_threshold):
+        guard.record(429)
+
+    def search(query, df_flag, currency):
+        guard.acquire("www.walmart.com")
+        return []
+    monkeypatch.setattr(scraper, "enabled_searches", lambda: [("walmart", search)])
+    site_status = {}
+    scraper.driver("circuit test", None, ui=True, site_status=site_status)
+    assert site_status["walmart"]["status"] == "error"
+    assert site_status["walmart"]["circuit"] == OPEN
+    with pytest.raises(CircuitOpenError):
+        guard.acquire("www.walmart.com")
@@ -0,0 +1,103 @@
+import threading
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from slash.src.modules.app import app
+from slash.src.modules.transport import (
+    DnsCache, MeteredAdapter, ScraperSession, headersFor, DEFAULT_HEADERS, SAFARI_USER_AGENT
+)
+
+
+class FakeRaw:
+    retries = None
+
+
+def fake_send(self, request, *args, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = FakeRaw()
+    response.url = request.url
+    return response
+
+
+def test_header_profiles_are_prebuilt():
+    assert headersFor("https://www.etsy.com/search?q=x")["User-Agent"] == SAFARI_USER_AGENT
+    assert headersFor("https://example.com/") is DEFAULT_HEADERS
+    assert headersFor("https://www.walmart.com/a") is headersFor("https://www.walmart.com/b")
+
+
+def test_per_host_pool_sizes(monkeypatch):
+    monkeypatch.setattr("slash.src.modules.transport.Config.HTTP_HOST_POOL_SIZES", {"walmart": 4})
+    session = ScraperSession()
+    walmart = session.get_adapter("https://www.walmart.com/search?q=x")
+    assert isinstance(walmart, MeteredAdapter) and walmart.maxsize == 4
+    assert session.get_adapter("https://www.bestbuy.com/") is session.metered[0]
+
+
+def test_pool_saturation_is_counted(monkeypatch):
+    release = threading.Event()
+    started = threading.Barrier(3)
+
+    def slow_send(self, request, *args, **kwargs):
+        started.wait()
+        release.wait(5)
+        return fake_send(self, request)
+    monkeypatch.setattr(HTTPAdapter, "send", slow_send)
+    adapter = MeteredAdapter(1)
+    request = requests.Request("GET", "https://www.walmart.com/").prepare()
+    threads = [threading.Thread(target=adapter.send, args=(request,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    release.set()
+    for thread in threads:
+        thread.join()
+    stats = adapter.metrics()["www.walmart.com"]
+    assert (stats["requests"], stats["in_flight"], stats["peak_in_flight"], stats["saturated"]) == (2, 0, 2, 1)
+
+
+def test_dns_cache_reuses_lookups():
+    calls = []
+    cache = DnsCache(60, resolver=lambda *args: calls.append(args) or ["addr"])
+    assert cache.getaddrinfo("www.walmart.com", 443) == ["addr"]
+    assert cache.getaddrinfo("www.walmart.com", 443) == ["addr"]
+    cache.getaddrinfo("www.bestbuy.com", 443)
+    assert len(calls) == 2
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 2}
+
+
+def test_dns_cache_remembers_failures_briefly():
+    import socket
+    calls = []
+
+    def resolver(*args):
+        calls.append(args)
+        raise socket.gaierror("no such host")
+    cache = DnsCache(60, resolver=resolver, negative_ttl=60)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.getaddrinfo("nowhere.invalid", 443)
+    assert len(calls) == 1
+    cache.negative_ttl = 0
+    with pytest.raises(socket.gaierror):
+        cache.getaddrinfo("nowhere.invalid", 443)
+    assert len(calls) == 2
+
+
+def test_dns_cache_is_opt_in(monkeypatch):
+    import socket
+    from slash.src.modules import transport
+    assert socket.getaddrinfo is transport.SYSTEM_GETADDRINFO
+    assert transport.install_dns_cache() is None
+    monkeypatch.setattr(transport.Config, "DNS_CACHE", True)
+    try:
+        assert transport.install_dns_cache() is transport.DNS_CACHE
+        assert socket.getaddrinfo == transport.DNS_CACHE.getaddrinfo
+    finally:
+        transport.DNS_CACHE.uninstall()
+    assert socket.getaddrinfo is transport.SYSTEM_GETADDRINFO
+
+
+def test_metrics_include_http_pools():
+    response = app.test_client().get("/api/metrics")
+    assert "http_pools" in response.get_json()
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+from slash.src.modules import features
+from slash.src.modules.DatabaseManager import DatabaseManager
+from slash.src.modules.price_refresh import PriceRefresher
+
+
+@pytest.fixture
+def wishlists(monkeypatch):
+    db = DatabaseManager(":memory:")
+    monkeypatch.setattr(features, "WISHLIST_DB", db)
+    monkeypatch.setattr(features, "WISHLIST_REFRESHER", PriceRefresher(scrapers={}))
+    yield db
+    db.close()
+
+
+def item(n, price="$10.00", website="walmart"):
+    return {"title": f"Item {n}", "price": price, "link": f"https://{website}.com/{n}", "website": website,
+            "rating": "4.5", "img_link": f"https://img/{n}.png"}
+
+
+def test_named_lists(wishlists):
+    features.create_wishlist("a@b.com", "gifts")
+    features.create_wishlist("a@b.com", "gifts")
+    features.wishlist_add_item("a@b.com", "default", item(1))
+    assert sorted(features.list_wishlists("a@b.com")) == ["default", "gifts"]
+    assert features.list_wishlists("c@d.com") == []
+    features.delete_wishlist("a@b.com", "default")
+    assert features.list_wishlists("a@b.com") == ["gifts"]
+    assert features.read_wishlist("a@b.com", "default") is None
+    assert features.read_wishlist("a@b.com", "gifts").empty
+
+
+def test_add_read_and_remove_items(wishlists):
+    features.create_wishlist("a@b.com", "gifts")
+    features.wishlist_add_item("a@b.com", "gifts", pd.DataFrame([item(1), item(2, "INR 830.5")]))
+    features.wishlist_add_item("a@b.com", "gifts", item(3, "$1,299.99"))
+    features.wishlist_add_item("a@b.com", "other", item(1))
+    data = features.read_wishlist("a@b.com", "gifts")
+    assert data["title"].tolist() == ["Item 1", "Item 2", "Item 3"]
+    assert data["price"].tolist() == ["$10.00", "INR 830.5", "$1,299.99"]
+    assert data.link[1] == "https://walmart.com/2"
+    # Products are shared between lists rather than copied.
+    with wishlists.pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 3
+
+    features.wishlist_remove_list("a@b.com", "gifts", 1)
+    assert features.read_wishlist("a@b.com", "gifts")["title"].tolist() == ["Item 1", "Item 3"]
+    assert features.read_wishlist("a@b.com", "other")["title"].tolist() == ["Item 1"]
+
+
+def test_adding_an_item_twice_keeps_one(wishlists):
+    features.wishlist_add_item("a@b.com", "default", item(1))
+    features.wishlist_add_item("a@b.com", "default", item(1))
+    assert len(features.read_wishlist("a@b.com", "default")) == 1
+
+
+def test_remove_uses_the_list_index(wishlists):
+    with wishlists.pool.connection() as conn:
+        plan = conn.execute("""
+        EXPLAIN QUERY PLAN SELECT id FROM wishlists WHERE user_id = 1 AND list_name = 'default' ORDER BY id
+    """).fetchall()
+    assert any("idx_wishlists_user_list" in row[-1] for row in plan)
+
+
+def test_csv_wishlists_are_imported_once(wishlists, monkeypatch, tmp_path):
+    monkeypatch.setattr(features, "users_main_dir", tmp_path)
+    monkeypatch.setattr(features, "_CSV_CHECKED", set())
+    user_dir = tmp_path / "a@b.com"
+    user_dir.mkdir()
+    (user_dir / "cred.csv").write_text("email,name\na@b.com,A\n")
+    pd.DataFrame([item(1), item(2, "INR 830.5")]).to_csv(user_dir / "gifts.csv", index=False)
+    (user_dir / "empty.csv").touch()
+    assert sorted(features.list_wishlists("a@b.com")) == ["empty", "gifts"]
+    assert features.read_wishlist("a@b.com", "gifts")["price"].tolist() == ["$10.00", "INR 830.5"]
+    assert sorted(p.name for p in user_dir.iterdir()) == ["cred.csv", "empty.csv.imported", "gifts.csv.imported"]
+
+
+def test_managers_are_shared_per_file(tmp_path):
+    from slash.src.modules.DatabaseManager import shared_manager
+    path = str(tmp_path / "shared.db")
+    assert shared_manager(path) is shared_manager(path)
+    shared_manager(path).close()